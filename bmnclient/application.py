@@ -20,7 +20,11 @@ from .coins.list import CoinList
 from .config import Config, ConfigKey
 from .currency import FiatCurrencyList, FiatRate
 from .database import Database
-from .database.tables import AddressListTable, CoinListTable, TxListTable
+from .database.tables import (
+    AddressListTable,
+    CoinListTable,
+    TxListTable,
+    UtxoListTable)
 from .debug import Debug
 from .key_store import KeyStore
 from .language import Language
@@ -37,7 +41,8 @@ from .signal_handler import SignalHandler
 from .version import Product, ProductPaths, Server, Timer
 
 if TYPE_CHECKING:
-    from typing import List, Optional, Type, Union
+    from concurrent.futures import Future
+    from typing import Any, List, Optional, Tuple, Type, Union
     from PySide6.QtCore import QCoreApplication
     from .coins.abstract import CoinModelFactory
     from .coins.hd import HdNode
@@ -101,6 +106,33 @@ class CommandLine:
             action="store_true",
             default=False,
             help="do not check the validity of server certificates")
+        parser.add_argument(
+            "--db-journal-mode",
+            default=Database.JournalMode.WAL.value,
+            choices=[m.value for m in Database.JournalMode],
+            help="journal mode of the wallet database, 'wal' reduces the"
+            " commit latency; by default, it is"
+            " '{}'".format(Database.JournalMode.WAL.value))
+        parser.add_argument(
+            "--db-durability",
+            default=Database.Durability.NORMAL.value,
+            choices=[d.value for d in Database.Durability],
+            help="durability level of the wallet database; by default, it is"
+            " '{}'".format(Database.Durability.NORMAL.value))
+        parser.add_argument(
+            "--db-page-size",
+            type=int,
+            default=Database.defaultPageSize,
+            choices=Database.pageSizeList,
+            help="page size of the wallet database in bytes, existing database"
+            " will be migrated; by default, it is {}"
+            .format(Database.defaultPageSize))
+        parser.add_argument(
+            "--db-profile",
+            action="store_true",
+            default=False,
+            help="collect statistics of the database queries and write the"
+            " report to the log on exit")
 
         self._arguments = parser.parse_args(self._argv[1:])
         assert isinstance(self._arguments.config_path, Path)
@@ -110,6 +142,10 @@ class CommandLine:
         assert self._arguments.debug == Debug.isEnabled
         assert isinstance(self._arguments.server_url, str)
         assert isinstance(self._arguments.server_insecure, bool)
+        assert isinstance(self._arguments.db_journal_mode, str)
+        assert isinstance(self._arguments.db_durability, str)
+        assert isinstance(self._arguments.db_page_size, int)
+        assert isinstance(self._arguments.db_profile, bool)
 
     @property
     def argv(self) -> List[str]:
@@ -143,6 +179,22 @@ class CommandLine:
     def allowServerInsecure(self) -> bool:
         return self._arguments.server_insecure
 
+    @property
+    def databaseJournalMode(self) -> Database.JournalMode:
+        return Database.JournalMode(self._arguments.db_journal_mode)
+
+    @property
+    def databaseDurability(self) -> Database.Durability:
+        return Database.Durability(self._arguments.db_durability)
+
+    @property
+    def databasePageSize(self) -> int:
+        return self._arguments.db_page_size
+
+    @property
+    def databaseProfile(self) -> bool:
+        return self._arguments.db_profile
+
     @classmethod
     def _expandPath(cls, path: str) -> Path:
         return Path(os.path.expanduser(os.path.expandvars(path)))
@@ -233,7 +285,11 @@ class CoreApplication(QObject):
     def _init_database(self) -> None:
         self._database = Database(
             self,
-            self._command_line.configPath / ProductPaths.DATABASE_FILE_NAME)
+            self._command_line.configPath / ProductPaths.DATABASE_FILE_NAME,
+            journal_mode=self._command_line.databaseJournalMode,
+            durability=self._command_line.databaseDurability,
+            page_size=self._command_line.databasePageSize,
+            profile=self._command_line.databaseProfile)
 
     def _init_network(self) -> None:
         Network.configure()
@@ -393,9 +449,21 @@ class CoreApplication(QObject):
                 # TODO show message, force user to regenerate seed?
                 pass
 
-        if self._database.open():
-            if not self._loadWalletData():
-                self._database.close()
+        # wallet rows are read by the database thread, objects are created
+        # in _onFetchWalletData(), nothing is written before
+        self._database.writeQueue.suspend()
+        self._database.executor.start()
+        self._database.executor.submit(
+            self._fetchWalletData,
+            callback=self._onFetchWalletData)
+
+    def _onFetchWalletData(self, future: Future) -> None:
+        result_list = future.result()
+        if result_list is None:
+            self._database.close()
+        else:
+            self._loadWalletData(result_list)
+        self._database.writeQueue.resume()
         if not self._database.isOpen:
             # TODO show message, allow continue without database
             pass
@@ -410,33 +478,69 @@ class CoreApplication(QObject):
             # TODO show message if failed
             pass
 
-    def _loadWalletData(self) -> bool:  # TODO move to coins
+    def _fetchWalletData(self) -> Optional[List[Tuple[Any, ...]]]:
+        # database thread
+        if not self._database.open():
+            return None
+        result_list = []
         try:
             with self._database.transaction() as cursor:
                 for coin in self._coin_list:
-                    if not self._database[CoinListTable].deserialize(
-                            cursor,
-                            coin):
-                        self._logger.debug(
-                            "Cannot deserialize coin '%s' from database.",
-                            coin.name)
-                        self._database[CoinListTable].serialize(cursor, coin)
+                    coin_result = self._database[CoinListTable].fetch(
+                        cursor,
+                        coin)
+                    if coin_result is None:
+                        result_list.append((coin, None, None, None, None))
                         continue
-
-                    self._database[AddressListTable].deserializeAll(
+                    coin_row_id = coin_result["row_id"]
+                    result_list.append((
+                        coin,
+                        coin_result,
+                        self._database[AddressListTable].fetchAll(
                             cursor,
-                            coin)
-
-                    for address in coin.addressList:
-                        self._database[TxListTable].deserializeAll(
+                            coin,
+                            coin_row_id),
+                        self._database[TxListTable].fetchAll(
+                            cursor,
+                            coin,
+                            coin_row_id),
+                        self._database[UtxoListTable].fetchAll(
                             cursor,
-                            address)
+                            coin,
+                            coin_row_id)
+                    ))
         except (Database.engine.Error, Database.engine.Warning) as e:
             self._logger.error(
                 "Failed to read wallet from database: %s",
                 str(e))
-            return False
-        return True
+            return None
+        return result_list
+
+    def _loadWalletData(
+            self,
+            result_list: List[Tuple[Any, ...]]) -> None:  # TODO move to coins
+        for (
+                coin,
+                coin_result,
+                address_result,
+                tx_result,
+                utxo_result
+        ) in result_list:
+            if (
+                    coin_result is None
+                    or not self._database[CoinListTable].load(
+                        coin,
+                        coin_result)
+            ):
+                self._logger.debug(
+                    "Cannot deserialize coin '%s' from database.",
+                    coin.name)
+                self._database.writeQueue.appendCoin(coin)
+                continue
+
+            self._database[AddressListTable].loadAll(coin, address_result)
+            self._database[TxListTable].loadAll(coin, tx_result)
+            self._database[UtxoListTable].loadAll(coin, utxo_result)
 
     @QSlot()
     def _onRunPrivate(self) -> None:
@@ -456,4 +560,8 @@ class CoreApplication(QObject):
         assert not self._on_exit_called
         self._on_exit_called = True
         self._database.close()
+        if self._database.profiler is not None:
+            self._logger.info(
+                "Database profile:\n%s",
+                self._database.profiler.report())
         self._signal_handler.close()
@@ -4,7 +4,6 @@ from typing import TYPE_CHECKING
 
 from .coins.abstract import Coin
 from .coins.utils import CoinUtils
-from .database.tables import AddressListTable, CoinListTable, TxListTable
 from .logger import Logger
 
 if TYPE_CHECKING:
@@ -37,11 +36,7 @@ class CoinModel(_AbstractModel, Coin.Model):
             **kwargs)
 
     def _save(self) -> None:
-        try:
-            with self._database.transaction() as cursor:
-                self._database[CoinListTable].serialize(cursor, self._coin)
-        except self._database.TransactionInEffectError:
-            pass
+        self._database.writeQueue.appendCoin(self._coin)
 
     def afterSetEnabled(self) -> None:
         self._save()
@@ -70,11 +65,7 @@ class CoinModel(_AbstractModel, Coin.Model):
 
     def afterAppendAddress(self, address: Coin.Address) -> None:
         if address.rowId <= 0:
-            try:
-                with self._database.transaction() as cursor:
-                    self._database[AddressListTable].serialize(cursor, address)
-            except self._database.TransactionInEffectError:
-                pass
+            self._database.writeQueue.appendAddress(address)
         self._query_scheduler.updateCoinAddress(address)
 
     def afterSetServerData(self) -> None:
@@ -93,13 +84,7 @@ class AddressModel(_AbstractModel, Coin.Address.Model):
             **kwargs)
 
     def _save(self) -> None:
-        try:
-            with self._database.transaction() as cursor:
-                self._database[AddressListTable].serialize(
-                    cursor,
-                    self._address)
-        except self._database.TransactionInEffectError:
-            pass
+        self._database.writeQueue.appendAddress(self._address)
 
     def afterSetBalance(self) -> None:
         self._save()
@@ -121,17 +106,15 @@ class AddressModel(_AbstractModel, Coin.Address.Model):
 
     def afterAppendTx(self, tx: Coin.Tx) -> None:
         if tx.rowId <= 0:
-            try:
-                with self._database.transaction() as cursor:
-                    self._database[TxListTable].serialize(
-                        cursor,
-                        self._address,
-                        tx)
-            except self._database.TransactionInEffectError:
-                pass
+            self._database.writeQueue.appendTx(tx, self._address)
 
     def afterSetUtxoList(self) -> None:
-        pass
+        # skip the list that was just loaded from the database
+        if (
+                not self._address.utxoList
+                or any(u.rowId <= 0 for u in self._address.utxoList)
+        ):
+            self._database.writeQueue.appendUtxoList(self._address)
 
     def afterSetHistoryFirstOffset(self) -> None:
         self._save()
@@ -149,14 +132,7 @@ class TxModel(_AbstractModel, Coin.Tx.Model):
             **kwargs)
 
     def _save(self) -> None:
-        try:
-            with self._database.transaction() as cursor:
-                self._database[TxListTable].serialize(
-                    cursor,
-                    None,
-                    self._tx)
-        except self._database.TransactionInEffectError:
-            pass
+        self._database.writeQueue.appendTx(self._tx)
 
     def afterSetHeight(self) -> None:
         self._save()
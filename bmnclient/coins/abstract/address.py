@@ -154,7 +154,23 @@ class _Model(CoinObjectModel):
 
 
 class _Address(CoinObject):
-    __initialized = False
+    __slots__ = (
+        "__initialized",
+        "__hash",
+        "_name",
+        "_type",
+        "_data",
+        "_key",
+        "_balance",
+        "_label",
+        "_comment",
+        "_is_tx_input",
+        "_tx_count",
+        "_tx_list",
+        "_utxo_list",
+        "_history_first_offset",
+        "_history_last_offset"
+    )
 
     _NULLDATA_NAME = "NULL_DATA"
     _HRP = "hrp"
@@ -177,15 +193,21 @@ class _Address(CoinObject):
     def __new__(cls, coin: Coin, *args, **kwargs) -> _Address:
         # noinspection PyUnresolvedReferences
         if kwargs.get("type_") == cls.Type.UNKNOWN or not kwargs.get("name"):
-            return super(_Address, cls).__new__(cls)
+            return cls.__create()
 
         heap = coin.weakValueDictionary("address_heap")
         address = heap.get(kwargs["name"])
         if address is None:
-            address = super(_Address, cls).__new__(cls)
+            address = cls.__create()
         heap[kwargs["name"]] = address
         return address
 
+    @classmethod
+    def __create(cls) -> _Address:
+        address = super(_Address, cls).__new__(cls)
+        address.__initialized = False
+        return address
+
     def __init__(self, coin: Coin, *, row_id: int = -1, **kwargs) -> None:
         if self.__initialized:
             assert self._coin is coin
@@ -375,7 +397,12 @@ class _Address(CoinObject):
 
     @key.setter
     def key(self, value: Optional[KeyType]) -> None:
+        is_read_only = self.isReadOnly
         self._key = value
+        if self._coin.findAddressByName(self._name) is self:
+            self._coin.updateHdIndex(self)
+            if is_read_only != self.isReadOnly:
+                self._coin.updateBalance()
 
     def exportKey(self, *, allow_hd_path: bool = False) -> Optional[str]:
         if isinstance(self._key, HdNode):
@@ -456,9 +483,10 @@ class _Address(CoinObject):
     @balance.setter
     def balance(self, value: int) -> None:
         if self._balance != value:
+            delta = value - self._balance
             self._balance = value
             self._callModel("afterSetBalance")
-            self._coin.updateBalance()
+            self._coin.updateAddressBalance(self, delta)
 
     @serializable
     @property
@@ -540,11 +568,15 @@ class _Address(CoinObject):
             return
 
         for utxo in utxo_list:
-            utxo.address = self
+            if utxo.address is not self:
+                utxo.address = self
         self._utxo_list = utxo_list
-
         self._callModel("afterSetUtxoList")
-        self._coin.updateUtxoList()
+        if (
+                self._coin.findAddressByName(self._name) is self
+                and self._coin.utxoSet.update(self, utxo_list)
+        ):
+            self._coin.updateUtxoList()
 
         self.balance = sum(u.amount for u in self._utxo_list)
 
@@ -6,8 +6,13 @@ from weakref import WeakValueDictionary
 
 from .object import CoinObject, CoinObjectModel
 from ..hd import HdNode
+from ..utxo_selection import (
+    BranchAndBoundUtxoSelection,
+    KnapsackUtxoSelection,
+    LargestFirstUtxoSelection)
 from ...crypto.digest import Sha256Digest
 from ...currency import Currency, FiatRate, NoneFiatCurrency
+from ...debug import Debug
 from ...utils.class_property import classproperty
 from ...utils.serialize import DeserializationNotSupportedError, serializable
 
@@ -19,8 +24,11 @@ if TYPE_CHECKING:
         Generator,
         List,
         Optional,
+        Tuple,
+        Type,
         Union)
     from .object import CoinModelFactory
+    from ..utxo_selection import AbstractUtxoSelection
     from ...utils.serialize import DeserializedData
 
 
@@ -79,6 +87,13 @@ class Coin(CoinObject):
 
     _WIF_VERSION = 0x00
 
+    # tried in order by TxFactory, the first non-empty selection is used
+    _UTXO_SELECTION_LIST: Tuple[Type[AbstractUtxoSelection], ...] = (
+        BranchAndBoundUtxoSelection,
+        KnapsackUtxoSelection,
+        LargestFirstUtxoSelection
+    )
+
     Model = _Model
     Currency = Currency
 
@@ -91,6 +106,9 @@ class Coin(CoinObject):
     from .tx_factory import _TxFactory
     TxFactory = _TxFactory
 
+    from .utxo_set import _UtxoSet
+    UtxoSet = _UtxoSet
+
     class MempoolCacheItem:
         __slots__ = ("remote_hash", "access_count")
 
@@ -126,13 +144,19 @@ class Coin(CoinObject):
 
         self._fiat_rate = FiatRate(0, NoneFiatCurrency)
         self._balance = 0
+        self._read_only_balance = 0
 
         self._hd_node_list: Dict[int, HdNode] = {}
+        # parent path -> next address index, see nextHdIndex()
+        self._hd_index_map: Dict[Tuple[int, ...], int] = {}
 
         self._address_list: List[Coin.Address] = []
+        # casefolded name -> address, same content as _address_list
+        self._address_name_map: Dict[str, Coin.Address] = {}
         self._server_data: Dict[str, Union[int, str]] = {}
         self._mempool_cache: Dict[bytes, Coin.MempoolCacheItem] = {}
         self._mempool_cache_access_counter = 0
+        self._utxo_set = self.UtxoSet()
         self._tx_factory = self.TxFactory(self)
 
     def __eq__(self, other: Coin) -> bool:
@@ -149,6 +173,11 @@ class Coin(CoinObject):
         address_list = kwargs.pop("address_list", None)
         if address_list is not None:
             self._address_list.clear()  # TODO compare with new list!
+            self._address_name_map.clear()
+            self._hd_index_map.clear()
+            self._utxo_set.clear()
+            self._balance = 0
+            self._read_only_balance = 0
             for address in address_list:
                 self.appendAddress(address)
         result = super().__update__(**kwargs)
@@ -217,6 +246,11 @@ class Coin(CoinObject):
     def wifVersion(cls) -> int:  # noqa
         return cls._WIF_VERSION
 
+    @classproperty
+    def utxoSelectionList(  # noqa
+            cls) -> Tuple[Type[AbstractUtxoSelection], ...]:
+        return cls._UTXO_SELECTION_LIST
+
     @classproperty
     def iconPath(cls) -> str:  # noqa
         # relative to "resources/images"
@@ -330,11 +364,41 @@ class Coin(CoinObject):
     def balance(self) -> int:
         return self._balance
 
+    @property
+    def readOnlyBalance(self) -> int:
+        return self._read_only_balance
+
     def updateBalance(self) -> None:
-        a = sum(a.balance for a in self._address_list if not a.isReadOnly)
-        self._balance = a
+        self._balance, self._read_only_balance = self.__sumBalance()
         self._callModel("afterUpdateBalance")
 
+    def updateAddressBalance(self, address: Address, delta: int) -> None:
+        if self.findAddressByName(address.name) is not address:
+            return
+        self.__appendBalance(address, delta)
+        if Debug.isEnabled:
+            assert (
+                    (self._balance, self._read_only_balance)
+                    == self.__sumBalance()
+            )
+        self._callModel("afterUpdateBalance")
+
+    def __appendBalance(self, address: Address, delta: int) -> None:
+        if address.isReadOnly:
+            self._read_only_balance += delta
+        else:
+            self._balance += delta
+
+    def __sumBalance(self) -> Tuple[int, int]:
+        balance = 0
+        read_only_balance = 0
+        for address in self._address_list:
+            if address.isReadOnly:
+                read_only_balance += address.balance
+            else:
+                balance += address.balance
+        return balance, read_only_balance
+
     def updateUtxoList(self) -> None:
         self._tx_factory.updateUtxoList()
         self._callModel("afterUpdateUtxoList")
@@ -369,24 +433,21 @@ class Coin(CoinObject):
         return self._hd_node_list
 
     def nextHdIndex(self, purpose: int, account: int, change: int) -> int:
-        index = 0
         parent_path = (
             HdNode.toHardenedLevel(purpose),
             HdNode.toHardenedLevel(self._BIP0044_COIN_TYPE),
             HdNode.toHardenedLevel(account),
             change)
+        return self._hd_index_map.get(parent_path, 0)
 
-        for address in self._address_list:
-            if not isinstance(address.key, HdNode):
-                continue
-            if address.key.path[:-1] != parent_path:
-                continue
-
-            assert address.key.path[4] == address.key.index
-            if address.key.index >= index:
-                index = address.key.index + 1
-
-        return index
+    def updateHdIndex(self, address: Address) -> None:
+        key = address.key
+        if not isinstance(key, HdNode) or not key.path:
+            return
+        assert key.path[-1] == key.index
+        parent_path = key.path[:-1]
+        if key.index >= self._hd_index_map.get(parent_path, 0):
+            self._hd_index_map[parent_path] = key.index + 1
 
     def deriveHdAddress(
             self,
@@ -502,23 +563,28 @@ class Coin(CoinObject):
         if not name:
             return None
         name = name.strip().casefold()  # TODO tmp, old wrapper
-        for address in self._address_list:
-            if name == address.name.casefold():
-                return address
-        return None
+        return self._address_name_map.get(name)
 
     def appendAddress(self, address: Address) -> bool:
         if address is None:
             return False
-        # TODO tmp, old wrapper
-        if self.findAddressByName(address.name) is not None:  # noqa
+        name = address.name.casefold()
+        if name in self._address_name_map:
             return False
 
         self._callModel("beforeAppendAddress", address)
         self._address_list.append(address)
+        self._address_name_map[name] = address
+        self.updateHdIndex(address)
         self._callModel("afterAppendAddress", address)
+        if (
+                address.utxoList
+                and self._utxo_set.update(address, address.utxoList)
+        ):
+            self.updateUtxoList()
 
-        self.updateBalance()
+        self.__appendBalance(address, address.balance)
+        self._callModel("afterUpdateBalance")
         return True
 
     @property
@@ -591,6 +657,10 @@ class Coin(CoinObject):
     def txFactory(self) -> TxFactory:
         return self._tx_factory
 
+    @property
+    def utxoSet(self) -> UtxoSet:
+        return self._utxo_set
+
     def weakValueDictionary(self, name: str):
         heap = self.__dict__.get(name)
         if heap is None:
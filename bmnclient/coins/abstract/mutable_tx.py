@@ -6,7 +6,7 @@ from typing import TYPE_CHECKING
 from .tx import _Tx
 
 if TYPE_CHECKING:
-    from typing import Final, Optional, Sequence
+    from typing import Final, Optional, Sequence, Tuple
     from .coin import Coin
 
 
@@ -65,6 +65,16 @@ class _MutableTx(_Tx):
     def isDummy(self) -> bool:
         return self._is_dummy
 
+    @classmethod
+    def estimateSizes(
+            cls,
+            utxo_list: Sequence[Coin.Tx.Utxo],
+            output_list: Sequence[Tuple[Coin.Address, int]]
+    ) -> Optional[Tuple[int, int]]:
+        # (rawSize, virtualSize) of the signed transaction, None if the size
+        # can't be estimated without signing
+        raise NotImplementedError
+
     def _deriveName(self) -> Optional[str]:
         raise NotImplementedError
 
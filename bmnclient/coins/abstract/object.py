@@ -15,6 +15,9 @@ class CoinObjectModel:
 
 
 class CoinObject(Serializable):
+    # weakref for Coin.weakValueDictionary() heaps
+    __slots__ = ("_coin", "__model", "__weakref__")
+
     def __init__(self, coin: Coin, row_id: int = -1) -> None:
         super().__init__(row_id=row_id)
         self._coin: Final = coin
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 from enum import Enum
-from functools import cached_property
 from typing import TYPE_CHECKING
 
 from .object import CoinObject, CoinObjectModel
@@ -30,7 +29,17 @@ class _Model(CoinObjectModel):
 
 
 class _Tx(CoinObject):
-    __initialized = False
+    __slots__ = (
+        "__initialized",
+        "_name",
+        "_height",
+        "_time",
+        "_amount",
+        "_fee_amount",
+        "_is_coinbase",
+        "_input_list",
+        "_output_list"
+    )
 
     class Status(Enum):
         PENDING = 0
@@ -47,16 +56,22 @@ class _Tx(CoinObject):
 
     def __new__(cls, coin: Coin, *args, **kwargs) -> _Tx:
         if not kwargs.get("name"):
-            return super(_Tx, cls).__new__(cls)
+            return cls.__create()
 
         heap = coin.weakValueDictionary("tx_heap")
         name = kwargs["name"].lower()
         tx = heap.get(name)
         if tx is None:
-            tx = super(_Tx, cls).__new__(cls)
+            tx = cls.__create()
         heap[name] = tx
         return tx
 
+    @classmethod
+    def __create(cls) -> _Tx:
+        tx = super(_Tx, cls).__new__(cls)
+        tx.__initialized = False
+        return tx
+
     def __init__(self, coin: Coin, *, row_id: int = -1, **kwargs) -> None:
         if self.__initialized:
             assert self._coin is coin
@@ -105,7 +120,7 @@ class _Tx(CoinObject):
     def name(self) -> str:
         return self._name
 
-    @cached_property
+    @property
     def nameHuman(self) -> str:
         return self.toNameHuman(self._name)
 
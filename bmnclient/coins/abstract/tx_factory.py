@@ -7,12 +7,14 @@ from typing import TYPE_CHECKING
 
 from .object import CoinObject, CoinObjectModel
 from ..utils import CoinUtils
+from ..utxo_selection import UtxoArray
 from ...crypto.secp256k1 import PublicKey
 from ...logger import Logger
 
 if TYPE_CHECKING:
-    from typing import List, Optional, Sequence, Tuple
+    from typing import Dict, Final, List, Optional, Sequence, Tuple, Type
     from .coin import Coin
+    from ..utxo_selection import AbstractUtxoSelection
     SelectedUtxoList = Tuple[List[Coin.Tx.Utxo], int]
 
 
@@ -41,17 +43,28 @@ class _Model(CoinObjectModel):
 class _TxFactory(CoinObject):
     Model = _Model
 
+    # UtxoArray is used for larger sets if NumPy is available
+    _UTXO_ARRAY_MIN_LENGTH: Final = 1000
+
     from .mutable_tx import _MutableTx
     MutableTx = _MutableTx
 
     class _SelectedUtxoData:
-        __slots__ = ("list", "amount", "raw_size", "virtual_size")
+        __slots__ = (
+            "list",
+            "amount",
+            "raw_size",
+            "virtual_size",
+            "with_change"
+        )
 
         def __init__(self) -> None:
             self.list: List[Coin.Tx.Utxo] = []
             self.amount = 0
             self.raw_size = -1
             self.virtual_size = -1
+            # False if the excess amount is left to the fee
+            self.with_change = True
 
     def __init__(self, coin: Coin) -> None:
         super().__init__(coin)
@@ -59,9 +72,13 @@ class _TxFactory(CoinObject):
             self.__class__,
             *CoinUtils.coinToNameKeyTuple(coin))
 
+        # filtered copy of Coin.utxoSet, see __updateUtxoList()
         self._utxo_list: Sequence[Coin.Tx.Utxo] = []
         self._utxo_amount = 0
-        self._selected_utxo_data = self._SelectedUtxoData()
+        self._utxo_set_version = -1
+        # None if selection should be updated before use
+        self._selected_utxo_data: Optional[
+            _TxFactory._SelectedUtxoData] = None
 
         self._input_address: Optional[Coin.Address] = None
 
@@ -74,6 +91,8 @@ class _TxFactory(CoinObject):
         self._fee_amount_per_byte = 103  # TODO
 
         self._dummy_change_address = self._createDummyChangeAddress()
+        # (fee amount per byte, address type) -> _changeCost()
+        self._change_cost_map: Dict[Tuple[int, Coin.Address.Type], int] = {}
 
         self._mtx: Optional[_TxFactory.MutableTx] = None
 
@@ -127,6 +146,8 @@ class _TxFactory(CoinObject):
         self._coin.setTxInputAddress(address)
         self._input_address = address
         self._callModel("afterSetInputAddress")
+        # filter of __updateUtxoList() is changed, UTXO set is the same
+        self._utxo_set_version = -1
         self.updateUtxoList()
 
         return result
@@ -145,7 +166,7 @@ class _TxFactory(CoinObject):
         if self._receiver_address != address:
             self._receiver_address = address
             self._callModel("afterSetReceiverAddress")
-            self._selectUtxoList()
+            self.__clearSelectedUtxoList()
 
         return address is not None
 
@@ -159,6 +180,7 @@ class _TxFactory(CoinObject):
 
     @property
     def availableAmount(self) -> int:
+        self.__updateUtxoList()
         return self._utxo_amount
 
     @property
@@ -169,7 +191,7 @@ class _TxFactory(CoinObject):
     def receiverAmount(self, value: int) -> None:
         if self._receiver_amount != value:
             self._receiver_amount = value
-            self._selectUtxoList()
+            self.__clearSelectedUtxoList()
 
     def setReceiverMaxAmount(self) -> int:
         if self._selectUtxoList(select_all=True, skip_model_update=True):
@@ -198,7 +220,7 @@ class _TxFactory(CoinObject):
     def subtractFee(self, value: bool) -> None:
         if self._subtract_fee != value:
             self._subtract_fee = value
-            self._selectUtxoList()
+            self.__clearSelectedUtxoList()
 
     @property
     def feeAmountPerByteDefault(self) -> int:
@@ -213,14 +235,24 @@ class _TxFactory(CoinObject):
     def feeAmountPerByte(self, value: int) -> None:
         if self._fee_amount_per_byte != value:
             self._fee_amount_per_byte = value
-            self._selectUtxoList()
+            self.__clearSelectedUtxoList()
 
     @property
     def feeAmount(self) -> Optional[int]:
-        return self._feeAmount(
+        fee_amount = self._feeAmount(
             self._fee_amount_per_byte,
-            self._selected_utxo_data.raw_size,
-            self._selected_utxo_data.virtual_size)
+            self.__selectedUtxoData.raw_size,
+            self.__selectedUtxoData.virtual_size)
+        if (
+                fee_amount is not None
+                and not self.__selectedUtxoData.with_change
+                and not self._subtract_fee
+        ):
+            # excess amount is cheaper to pay than the change
+            fee_amount = max(
+                fee_amount,
+                self.__selectedUtxoData.amount - self._receiver_amount)
+        return fee_amount
 
     @property
     def isValidFeeAmount(self) -> bool:
@@ -233,7 +265,7 @@ class _TxFactory(CoinObject):
 
     @property
     def changeAmount(self) -> Optional[int]:
-        change_amount = self._selected_utxo_data.amount - self._receiver_amount
+        change_amount = self.__selectedUtxoData.amount - self._receiver_amount
         if not self._subtract_fee:
             fee_amount = self.feeAmount
             if fee_amount is None:
@@ -247,11 +279,11 @@ class _TxFactory(CoinObject):
 
     @property
     def estimatedRawSize(self) -> int:
-        return self._selected_utxo_data.raw_size
+        return self.__selectedUtxoData.raw_size
 
     @property
     def estimatedVirtualSize(self) -> int:
-        return self._selected_utxo_data.virtual_size
+        return self.__selectedUtxoData.virtual_size
 
     def clear(self) -> None:
         self._change_address = None
@@ -276,7 +308,7 @@ class _TxFactory(CoinObject):
         raise NotImplementedError
 
     def prepare(self) -> bool:
-        if not self._selected_utxo_data.list:
+        if not self.__selectedUtxoData.list:
             self._logger.error("No input UTXO's selected.")
             return False
 
@@ -316,7 +348,7 @@ class _TxFactory(CoinObject):
             self._change_address = None
 
         self._mtx = self._prepare(
-            self._selected_utxo_data.list,
+            self.__selectedUtxoData.list,
             output_list,
             is_dummy=False,
             time=int(time()))
@@ -354,6 +386,8 @@ class _TxFactory(CoinObject):
             cls,
             utxo_list: Sequence[Coin.Tx.Utxo],
             target_amount: int) -> Optional[Coin.Tx.Utxo]:
+        if isinstance(utxo_list, UtxoArray):
+            return utxo_list.findExact(target_amount)
         exact_utxo = None
         for utxo in utxo_list:
             if utxo.amount == target_amount:
@@ -361,98 +395,86 @@ class _TxFactory(CoinObject):
                     exact_utxo = utxo
         return exact_utxo
 
-    @classmethod
-    def _findOptimalUtxoList(
-            cls,
-            utxo_list: Sequence[Coin.Tx.Utxo],
-            target_amount: int) -> SelectedUtxoList:
-        # single utxo
-        exact_utxo = None
-        for utxo in utxo_list:
-            if utxo.amount >= target_amount:
-                if (
-                        exact_utxo is None
-                        or (utxo.amount < exact_utxo.amount)
-                        or (
-                            exact_utxo.amount == utxo.amount
-                            and cls._newUtxoIsBest(exact_utxo, utxo)
-                        )
-                ):
-                    exact_utxo = utxo
-        if exact_utxo is not None:
-            return [exact_utxo], exact_utxo.amount
-
-        return cls._findOptimalUtxoListStrategy1(utxo_list, target_amount)
-
-    @staticmethod
-    def _findOptimalUtxoListStrategy1(
-            utxo_list: Sequence[Coin.Tx.Utxo],
-            target_amount: int) -> SelectedUtxoList:
-        if len(utxo_list) < 2:
-            return [], 0
-
-        best_utxo_list = []
-        best_utxo_amount = 0
-        utxo_list_offset = 0
-        utxo_list = sorted(
-            utxo_list,
-            key=lambda u: (u.amount, u.height),
-            reverse=True)
-
-        for limit in range(2, len(utxo_list) + 1):
-            exact_found = False
-            while utxo_list_offset + limit <= len(utxo_list):
-                current_list = []
-                current_amount = 0
-                for i in range(limit):
-                    utxo = utxo_list[utxo_list_offset + i]
-                    current_list.append(utxo)
-                    current_amount += utxo.amount
-
-                if current_amount < target_amount:
-                    break
-                if current_amount == target_amount:
-                    exact_found = True
-                elif exact_found:
-                    break
-
-                best_utxo_list = current_list
-                best_utxo_amount = current_amount
-                utxo_list_offset += 1
-
-            if best_utxo_list:
-                break
-
-        return best_utxo_list, best_utxo_amount
-
     @classmethod
     def _findUtxoList(
             cls,
             utxo_list: Sequence[Coin.Tx.Utxo],
-            target_amount: int) -> SelectedUtxoList:
+            target_amount: int,
+            *,
+            selection_list: Sequence[Type[AbstractUtxoSelection]],
+            change_cost: int = 0) -> SelectedUtxoList:
         if target_amount <= 0:
             return [], 0
 
         exact_utxo = cls._findExactUtxo(utxo_list, target_amount)
         if exact_utxo is not None:
             return [exact_utxo], exact_utxo.amount
-        else:
-            return cls._findOptimalUtxoList(utxo_list, target_amount)
+
+        for selection in selection_list:
+            result = selection.select(
+                utxo_list,
+                target_amount,
+                change_cost=change_cost)
+            if result[0]:
+                return result
+        return [], 0
+
+    def _changeCost(self) -> int:
+        # fee of the change output and of its input in a future transaction
+        if self._dummy_change_address is None:
+            return 0
+        key = (self._fee_amount_per_byte, self._dummy_change_address.type)
+        change_cost = self._change_cost_map.get(key)
+        if change_cost is None:
+            change_cost = self._change_cost_map[key] = \
+                self._estimateChangeCost()
+        return change_cost
+
+    def _estimateChangeCost(self) -> int:
+        utxo = self._coin.Tx.Utxo(
+            self._coin,
+            name="00" * 32,
+            height=0,
+            index=0,
+            amount=self._coin.Currency.maxValue)
+        utxo.address = self._dummy_change_address
+        output = (self._dummy_change_address, self._coin.Currency.maxValue)
+
+        base_sizes = self.MutableTx.estimateSizes([utxo], [output])
+        output_sizes = self.MutableTx.estimateSizes([utxo], [output, output])
+        input_sizes = self.MutableTx.estimateSizes([utxo, utxo], [output])
+        if base_sizes is None or output_sizes is None or input_sizes is None:
+            return 0
+        fee_amount = self._feeAmount(
+            self._fee_amount_per_byte,
+            output_sizes[0] + input_sizes[0] - 2 * base_sizes[0],
+            output_sizes[1] + input_sizes[1] - 2 * base_sizes[1])
+        return fee_amount or 0
 
     def _calcEstimatedSizes(
             self,
             utxo_list: Sequence[Coin.Tx.Utxo],
-            utxo_amount: int) -> Tuple[int, int]:
+            utxo_amount: int,
+            *,
+            with_change: bool = True) -> Tuple[int, int]:
         if not utxo_list or self._receiver_address is None:
             return -1, -1
 
         output_list = [(self._receiver_address, self._receiver_amount)]
-        if utxo_amount != self._receiver_amount or not self._subtract_fee:
+        if with_change and (
+                utxo_amount != self._receiver_amount
+                or not self._subtract_fee
+        ):
             if self._dummy_change_address is not None:
                 output_list.append((
                     self._dummy_change_address,
                     self._coin.Currency.maxValue))
 
+        sizes = self.MutableTx.estimateSizes(utxo_list, output_list)
+        if sizes is not None:
+            return sizes
+
+        # unknown script types, build and sign the dummy transaction
         mtx = self._prepare(
             utxo_list,
             output_list,
@@ -468,13 +490,14 @@ class _TxFactory(CoinObject):
             *,
             select_all: bool = False,
             skip_model_update: bool = False) -> bool:
+        self.__updateUtxoList()
         self._selected_utxo_data = self._SelectedUtxoData()
 
         if select_all:
             raw_size, virtual_size = self._calcEstimatedSizes(
                 self._utxo_list,
                 self._utxo_amount)
-            self._selected_utxo_data.list = self._utxo_list
+            self._selected_utxo_data.list = list(self._utxo_list)
             self._selected_utxo_data.amount = self._utxo_amount
             self._selected_utxo_data.raw_size = raw_size
             self._selected_utxo_data.virtual_size = virtual_size
@@ -487,6 +510,8 @@ class _TxFactory(CoinObject):
                 self._callModel("afterUpdateState")
             return raw_size >= 0
 
+        # with subtracted fee any excess amount goes to the change
+        change_cost = 0 if self._subtract_fee else self._changeCost()
         fee_amount = 0
         while True:
             full_amount = self._receiver_amount + fee_amount
@@ -494,7 +519,30 @@ class _TxFactory(CoinObject):
                 full_amount = 1
             utxo_list, utxo_amount = self._findUtxoList(
                 self._utxo_list,
-                full_amount)
+                full_amount,
+                selection_list=self._coin.utxoSelectionList,
+                change_cost=change_cost)
+
+            # the excess amount is left to the fee if the change costs more
+            with_change = True
+            if change_cost > 0:
+                raw_size, virtual_size = self._calcEstimatedSizes(
+                    utxo_list,
+                    utxo_amount,
+                    with_change=False)
+                new_fee_amount = self._feeAmount(
+                    self._fee_amount_per_byte,
+                    raw_size,
+                    virtual_size)
+                if new_fee_amount is not None:
+                    excess_amount = (
+                            utxo_amount
+                            - self._receiver_amount
+                            - new_fee_amount)
+                    if 0 <= excess_amount <= change_cost:
+                        with_change = False
+                        break
+
             raw_size, virtual_size = self._calcEstimatedSizes(
                 utxo_list,
                 utxo_amount)
@@ -518,6 +566,7 @@ class _TxFactory(CoinObject):
         self._selected_utxo_data.amount = utxo_amount
         self._selected_utxo_data.raw_size = raw_size
         self._selected_utxo_data.virtual_size = virtual_size
+        self._selected_utxo_data.with_change = with_change
 
         self.__logUtxoList(
             "Selected UTXO's",
@@ -528,22 +577,46 @@ class _TxFactory(CoinObject):
         return raw_size >= 0
 
     def updateUtxoList(self) -> None:
-        address_filter = dict(
-            is_read_only=False,
-            with_utxo=True,
-            is_tx_input=True)
+        self.__clearSelectedUtxoList()
 
-        self._utxo_list = list(chain.from_iterable(
-            a.utxoList
-            for a in self._coin.filterAddressList(**address_filter)))
+    def __updateUtxoList(self) -> None:
+        utxo_set = self._coin.utxoSet
+        if self._utxo_set_version == utxo_set.version:
+            return
+
+        address_list = [a for a in utxo_set.addressList if not a.isReadOnly]
+        # same as Coin.filterAddressList(is_tx_input=True)
+        if any(a.isTxInput for a in self._coin.addressList):
+            address_list = [a for a in address_list if a.isTxInput]
 
+        self._utxo_list = list(chain.from_iterable(
+            utxo_set.utxoList(a) for a in address_list))
+        if (
+                UtxoArray.isSupported
+                and len(self._utxo_list) >= self._UTXO_ARRAY_MIN_LENGTH
+        ):
+            self._utxo_list = UtxoArray(self._utxo_list)
         self._utxo_amount = sum(u.amount for u in self._utxo_list)
+        self._utxo_set_version = utxo_set.version
 
         self.__logUtxoList(
             "Available UTXO's",
             self._utxo_list,
             self._utxo_amount)
-        self._selectUtxoList()
+
+    @property
+    def __selectedUtxoData(self) -> _SelectedUtxoData:
+        if (
+                self._selected_utxo_data is None
+                or self._utxo_set_version != self._coin.utxoSet.version
+        ):
+            self._selectUtxoList(skip_model_update=True)
+        return self._selected_utxo_data
+
+    def __clearSelectedUtxoList(self) -> None:
+        # selected by the first reader, usually the send dialog
+        self._selected_utxo_data = None
+        self._callModel("afterUpdateState")
 
     def __logUtxoList(
             self,
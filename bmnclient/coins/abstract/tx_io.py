@@ -17,6 +17,8 @@ class _Model(CoinObjectModel):
 
 
 class _Io(CoinObject):
+    __slots__ = ("_index", "_output_type", "_address", "_amount")
+
     Model = _Model
 
     def __init__(
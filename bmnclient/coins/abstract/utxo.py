@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-from functools import cached_property
 from typing import TYPE_CHECKING
 
 from .object import CoinObject
@@ -14,16 +13,26 @@ if TYPE_CHECKING:
 
 
 class _Utxo(CoinObject):
+    __slots__ = (
+        "_address",
+        "_name",
+        "_height",
+        "_index",
+        "_amount",
+        "_script_type"
+    )
+
     def __init__(
             self,
             coin: Coin,
             *,
+            row_id: int = -1,
             name: str,
             height: int,
             index: int,
             amount: int,
             script_type: Optional[Coin.Address.Script.Type] = None) -> None:
-        super().__init__(coin)
+        super().__init__(coin, row_id=row_id)
         self._address: Optional[Coin.Address] = None
         self._name: Final = name
         self._height: Final = height
@@ -73,7 +82,7 @@ class _Utxo(CoinObject):
     def name(self) -> str:
         return self._name
 
-    @cached_property
+    @property
     def nameHuman(self) -> str:
         return self._coin.Tx.toNameHuman(self._name)
 
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+    from .coin import Coin
+    OutPoint = Tuple[str, int]
+
+
+class _UtxoSet:
+    """UTXO's of the coin addresses indexed by outpoint (tx name, index).
+    The version is changed with every added, removed or updated outpoint."""
+
+    def __init__(self) -> None:
+        self._utxo_map: Dict[OutPoint, Coin.Tx.Utxo] = {}
+        self._address_map: Dict[
+            str,
+            Tuple[Coin.Address, Dict[OutPoint, Coin.Tx.Utxo]]] = {}
+        self._amount = 0
+        self._version = 0
+
+    def __len__(self) -> int:
+        return len(self._utxo_map)
+
+    def __iter__(self) -> Iterator[Coin.Tx.Utxo]:
+        return iter(self._utxo_map.values())
+
+    def __contains__(self, outpoint: OutPoint) -> bool:
+        return outpoint in self._utxo_map
+
+    @property
+    def amount(self) -> int:
+        return self._amount
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def addressList(self) -> List[Coin.Address]:
+        return [a for a, _ in self._address_map.values()]
+
+    def get(self, name: str, index: int) -> Optional[Coin.Tx.Utxo]:
+        return self._utxo_map.get((name, index))
+
+    def utxoList(self, address: Coin.Address) -> List[Coin.Tx.Utxo]:
+        value = self._address_map.get(address.name)
+        return list(value[1].values()) if value is not None else []
+
+    def update(
+            self,
+            address: Coin.Address,
+            utxo_list: Sequence[Coin.Tx.Utxo]) -> bool:
+        _, old_map = self._address_map.get(address.name, (None, {}))
+        new_map = {(u.name, u.index): u for u in utxo_list}
+        changed = False
+
+        for outpoint, utxo in old_map.items():
+            if outpoint not in new_map:
+                del self._utxo_map[outpoint]
+                self._amount -= utxo.amount
+                changed = True
+        for outpoint, utxo in new_map.items():
+            old_utxo = self._utxo_map.get(outpoint)
+            if outpoint not in old_map:
+                if old_utxo is not None:
+                    # outpoint moved from other address
+                    self.__removeFromAddress(old_utxo, outpoint)
+                    self._amount -= old_utxo.amount
+                self._amount += utxo.amount
+                changed = True
+            elif (
+                    old_utxo.amount != utxo.amount
+                    or old_utxo.height != utxo.height
+            ):
+                # confirmed or replaced
+                self._amount += utxo.amount - old_utxo.amount
+                changed = True
+            self._utxo_map[outpoint] = utxo
+
+        if new_map:
+            self._address_map[address.name] = (address, new_map)
+        else:
+            self._address_map.pop(address.name, None)
+        if changed:
+            self._version += 1
+        return changed
+
+    def remove(self, address: Coin.Address) -> bool:
+        return self.update(address, [])
+
+    def clear(self) -> None:
+        if self._utxo_map or self._address_map:
+            self._utxo_map.clear()
+            self._address_map.clear()
+            self._amount = 0
+            self._version += 1
+
+    def __removeFromAddress(
+            self,
+            utxo: Coin.Tx.Utxo,
+            outpoint: OutPoint) -> None:
+        if utxo.address is None:
+            return
+        value = self._address_map.get(utxo.address.name)
+        if value is not None and value[1].get(outpoint) is utxo:
+            del value[1][outpoint]
+            if not value[1]:
+                del self._address_map[utxo.address.name]
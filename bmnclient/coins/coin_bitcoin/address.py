@@ -14,6 +14,8 @@ if TYPE_CHECKING:
 
 
 class _Address(Coin.Address):
+    __slots__ = ()
+
     _PUBKEY_HASH_PREFIX_LIST = ("1",)
     _SCRIPT_HASH_PREFIX_LIST = ("3",)
     _HRP = "bc"
@@ -180,6 +182,8 @@ class _Address(Coin.Address):
 
 
 class _TestAddress(_Address):
+    __slots__ = ()
+
     _PUBKEY_HASH_PREFIX_LIST = ("m", "n")
     _SCRIPT_HASH_PREFIX_LIST = ("2",)
     _HRP = "tb"
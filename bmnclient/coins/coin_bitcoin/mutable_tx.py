@@ -7,7 +7,7 @@ from ..abstract import Coin
 from ...crypto.digest import Sha256Digest, Sha256DoubleDigest
 
 if TYPE_CHECKING:
-    from typing import List, Optional, Sequence
+    from typing import List, Optional, Sequence, Tuple
     from . import Bitcoin
 
 
@@ -40,6 +40,46 @@ class _MutableTx(Coin.TxFactory.MutableTx):
             version=1,
             **kwargs)
 
+    @classmethod
+    def estimateSizes(
+            cls,
+            utxo_list: Sequence[Bitcoin.Tx.Utxo],
+            output_list: Sequence[Tuple[Bitcoin.Address, int]]
+    ) -> Optional[Tuple[int, int]]:
+        if not utxo_list or not output_list:
+            return None
+        script = utxo_list[0].address.Script
+
+        size = (
+                cls._VERSION_LENGTH
+                + len(script.integerToVarInt(len(utxo_list)))
+                + len(script.integerToVarInt(len(output_list)))
+                + cls._LOCK_TIME_LENGTH)
+        witness_size = 0
+        is_witness = False
+        for utxo in utxo_list:
+            value = cls.Input.estimateSize(utxo)
+            if value is None:
+                return None
+            is_witness |= value[0]
+            size += value[1]
+            witness_size += value[2]
+        if is_witness:
+            # empty witness field of the non-witness inputs, see _raw()
+            witness_size += sum(
+                1 for u in utxo_list
+                if not u.address.type.value.isWitness)
+            witness_size += len(cls._WITNESS_HEADER)
+
+        for address, amount in output_list:
+            output = cls.Output(address, amount=amount, is_dummy=True)
+            size += len(output.amountBytes) + len(output.scriptBytes)
+
+        raw_size = size + witness_size
+        if is_witness:
+            return raw_size, ceil((3 * size + raw_size) / 4)
+        return raw_size, raw_size
+
     def _deriveName(self) -> Optional[str]:
         v = Sha256DoubleDigest(self.raw(with_witness=False)).finalize()
         return v[::-1].hex()
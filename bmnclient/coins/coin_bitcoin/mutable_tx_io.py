@@ -3,10 +3,12 @@ from __future__ import annotations
 from functools import cached_property
 from typing import TYPE_CHECKING
 
+from .script import _Script
 from ..abstract import Coin
 from ...crypto.secp256k1 import PrivateKey, PublicKey
 
 if TYPE_CHECKING:
+    from typing import Final, Optional, Tuple
     from . import Bitcoin
 
 
@@ -15,6 +17,41 @@ class _MutableInput(Coin.TxFactory.MutableTx.Input):
     _HASH_TYPE_LENGTH = 4
     _SEQUENCE_LENGTH = 4
 
+    # outpoint, sequence
+    _BASE_SIZE: Final = 32 + 4 + _SEQUENCE_LENGTH
+    # push(signature + hash type), push(public key)
+    _SIGNATURE_SIZE: Final = 1 + PrivateKey.signatureMaxSize + 1
+    _PUBLIC_KEY_SIZE: Final = 1 + PublicKey.compressedSize
+
+    # (is witness, non-witness size, witness size) of the signed input with
+    # compressed public key, same as serialized by sign()
+    _ESTIMATED_SIZE_MAP: Final = {
+        _Script.Type.P2PK: (
+            False,
+            _BASE_SIZE + 1 + _SIGNATURE_SIZE,
+            0),
+        _Script.Type.P2PKH: (
+            False,
+            _BASE_SIZE + 1 + _SIGNATURE_SIZE + _PUBLIC_KEY_SIZE,
+            0),
+        _Script.Type.P2SH: (
+            False,
+            _BASE_SIZE + 1 + _SIGNATURE_SIZE + _PUBLIC_KEY_SIZE,
+            0),
+        _Script.Type.P2SH_P2WPKH: (
+            True,
+            _BASE_SIZE + 1 + 1 + 22,  # push(P2WPKH script)
+            1 + _SIGNATURE_SIZE + _PUBLIC_KEY_SIZE),
+        _Script.Type.P2WPKH: (
+            True,
+            _BASE_SIZE + 1,
+            1 + _SIGNATURE_SIZE + _PUBLIC_KEY_SIZE),
+        _Script.Type.P2WSH: (
+            True,
+            _BASE_SIZE + 1,
+            1 + _SIGNATURE_SIZE + _PUBLIC_KEY_SIZE),
+    }
+
     def __init__(
             self,
             utxo: Bitcoin.Tx.Utxo,
@@ -48,6 +85,32 @@ class _MutableInput(Coin.TxFactory.MutableTx.Input):
                 self._utxo.address.Script.integerToVarInt(len(script))
                 + script)
 
+    @classmethod
+    def estimateSize(
+            cls,
+            utxo: Bitcoin.Tx.Utxo) -> Optional[Tuple[bool, int, int]]:
+        value = cls._ESTIMATED_SIZE_MAP.get(utxo.scriptType)
+        if (
+                value is None
+                or value[0] != utxo.address.type.value.isWitness
+        ):
+            return None
+        is_witness, size, witness_size = value
+
+        public_key = utxo.address.publicKey
+        if (
+                public_key is not None
+                and not public_key.isCompressed
+                and utxo.scriptType != utxo.address.Script.Type.P2PK
+        ):
+            # rare case
+            extra_size = PublicKey.uncompressedSize - PublicKey.compressedSize
+            if is_witness:
+                witness_size += extra_size
+            else:
+                size += extra_size
+        return is_witness, size, witness_size
+
     @cached_property
     def utxoIdBytes(self) -> bytes:
         index = (
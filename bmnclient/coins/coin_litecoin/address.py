@@ -10,6 +10,8 @@ if TYPE_CHECKING:
 
 
 class _Address(Bitcoin.Address):
+    __slots__ = ()
+
     _PUBKEY_HASH_PREFIX_LIST = ("L",)
     _SCRIPT_HASH_PREFIX_LIST = ("M",)
     _HRP = "ltc"
@@ -0,0 +1,367 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from itertools import accumulate
+from random import Random
+from typing import TYPE_CHECKING
+
+from ..utils import NotImplementedInstance
+from ..utils.class_property import classproperty
+
+try:
+    import numpy as _numpy
+except ImportError:
+    _numpy = None
+
+if TYPE_CHECKING:
+    from typing import Final, Iterator, List, Optional, Sequence, Tuple
+    from .abstract import Coin
+    SelectedUtxoList = Tuple[List[Coin.Tx.Utxo], int]
+
+
+class UtxoArray:
+    """Immutable UTXO list with amounts and heights as NumPy arrays, for
+    vectorized searches in large UTXO sets. Results are the same as the
+    pure-Python searches give for the list."""
+
+    __slots__ = ("_utxo_list", "_amount", "_amount_array", "_height_array")
+
+    def __init__(self, utxo_list: Sequence[Coin.Tx.Utxo]) -> None:
+        assert _numpy is not None
+        self._utxo_list = tuple(utxo_list)
+        self._amount = sum(u.amount for u in self._utxo_list)
+        self._amount_array = _numpy.fromiter(
+            (u.amount for u in self._utxo_list),
+            dtype=_numpy.int64,
+            count=len(self._utxo_list))
+        self._height_array = _numpy.fromiter(
+            (u.height for u in self._utxo_list),
+            dtype=_numpy.int64,
+            count=len(self._utxo_list))
+
+    def __len__(self) -> int:
+        return len(self._utxo_list)
+
+    def __iter__(self) -> Iterator[Coin.Tx.Utxo]:
+        return iter(self._utxo_list)
+
+    def __getitem__(self, index):
+        return self._utxo_list[index]
+
+    @classproperty
+    def isSupported(cls) -> bool:  # noqa
+        return _numpy is not None
+
+    @property
+    def amount(self) -> int:
+        return self._amount
+
+    def findExact(self, target_amount: int) -> Optional[Coin.Tx.Utxo]:
+        # lowest height, first of the same
+        if target_amount > self._amount:
+            return None
+        index_list = _numpy.flatnonzero(self._amount_array == target_amount)
+        if not len(index_list):
+            return None
+        i = index_list[_numpy.argmin(self._height_array[index_list])]
+        return self._utxo_list[i]
+
+    def findSingleCover(self, target_amount: int) -> Optional[Coin.Tx.Utxo]:
+        # lowest amount, lowest height, first of the same
+        if target_amount > self._amount:
+            return None
+        index_list = _numpy.flatnonzero(self._amount_array >= target_amount)
+        if not len(index_list):
+            return None
+        i = index_list[_numpy.lexsort((
+            self._height_array[index_list],
+            self._amount_array[index_list]))[0]]
+        return self._utxo_list[i]
+
+    def sortedList(
+            self,
+            min_amount: int,
+            max_amount: int) -> Tuple[List[Coin.Tx.Utxo], List[int]]:
+        # UTXO's and amounts in [min_amount, max_amount], sorted by
+        # AbstractUtxoSelection._sortKey()
+        index_list = _numpy.flatnonzero(
+            (self._amount_array >= min_amount)
+            & (self._amount_array <= max_amount))
+        order = index_list[_numpy.lexsort((
+            self._height_array[index_list],
+            -self._amount_array[index_list]))]
+        return (
+            [self._utxo_list[i] for i in order.tolist()],
+            self._amount_array[order].tolist()
+        )
+
+    def findLargestFirst(self, target_amount: int) -> SelectedUtxoList:
+        # sorted by AbstractUtxoSelection._sortKey()
+        if target_amount > self._amount:
+            return [], 0
+        order = _numpy.lexsort((self._height_array, -self._amount_array))
+        order = order[self._amount_array[order] > 0]
+        cumsum = _numpy.cumsum(self._amount_array[order])
+        count = int(_numpy.searchsorted(cumsum, target_amount)) + 1
+        if count > len(cumsum):
+            return [], 0
+        return (
+            [self._utxo_list[i] for i in order[:count]],
+            int(cumsum[count - 1])
+        )
+
+
+class AbstractUtxoSelection(NotImplementedInstance):
+    """Selects UTXO's with total amount not less than the target amount.
+    Empty list is returned if the strategy has no result."""
+
+    # about 675 P2PKH inputs fit in a standard transaction (400000 WU)
+    _MAX_INPUT_COUNT: Final = 600
+
+    @classmethod
+    def select(
+            cls,
+            utxo_list: Sequence[Coin.Tx.Utxo],
+            target_amount: int,
+            *,
+            change_cost: int = 0) -> SelectedUtxoList:
+        raise NotImplementedError
+
+    @staticmethod
+    def _sortKey(utxo: Coin.Tx.Utxo) -> Tuple[int, int]:
+        # larger amounts first, older UTXO's first for same amounts
+        return -utxo.amount, utxo.height
+
+
+class BranchAndBoundUtxoSelection(AbstractUtxoSelection):
+    """Depth-first search of the UTXO set that does not need a change
+    output: the total amount is in [target, target + change_cost], the
+    excess is cheaper to leave to the fee than to create and spend a change.
+    Based on Bitcoin Core SelectCoinsBnB()."""
+
+    _ITERATION_LIMIT: Final = 20000
+
+    @classmethod
+    def select(
+            cls,
+            utxo_list: Sequence[Coin.Tx.Utxo],
+            target_amount: int,
+            *,
+            change_cost: int = 0,
+            iteration_limit: int = _ITERATION_LIMIT) -> SelectedUtxoList:
+        if target_amount <= 0:
+            return [], 0
+        upper_amount = target_amount + max(0, change_cost)
+        # larger UTXO's can't be in the result
+        if isinstance(utxo_list, UtxoArray):
+            utxo_list, amount_list = utxo_list.sortedList(1, upper_amount)
+        else:
+            utxo_list = sorted(
+                (u for u in utxo_list if 0 < u.amount <= upper_amount),
+                key=cls._sortKey)
+            amount_list = [u.amount for u in utxo_list]
+        # available amount of the UTXO's from the index to the end
+        available_list = list(accumulate(reversed(amount_list), initial=0))
+        available_list.reverse()
+        if available_list[0] < target_amount:
+            return [], 0
+        # ascending order for bisect_left()
+        negative_amount_list = [-a for a in amount_list]
+
+        selection: List[int] = []
+        amount = 0
+        best_selection: List[int] = []
+        best_waste = -1
+        index = 0
+
+        for _ in range(iteration_limit):
+            backtrack = False
+            if (
+                    amount + available_list[index] < target_amount
+                    or amount > upper_amount
+                    or len(selection) > cls._MAX_INPUT_COUNT
+            ):
+                backtrack = True
+            elif amount >= target_amount:
+                backtrack = True
+                waste = amount - target_amount
+                if best_waste < 0 or waste < best_waste:
+                    best_selection = selection.copy()
+                    best_waste = waste
+                    if waste == 0:
+                        break
+
+            if backtrack:
+                if not selection:
+                    break  # search is complete
+                # exclude the last included
+                index = selection.pop()
+                amount -= amount_list[index]
+            elif amount + amount_list[index] > upper_amount:
+                # omit all UTXO's that exceed the upper amount at once
+                index = bisect_left(
+                    negative_amount_list,
+                    amount - upper_amount,
+                    index)
+                continue
+            else:
+                # same amount as the omitted previous UTXO gives same result
+                if (
+                        not selection
+                        or selection[-1] == index - 1
+                        or amount_list[index] != amount_list[index - 1]
+                ):
+                    selection.append(index)
+                    amount += amount_list[index]
+            index += 1
+
+        return (
+            [utxo_list[i] for i in best_selection],
+            sum(amount_list[i] for i in best_selection)
+        )
+
+
+class KnapsackUtxoSelection(AbstractUtxoSelection):
+    """Random approximation of the smallest subset of UTXO's lower than the
+    target, the smallest larger UTXO is used if it's better. Based on
+    Bitcoin Core KnapsackSolver(). The random generator is seeded with the
+    target amount, same arguments give the same result."""
+
+    # limits the work for large sets: passes * len(utxo_list)
+    _VISIT_LIMIT: Final = 200000
+    _PASS_LIMIT: Final = 1000
+
+    @classmethod
+    def select(
+            cls,
+            utxo_list: Sequence[Coin.Tx.Utxo],
+            target_amount: int,
+            *,
+            change_cost: int = 0) -> SelectedUtxoList:
+        if target_amount <= 0:
+            return [], 0
+
+        # lowest_larger with the target amount is the exact match
+        if isinstance(utxo_list, UtxoArray):
+            lowest_larger = utxo_list.findSingleCover(target_amount)
+            lower_list, amount_list = utxo_list.sortedList(
+                1,
+                target_amount - 1)
+        else:
+            lowest_larger = None
+            lower_list = []
+            for utxo in utxo_list:
+                if utxo.amount < target_amount:
+                    if utxo.amount > 0:
+                        lower_list.append(utxo)
+                elif (
+                        lowest_larger is None
+                        or (utxo.amount, utxo.height)
+                        < (lowest_larger.amount, lowest_larger.height)
+                ):
+                    lowest_larger = utxo
+            lower_list.sort(key=cls._sortKey)
+            amount_list = [u.amount for u in lower_list]
+
+        if (
+                lowest_larger is not None
+                and lowest_larger.amount == target_amount
+        ):
+            return [lowest_larger], lowest_larger.amount
+        lower_amount = sum(amount_list)
+        if (
+                lower_amount == target_amount
+                and len(lower_list) <= cls._MAX_INPUT_COUNT
+        ):
+            return lower_list, lower_amount
+        if lower_amount <= target_amount:
+            if lowest_larger is None:
+                return [], 0
+            return [lowest_larger], lowest_larger.amount
+
+        index_list, amount = cls._approximateBestSubset(
+            amount_list,
+            lower_amount,
+            target_amount)
+        if lowest_larger is not None and (
+                len(index_list) > cls._MAX_INPUT_COUNT
+                or (amount != target_amount and lowest_larger.amount <= amount)
+        ):
+            return [lowest_larger], lowest_larger.amount
+        if len(index_list) > cls._MAX_INPUT_COUNT:
+            return [], 0
+        return (
+            [lower_list[i] for i in index_list],
+            amount
+        )
+
+    @classmethod
+    def _approximateBestSubset(
+            cls,
+            amount_list: List[int],
+            total_amount: int,
+            target_amount: int) -> Tuple[List[int], int]:
+        random = Random(target_amount).random
+        best_index_list = list(range(len(amount_list)))
+        best_amount = total_amount
+        pass_count = max(
+            1,
+            min(cls._PASS_LIMIT, cls._VISIT_LIMIT // len(amount_list)))
+
+        for _ in range(pass_count):
+            if best_amount == target_amount:
+                break
+            # indexes are copied instead of flags, the subset is small
+            included_list = [False] * len(amount_list)
+            index_list = []
+            amount = 0
+            target_reached = False
+            for second_pass in (False, True):
+                if target_reached:
+                    break
+                for i, value in enumerate(amount_list):
+                    if second_pass:
+                        if included_list[i]:
+                            continue
+                    elif random() < 0.5:
+                        continue
+                    amount += value
+                    if amount >= target_amount:
+                        target_reached = True
+                        if amount < best_amount:
+                            best_amount = amount
+                            best_index_list = index_list + [i]
+                        amount -= value
+                    else:
+                        included_list[i] = True
+                        index_list.append(i)
+        return sorted(best_index_list), best_amount
+
+
+class LargestFirstUtxoSelection(AbstractUtxoSelection):
+    """Largest UTXO's until the target is reached, always has a result if
+    the total amount is enough. The fewest inputs, fallback for the sets of
+    small UTXO's that other strategies can't fit in _MAX_INPUT_COUNT."""
+
+    @classmethod
+    def select(
+            cls,
+            utxo_list: Sequence[Coin.Tx.Utxo],
+            target_amount: int,
+            *,
+            change_cost: int = 0) -> SelectedUtxoList:
+        if target_amount <= 0:
+            return [], 0
+        if isinstance(utxo_list, UtxoArray):
+            return utxo_list.findLargestFirst(target_amount)
+
+        result = []
+        amount = 0
+        for utxo in sorted(utxo_list, key=cls._sortKey):
+            if utxo.amount <= 0:
+                break
+            result.append(utxo)
+            amount += utxo.amount
+            if amount >= target_amount:
+                return result, amount
+        return [], 0
@@ -12,7 +12,7 @@ from ..utils.class_property import classproperty
 from ..version import Product
 
 if TYPE_CHECKING:
-    from typing import Any, Final, Optional, Type
+    from typing import Any, Final, Optional, Type, Union
 
 
 class AbstractCipher:
@@ -46,13 +46,13 @@ class AbstractHazmatCipher(AbstractCipher):
     def __init__(
             self,
             op_mode: AbstractHazmatCipher.OpMode,
-            key: bytes,
+            key: Union[bytes, ciphers.CipherAlgorithm],
             mode_arg: bytes,
             context: Optional[ciphers.CipherContext] = None) -> None:
         if not context:
             # noinspection PyArgumentList
             context = ciphers.Cipher(
-                self._HAZMAT_ALGORITHM(key),
+                self.createAlgorithm(key),
                 self._HAZMAT_MODE(mode_arg))
             if op_mode == self.OpMode.ENCRYPT:
                 context = context.encryptor()
@@ -60,9 +60,23 @@ class AbstractHazmatCipher(AbstractCipher):
                 context = context.decryptor()
         super().__init__(op_mode, context)
 
+    @classmethod
+    def createAlgorithm(
+            cls,
+            key: Union[bytes, ciphers.CipherAlgorithm]
+    ) -> ciphers.CipherAlgorithm:
+        # algorithm object can be reused for any count of cipher contexts
+        if isinstance(key, cls._HAZMAT_ALGORITHM):
+            return key
+        # noinspection PyArgumentList
+        return cls._HAZMAT_ALGORITHM(key)
+
     def update(self, data: bytes) -> bytes:
         return self._context.update(data)
 
+    def updateInto(self, data: bytes, buffer: memoryview) -> int:
+        return self._context.update_into(data, buffer)
+
     def finalize(self) -> bytes:
         return self._context.finalize()
 
@@ -76,7 +90,7 @@ class BlockDeviceCipher(AbstractHazmatCipher):
     def __init__(
             self,
             op_mode: BlockDeviceCipher.OpMode,
-            key: bytes,
+            key: Union[bytes, algorithms.AES],
             sector_index: int,
             salt: bytes) -> None:
         if len(salt) != self._SALT_SIZE:
@@ -90,6 +104,41 @@ class BlockDeviceCipher(AbstractHazmatCipher):
     def saltSize(cls) -> int:  # noqa
         return cls._SALT_SIZE
 
+    @classmethod
+    def updateSectorList(
+            cls,
+            op_mode: BlockDeviceCipher.OpMode,
+            key: Union[bytes, algorithms.AES],
+            first_sector_index: int,
+            salt: bytes,
+            data: bytes,
+            sector_size: int) -> bytearray:
+        if len(data) % sector_size:
+            raise ValueError(
+                "data size must be a multiple of {} bytes"
+                .format(sector_size))
+        key = cls.createAlgorithm(key)
+        data = memoryview(data)
+        # update_into() requires extra space for one block
+        result = bytearray(len(data) + cls._HAZMAT_ALGORITHM.block_size // 8)
+        result_view = memoryview(result)
+
+        for offset in range(0, len(data), sector_size):
+            cipher = cls(
+                op_mode,
+                key,
+                first_sector_index + offset // sector_size,
+                salt)
+            size = cipher.updateInto(
+                data[offset:offset + sector_size],
+                result_view[offset:])
+            assert size == sector_size
+            cipher.finalize()
+
+        result_view.release()
+        del result[len(data):]
+        return result
+
 
 # TODO reimplement
 class AeadCipher:
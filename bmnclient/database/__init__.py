@@ -4,7 +4,10 @@
 
 from __future__ import annotations
 
+import os
+import time
 from contextlib import contextmanager
+from enum import Enum
 from typing import TYPE_CHECKING
 
 from ..debug import Debug
@@ -17,12 +20,17 @@ except ImportError:
 from .tables import (
     AbstractTable,
     AddressListTable,
+    AddressNameListTable,
     AddressTxMapTable,
     CoinListTable,
     MetadataTable,
     TxIoListTable,
-    TxListTable)
+    TxListTable,
+    UtxoListTable)
+from .executor import DatabaseExecutor, databaseThreadMethod
+from .profiler import DatabaseProfiler
 from .vfs import Vfs
+from .write_queue import DatabaseWriteQueue
 from ..logger import Logger
 from ..utils.class_property import classproperty
 from ..version import Product
@@ -35,7 +43,9 @@ if TYPE_CHECKING:
         Dict,
         Final,
         Generator,
+        List,
         Optional,
+        Tuple,
         Type,
         Union)
     from ..application import CoreApplication
@@ -81,16 +91,90 @@ class Cursor(_engine.Cursor):
         return False
 
 
+class ProfilerCursor(Cursor):
+    """Cursor for DatabaseProfiler, time of a statement includes fetching
+    of the result rows."""
+
+    def __init__(self, *args, database: Database, **kwargs) -> None:
+        super().__init__(*args, database=database, **kwargs)
+        self._profiler = database.profiler
+        self._query: Optional[str] = None
+        self._timeframe = 0
+        self._row_count = 0
+
+    def __next__(self) -> Any:
+        timeframe = time.monotonic_ns()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._timeframe += time.monotonic_ns() - timeframe
+            self._appendProfile()
+            raise
+        self._timeframe += time.monotonic_ns() - timeframe
+        self._row_count += 1
+        return row
+
+    def fetchone(self) -> Any:
+        timeframe = time.monotonic_ns()
+        row = super().fetchone()
+        self._timeframe += time.monotonic_ns() - timeframe
+        if row is not None:
+            self._row_count += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs) -> List[Any]:
+        timeframe = time.monotonic_ns()
+        row_list = super().fetchmany(*args, **kwargs)
+        self._timeframe += time.monotonic_ns() - timeframe
+        self._row_count += len(row_list)
+        return row_list
+
+    def fetchall(self) -> List[Any]:
+        timeframe = time.monotonic_ns()
+        row_list = super().fetchall()
+        self._timeframe += time.monotonic_ns() - timeframe
+        self._row_count += len(row_list)
+        return row_list
+
+    def close(self) -> None:
+        self._appendProfile()
+        super().close()
+
+    def _execute(self, origin: Callable, query, *args, **kwargs) -> Any:
+        self._appendProfile()
+        timeframe = time.monotonic_ns()
+        try:
+            return super()._execute(origin, query, *args, **kwargs)
+        finally:
+            self._query = query
+            self._timeframe = time.monotonic_ns() - timeframe
+            self._row_count = 0
+
+    def _appendProfile(self) -> None:
+        if self._query is None:
+            return
+        # rows changed by INSERT/UPDATE/DELETE
+        if self._row_count == 0 and self.rowcount > 0:
+            self._row_count = self.rowcount
+        self._profiler.appendStatement(
+            self._query,
+            self._timeframe,
+            self._row_count)
+        self._query = None
+
+
 class Connection(_engine.Connection):
     def __init__(self, *args, database: Database, **kwargs) -> None:
         super().__init__(*args, **kwargs)
         self._database = database
 
     def cursor(self, factory=Cursor) -> Cursor:
+        if self._database.profiler is not None:
+            factory = ProfilerCursor
         # noinspection PyArgumentList
         # TODO sqlite.Connection.cursor(factory)
         return super().cursor(
-            factory=lambda *args, **kwargs: Cursor(
+            factory=lambda *args, **kwargs: factory(
                 *args,
                 database=self._database,
                 **kwargs)
@@ -98,7 +182,7 @@ class Connection(_engine.Connection):
 
 
 class Database:
-    _VERSION: Final = 2
+    _VERSION: Final = 5
 
     # https://sqlite.org/pragma.html
     _PRAGMA_LIST: Final = (
@@ -106,17 +190,66 @@ class Database:
         "automatic_index = OFF",
         "case_sensitive_like = OFF",
         "foreign_keys = ON",
-        "main.journal_mode = DELETE",
         "temp_store = MEMORY",
     )
 
+    class JournalMode(Enum):
+        DELETE = "delete"
+        WAL = "wal"
+
+    # bmn_vfs doesn't provide the shared-memory methods, with EXCLUSIVE
+    # locking mode SQLite keeps the WAL-index in heap memory instead.
+    # EXCLUSIVE is also required to leave the WAL mode.
+    # WAL only makes commits cheaper (append and sync of the WAL file instead
+    # of a journal file per commit). The database has a single connection, so
+    # readers still wait for the writer, see readTransaction().
+    _JOURNAL_PRAGMA_LIST: Final = {
+        JournalMode.DELETE: (
+            "main.locking_mode = EXCLUSIVE",
+            "main.journal_mode = DELETE",
+            "main.locking_mode = NORMAL",
+        ),
+        JournalMode.WAL: (
+            "main.locking_mode = EXCLUSIVE",
+            "main.journal_mode = WAL",
+            "main.wal_autocheckpoint = 1000",
+        ),
+    }
+
+    class Durability(Enum):
+        PARANOID = "paranoid"
+        NORMAL = "normal"
+        FAST = "fast"
+
+    # NORMAL: in WAL mode a power loss can roll back the last commits, the
+    # database stays consistent; in DELETE mode a corruption is possible.
+    # FAST: no syncs at all, use only for tests and benchmarks.
+    _DURABILITY_PRAGMA_LIST: Final = {
+        Durability.PARANOID: ("main.synchronous = EXTRA", ),
+        Durability.NORMAL: ("main.synchronous = NORMAL", ),
+        Durability.FAST: ("main.synchronous = OFF", ),
+    }
+
+    _PAGE_SIZE_LIST: Final = (4096, 8192, 16384, 32768, 65536)
+    _DEFAULT_PAGE_SIZE: Final = 4096
+
+    _CACHED_STATEMENT_COUNT: Final = 100
+
+    class CheckpointMode(Enum):
+        PASSIVE = "PASSIVE"
+        FULL = "FULL"
+        RESTART = "RESTART"
+        TRUNCATE = "TRUNCATE"
+
     _TABLE_TYPE_LIST: Final = (
         MetadataTable,
         CoinListTable,
         AddressListTable,
         AddressTxMapTable,
         TxListTable,
-        TxIoListTable
+        AddressNameListTable,
+        TxIoListTable,
+        UtxoListTable
     )
 
     class Error(_engine.OperationalError):
@@ -144,9 +277,19 @@ class Database:
     def __init__(
             self,
             application: CoreApplication,
-            file_path: Path) -> None:
+            file_path: Path,
+            *,
+            journal_mode: JournalMode = JournalMode.WAL,
+            durability: Durability = Durability.NORMAL,
+            page_size: int = _DEFAULT_PAGE_SIZE,
+            profile: bool = False) -> None:
+        if page_size not in self._PAGE_SIZE_LIST:
+            raise ValueError("unsupported page size {}".format(page_size))
         self._application = application
         self._file_path = file_path
+        self._journal_mode = journal_mode
+        self._durability = durability
+        self._page_size = page_size
 
         self._logger = Logger.classLogger(
             self.__class__,
@@ -160,18 +303,24 @@ class Database:
             _engine.sqlite_version)
 
         self.__connection: Optional[_engine.Connection] = None
+        self.__vfs: Optional[Vfs] = None
         self.__table_list: Dict[int, AbstractTable] = {}
         self.__in_transaction = False  # TODO mutex?
+        self._profiler = DatabaseProfiler() if profile else None
+        self._executor = DatabaseExecutor(self)
+        self._write_queue = DatabaseWriteQueue(self)
 
     def __getitem__(self, type_: Type[AbstractTable]) \
             -> Union[
                 AbstractTable,
                 AddressListTable,
+                AddressNameListTable,
                 AddressTxMapTable,
                 CoinListTable,
                 MetadataTable,
                 TxIoListTable,
-                TxListTable
+                TxListTable,
+                UtxoListTable
             ]:
         assert issubclass(type_, AbstractTable)
         table = self.__table_list.get(id(type_))
@@ -195,21 +344,88 @@ class Database:
     def isOpen(self) -> bool:
         return self.__connection is not None
 
+    @property
+    def journalMode(self) -> JournalMode:
+        return self._journal_mode
+
+    @property
+    def durability(self) -> Durability:
+        return self._durability
+
+    @property
+    def pageSize(self) -> int:
+        return self._page_size
+
+    @classproperty
+    def pageSizeList(cls) -> Tuple[int, ...]:  # noqa
+        return cls._PAGE_SIZE_LIST
+
+    @classproperty
+    def defaultPageSize(cls) -> int:  # noqa
+        return cls._DEFAULT_PAGE_SIZE
+
+    @property
+    def profiler(self) -> Optional[DatabaseProfiler]:
+        return self._profiler
+
+    @property
+    def executor(self) -> DatabaseExecutor:
+        return self._executor
+
+    @property
+    def writeQueue(self) -> DatabaseWriteQueue:
+        return self._write_queue
+
+    @property
+    def vfs(self) -> Optional[Vfs]:
+        return self.__vfs
+
+    @databaseThreadMethod
     def open(self) -> bool:
         assert not self.isOpen
 
+        if not self._connect():
+            return False
+
         try:
-            file_path = self._file_path.resolve(strict=False).as_uri()
-            file_path += "?vfs=bmn_vfs"  # TODO
-            _engine.vfs_register(Vfs(self._application))
-            _engine.enable_callback_tracebacks(Debug.isEnabled)
+            self._prepare()
+            if self._migratePageSize():
+                self.__connection.close()
+                self.__connection = None
+                self._closeVfs()
+                self._replaceMigratedFile()
+                if not self._connect():
+                    return False
+                self._prepare()
+            with self.transaction(suppress_exceptions=False) as cursor:
+                self._openTables(cursor)
+        except (_engine.Error, _engine.Warning) as e:
+            self._logger.error("Failed to prepare database tables: %s", str(e))
+            self.close(force=True)
+            return False
 
+        return True
+
+    def _fileUri(self, file_path: Path) -> str:
+        return (
+                file_path.resolve(strict=False).as_uri()
+                + "?vfs=bmn_vfs"  # TODO
+        )
+
+    def _connect(self) -> bool:
+        try:
+            self.__vfs = Vfs(
+                self._application,
+                sector_size=self._page_size,
+                profiler=self._profiler)
+            _engine.vfs_register(self.__vfs)
+            _engine.enable_callback_tracebacks(Debug.isEnabled)
             # noinspection PyTypeChecker
             # TODO PyTypeChecker:
             #  sqlite3.connect(factory: Type[Connection])
             #  bmnsqlite3.connect(uri)
             self.__connection = _engine.connect(
-                file_path,
+                self._fileUri(self._file_path),
                 timeout=0.0,
                 detect_types=0,
                 isolation_level="DEFERRED",
@@ -218,29 +434,89 @@ class Database:
                     *args,
                     database=self,
                     **kwargs),
-                cached_statements=100,
+                cached_statements=self._CACHED_STATEMENT_COUNT,
                 uri=True)  # noqa
         except (_engine.Error, _engine.Warning, RuntimeError) as e:
             self.__connection = None
+            self.__vfs = None
             self._logger.error("Failed to open database: %s", str(e))
             return False
+        return True
 
-        try:
-            with self.transaction(suppress_exceptions=False) as cursor:
-                for pragma in self._PRAGMA_LIST:
-                    cursor.execute("PRAGMA " + pragma)
-            with self.transaction(suppress_exceptions=False) as cursor:
-                self._openTables(cursor)
-        except (_engine.Error, _engine.Warning) as e:
-            self._logger.error("Failed to prepare database tables: %s", str(e))
-            self.close(force=True)
-            return False
+    def _prepare(self) -> None:
+        with self.transaction(suppress_exceptions=False) as cursor:
+            for pragma in self._PRAGMA_LIST:
+                cursor.execute("PRAGMA " + pragma)
+            for pragma in self._JOURNAL_PRAGMA_LIST[self._journal_mode]:
+                cursor.execute("PRAGMA " + pragma)
+            journal_mode = cursor.execute(
+                "PRAGMA main.journal_mode").fetchone()[0]
+            if journal_mode != self._journal_mode.value:
+                self._logger.warning(
+                    "Failed to set journal mode '%s', current mode is "
+                    "'%s'.",
+                    self._journal_mode.value,
+                    journal_mode)
+            for pragma in self._DURABILITY_PRAGMA_LIST[self._durability]:
+                cursor.execute("PRAGMA " + pragma)
 
+    @property
+    def _migrateFilePath(self) -> Path:
+        return self._file_path.with_name(self._file_path.name + "-migrate")
+
+    def _migratePageSize(self) -> bool:
+        # VFS sector size is equal to the page size, so the existing database
+        # must be rewritten to the new file to change the page size
+        with self.transaction(suppress_exceptions=False) as cursor:
+            page_size = cursor.execute("PRAGMA main.page_size").fetchone()[0]
+            if page_size == self._page_size:
+                return False
+            page_count = cursor.execute(
+                "PRAGMA main.page_count").fetchone()[0]
+            cursor.execute(f"PRAGMA main.page_size = {self._page_size}")
+            if not page_count:
+                # new database
+                return False
+
+            self._logger.info(
+                "Migrating database from page size %i to %i...",
+                page_size,
+                self._page_size)
+            if self._migrateFilePath.exists():
+                self._migrateFilePath.unlink()
+            cursor.execute(
+                "VACUUM INTO ?",
+                (self._fileUri(self._migrateFilePath), ))
         return True
 
+    def _replaceMigratedFile(self) -> None:
+        try:
+            for suffix in ("-wal", "-journal"):
+                journal_path = self._file_path.with_name(
+                    self._file_path.name + suffix)
+                if journal_path.exists():
+                    raise OSError(
+                        "journal '{}' still exists"
+                        .format(journal_path.name))
+            os.replace(self._migrateFilePath, self._file_path)
+        except OSError as e:
+            self._logger.error(
+                "Failed to replace database with migrated file: %s",
+                str(e))
+            if self._migrateFilePath.exists():
+                self._migrateFilePath.unlink()
+
     def close(self, *, force: bool = False) -> bool:
+        if self._executor.isRunning and not self._executor.isDatabaseThread:
+            self._write_queue.flush()
+            result = self._executor.submit(self.close, force=force).result()
+            self._executor.stop()
+            return result
+
         if not self.isOpen:
             return True
+        if not self._executor.isDatabaseThread:
+            self._write_queue.flush()
         try:
             with self.transaction(suppress_exceptions=False) as cursor:
                 self._closeTables(cursor)
@@ -249,17 +525,41 @@ class Database:
             self._logger.error("Failed to close database: %s", str(e))
             if force:
                 self.__connection = None
+                self._closeVfs()
             return False
         self.__connection = None
+        self._closeVfs()
         self._logger.debug("Database was closed successfully.")
         return True
 
+    @databaseThreadMethod
+    def checkpoint(
+            self,
+            mode: CheckpointMode = CheckpointMode.PASSIVE) -> bool:
+        if self._journal_mode != self.JournalMode.WAL:
+            return True
+        try:
+            with self.transaction(suppress_exceptions=False) as cursor:
+                busy, log_size, checkpoint_size = cursor.execute(
+                    f"PRAGMA main.wal_checkpoint({mode.value})").fetchone()
+        except (_engine.Error, _engine.Warning) as e:
+            self._logger.error("Failed to checkpoint WAL: %s", str(e))
+            return False
+        self._logger.debug(
+            "WAL checkpoint: busy %i, log %i, checkpointed %i.",
+            busy,
+            log_size,
+            checkpoint_size)
+        return not busy
+
     @contextmanager
     def transaction(
             self,
             *,
             suppress_exceptions: bool = False
     ) -> Generator[Optional[Cursor], None, None]:
+        # connection is owned by the database thread, if it is running
+        assert not self._executor.isRunning or self._executor.isDatabaseThread
         if not self.isOpen or self.__in_transaction:
             if suppress_exceptions:
                 try:
@@ -310,6 +610,28 @@ class Database:
 
             self.__in_transaction = False
 
+    @contextmanager
+    def readTransaction(
+            self,
+            *,
+            suppress_exceptions: bool = False
+    ) -> Generator[Optional[Cursor], None, None]:
+        # bmn_vfs doesn't lock files and has no shared WAL-index, so a second
+        # connection is unsafe; readers share the writer connection in the
+        # database thread, see DatabaseExecutor.submitRead()
+        with self.transaction(
+                suppress_exceptions=suppress_exceptions) as cursor:
+            if cursor is None:
+                yield None
+                return
+            # one snapshot for all statements, writes are rejected
+            cursor.execute("BEGIN DEFERRED")
+            cursor.execute("PRAGMA query_only = ON")
+            try:
+                yield cursor
+            finally:
+                cursor.execute("PRAGMA query_only = OFF")
+
     def logQuery(self, query: str) -> None:
         self._logger.debug("Query: %s", query)
 
@@ -341,6 +663,7 @@ class Database:
         pass
 
     def remove(self) -> bool:
+        self._write_queue.clear()
         if not self.close():
             return False
         if self._file_path.exists():
@@ -398,3 +721,15 @@ class Database:
                 continue
             table.close(cursor)
         self.__table_list.clear()
+
+    def _closeVfs(self) -> None:
+        if self.__vfs is None:
+            return
+        cache = self.__vfs.cache
+        self._logger.debug(
+            "VFS sector cache: capacity %i bytes, hits %i, misses %i.",
+            cache.capacity,
+            cache.hitCount,
+            cache.missCount)
+        cache.clear()
+        self.__vfs = None
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+from concurrent.futures import Future
+from enum import IntEnum
+from functools import wraps
+from itertools import count
+from queue import PriorityQueue
+from threading import Thread, current_thread
+from typing import TYPE_CHECKING
+
+from PySide6.QtCore import QObject, Qt, Signal as QSignal
+
+from ..logger import Logger
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Final, Optional, Tuple
+    from . import Database
+
+    Callback = Callable[[Future], None]
+    Job = Tuple[Future, Callable[..., Any], tuple, dict, Optional[Callback]]
+
+
+def databaseThreadMethod(function: Callable) -> Callable:
+    """Runs the Database method in the database thread and waits for it."""
+    @wraps(function)
+    def wrapper(self: Database, *args, **kwargs) -> Any:
+        executor = self.executor
+        if executor.isRunning and not executor.isDatabaseThread:
+            return executor.submit(function, self, *args, **kwargs).result()
+        return function(self, *args, **kwargs)
+    return wrapper
+
+
+class DatabaseExecutor(QObject):
+    _finishedSignal: Final = QSignal(object, object)
+
+    class Priority(IntEnum):
+        # queued writes are executed before queued reads
+        WRITE = 0
+        READ = 1
+        STOP = 2
+
+    def __init__(self, database: Database) -> None:
+        super().__init__()
+        self._logger = Logger.classLogger(
+            self.__class__,
+            (None, database.filePath.name))
+        self._database = database
+        self._queue: PriorityQueue[Tuple[int, int, Optional[Job]]] = \
+            PriorityQueue()
+        self._sequence = count()
+        self._thread: Optional[Thread] = None
+        self._finishedSignal.connect(
+            self._onFinished,
+            Qt.QueuedConnection)
+
+    @property
+    def isRunning(self) -> bool:
+        return self._thread is not None
+
+    @property
+    def isDatabaseThread(self) -> bool:
+        return self._thread is not None and current_thread() is self._thread
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = Thread(
+            target=self._run,
+            name="Database[{}]".format(self._database.filePath.name),
+            daemon=True)
+        self._thread.start()
+        self._logger.debug("Database thread was started.")
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        assert not self.isDatabaseThread
+        self._put(self.Priority.STOP, None)
+        self._thread.join()
+        self._thread = None
+        self._logger.debug("Database thread was stopped.")
+
+    def submit(
+            self,
+            function: Callable[..., Any],
+            *args,
+            callback: Optional[Callback] = None,
+            **kwargs) -> Future:
+        """Schedules the job to the database thread. The callback receives
+        the future in the thread of the executor object. Without the running
+        thread the job is executed immediately."""
+        return self._submit(
+            self.Priority.WRITE,
+            function,
+            args,
+            kwargs,
+            callback)
+
+    def submitTransaction(
+            self,
+            function: Callable[..., Any],
+            *args,
+            callback: Optional[Callback] = None,
+            **kwargs) -> Future:
+        """Same as submit(), function(cursor, *args, **kwargs) is called
+        inside Database.transaction()."""
+        def job() -> Any:
+            with self._database.transaction(
+                    suppress_exceptions=False) as cursor:
+                return function(cursor, *args, **kwargs)
+        return self.submit(job, callback=callback)
+
+    def submitRead(
+            self,
+            function: Callable[..., Any],
+            *args,
+            callback: Optional[Callback] = None,
+            **kwargs) -> Future:
+        """Same as submitTransaction(), but inside
+        Database.readTransaction(). Queued writes are executed first, so a
+        read can delay a write only while it is running."""
+        def job() -> Any:
+            with self._database.readTransaction(
+                    suppress_exceptions=False) as cursor:
+                return function(cursor, *args, **kwargs)
+        return self._submit(self.Priority.READ, job, (), {}, callback)
+
+    def _submit(
+            self,
+            priority: Priority,
+            function: Callable[..., Any],
+            args: tuple,
+            kwargs: dict,
+            callback: Optional[Callback]) -> Future:
+        future = Future()
+        if self._thread is None:
+            self._execute(future, function, args, kwargs)
+            if callback is not None:
+                callback(future)
+        elif self.isDatabaseThread:
+            self._execute(future, function, args, kwargs)
+            if callback is not None:
+                self._finishedSignal.emit(future, callback)
+        else:
+            self._put(priority, (future, function, args, kwargs, callback))
+        return future
+
+    def _put(self, priority: Priority, job: Optional[Job]) -> None:
+        # sequence keeps FIFO order of the jobs with the same priority
+        self._queue.put((priority, next(self._sequence), job))
+
+    def _run(self) -> None:
+        while True:
+            _, _, job = self._queue.get()
+            if job is None:
+                break
+            future, function, args, kwargs, callback = job
+            self._execute(future, function, args, kwargs)
+            if callback is not None:
+                self._finishedSignal.emit(future, callback)
+
+    def _execute(
+            self,
+            future: Future,
+            function: Callable[..., Any],
+            args: tuple,
+            kwargs: dict) -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(function(*args, **kwargs))
+        except BaseException as e:
+            self._logger.debug(
+                "Job '%s' failed with '%s' exception: %s",
+                getattr(function, "__qualname__", str(function)),
+                e.__class__.__name__,
+                str(e))
+            future.set_exception(e)
+
+    def _onFinished(self, future: Future, callback: Callback) -> None:
+        callback(future)
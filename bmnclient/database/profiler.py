@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import re
+from collections import deque
+from enum import Enum
+from threading import Lock
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Deque, Dict, Final, List
+
+
+class StatementProfile:
+    _SAMPLE_COUNT: Final = 1024
+
+    def __init__(self, query: str) -> None:
+        self._query = query
+        self._count = 0
+        self._total_time = 0
+        self._row_count = 0
+        # last executions only, enough for the p99 estimation
+        self._sample_list: Deque[int] = deque(maxlen=self._SAMPLE_COUNT)
+
+    @property
+    def query(self) -> str:
+        return self._query
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def totalTime(self) -> int:
+        return self._total_time
+
+    @property
+    def meanTime(self) -> float:
+        return self._total_time / self._count if self._count else 0.0
+
+    @property
+    def p99Time(self) -> int:
+        if not self._sample_list:
+            return 0
+        sample_list = sorted(self._sample_list)
+        return sample_list[min(
+            len(sample_list) - 1,
+            (len(sample_list) * 99) // 100)]
+
+    @property
+    def rowCount(self) -> int:
+        return self._row_count
+
+    def _append(self, timeframe: int, row_count: int) -> None:
+        self._count += 1
+        self._total_time += timeframe
+        self._row_count += row_count
+        self._sample_list.append(timeframe)
+
+
+class VfsProfile:
+    class Operation(Enum):
+        READ = "read"
+        WRITE = "write"
+        SYNC = "sync"
+
+    def __init__(self, operation: Operation) -> None:
+        self._operation = operation
+        self._count = 0
+        self._total_time = 0
+        self._size = 0
+
+    @property
+    def operation(self) -> Operation:
+        return self._operation
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def totalTime(self) -> int:
+        return self._total_time
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def _append(self, timeframe: int, size: int) -> None:
+        self._count += 1
+        self._total_time += timeframe
+        self._size += size
+
+
+class DatabaseProfiler:
+    """Collects statistics of executed statements and of VFS operations,
+    all times are in nanoseconds."""
+
+    _NORMALIZE_LIST: Final = (
+        # "IN (?, ?, ?)" -> "IN (?, ...)"
+        (re.compile(r"\?(?:\s*,\s*\?)+"), "?, ..."),
+        # "VALUES (?, ...), (?, ...)" -> "VALUES (?, ...), ..."
+        (re.compile(r"(\([^()]*\))(?:\s*,\s*\1)+"), r"\1, ..."),
+        (re.compile(r"\s+"), " "),
+    )
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._statement_map: Dict[str, StatementProfile] = {}
+        self._normalized_map: Dict[str, str] = {}
+        self._vfs_map: Dict[VfsProfile.Operation, VfsProfile] = {
+            o: VfsProfile(o) for o in VfsProfile.Operation
+        }
+
+    @property
+    def statementList(self) -> List[StatementProfile]:
+        with self._lock:
+            return sorted(
+                self._statement_map.values(),
+                key=lambda s: s.totalTime,
+                reverse=True)
+
+    @property
+    def vfsList(self) -> List[VfsProfile]:
+        return list(self._vfs_map.values())
+
+    def normalize(self, query: str) -> str:
+        result = self._normalized_map.get(query)
+        if result is None:
+            result = query.strip()
+            for expression, replacement in self._NORMALIZE_LIST:
+                result = expression.sub(replacement, result)
+            if len(self._normalized_map) < 10000:
+                self._normalized_map[query] = result
+        return result
+
+    def appendStatement(
+            self,
+            query: str,
+            timeframe: int,
+            row_count: int) -> None:
+        query = self.normalize(query)
+        with self._lock:
+            statement = self._statement_map.get(query)
+            if statement is None:
+                statement = self._statement_map[query] = \
+                    StatementProfile(query)
+            statement._append(timeframe, row_count)
+
+    def appendVfsOperation(
+            self,
+            operation: VfsProfile.Operation,
+            timeframe: int,
+            size: int = 0) -> None:
+        with self._lock:
+            self._vfs_map[operation]._append(timeframe, size)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statement_map.clear()
+            self._vfs_map = {o: VfsProfile(o) for o in VfsProfile.Operation}
+
+    def report(self, limit: int = 50) -> str:
+        line_list = [
+            "{:>8} {:>10} {:>10} {:>10} {:>10}  {}".format(
+                "count",
+                "total ms",
+                "mean us",
+                "p99 us",
+                "rows",
+                "statement")
+        ]
+        for statement in self.statementList[:limit]:
+            line_list.append(
+                "{:>8} {:>10.2f} {:>10.2f} {:>10.2f} {:>10}  {}".format(
+                    statement.count,
+                    statement.totalTime / 1e+6,
+                    statement.meanTime / 1e+3,
+                    statement.p99Time / 1e+3,
+                    statement.rowCount,
+                    statement.query))
+        line_list.append(
+            "{:>8} {:>10} {:>10}  {}".format(
+                "count",
+                "total ms",
+                "bytes",
+                "VFS operation"))
+        for vfs in self.vfsList:
+            line_list.append(
+                "{:>8} {:>10.2f} {:>10}  {}".format(
+                    vfs.count,
+                    vfs.totalTime / 1e+6,
+                    vfs.size,
+                    vfs.operation.value))
+        return "\n".join(line_list)
@@ -9,19 +9,21 @@ from ..utils.class_property import classproperty
 if TYPE_CHECKING:
     from typing import (
         Any,
+        Callable,
         Dict,
         Final,
         Generator,
         Iterable,
         List,
         Optional,
+        Sequence,
         Tuple,
         Type,
         Union
     )
     from . import Cursor, Database
     from ..coins.abstract import Coin
-    from ..utils.serialize import Serializable
+    from ..utils.serialize import DeserializedDict, Serializable
 
 
 def _stringList(source_list: Iterable[str]) -> str:
@@ -37,6 +39,13 @@ def _columnList(
     return _stringList(source_list)
 
 
+def _excludedColumnList(*source_list: ColumnEnum) -> str:
+    source_list = map(
+        lambda s: f"{s.value.identifier} = excluded.{s.value.identifier}",
+        source_list)
+    return _stringList(source_list)
+
+
 def _whereColumnList(*source_list: ColumnEnum) -> str:
     source_list = map(lambda s: f"{s.value.identifier} == ?", source_list)
     return " AND ".join(source_list)
@@ -53,6 +62,76 @@ def _qmarkList(count: int) -> str:
     return _stringList("?" * count)
 
 
+def _updateStatement(
+        identifier: str,
+        data_column_list: Tuple[ColumnEnum, ...],
+        key_column_list: Tuple[ColumnEnum, ...]) -> str:
+    return (
+        f"UPDATE {identifier}"
+        f" SET {_columnList(*data_column_list, with_qmark=True)}"
+        f" WHERE {_whereColumnList(*key_column_list)}"
+    )
+
+
+def _insertOrIgnoreStatement(
+        identifier: str,
+        column_list: Tuple[ColumnEnum, ...]) -> str:
+    return (
+        f"INSERT OR IGNORE INTO {identifier}"
+        f" ({_columnList(*column_list)})"
+        f" VALUES({_qmarkList(len(column_list))})"
+    )
+
+
+def _upsertStatement(
+        identifier: str,
+        key_column_list: Tuple[ColumnEnum, ...],
+        data_column_list: Tuple[ColumnEnum, ...],
+        returning_column_list: Tuple[ColumnEnum, ...],
+        row_count: int) -> str:
+    value = f"({_qmarkList(len(key_column_list) + len(data_column_list))})"
+    return (
+        f"INSERT INTO {identifier}"
+        f" ({_columnList(*key_column_list, *data_column_list)})"
+        f" VALUES {_stringList([value] * row_count)}"
+        f" ON CONFLICT({_columnList(*key_column_list)})"
+        f" DO UPDATE SET {_excludedColumnList(*data_column_list)}"
+        f" RETURNING {_columnList(*returning_column_list)}"
+    )
+
+
+def _selectStatement(
+        identifier: str,
+        column_list: Tuple[ColumnEnum, ...],
+        key_column_list: Tuple[ColumnEnum, ...],
+        order_list: Tuple[Tuple[ColumnEnum, Order], ...] = tuple(),
+        limit: bool = False) -> str:
+    query = (
+        f"SELECT {_columnList(*column_list)}"
+        f" FROM {identifier}"
+        f" WHERE {_whereColumnList(*key_column_list)}"
+    )
+    if order_list:
+        query += f" ORDER BY {_orderColumnList(*order_list)}"
+    if limit:
+        query += f" LIMIT ?"
+    return query
+
+
+def _encodeTxName(name: Union[bytes, str]) -> Union[bytes, str]:
+    # txid is stored as 32-byte BLOB, other names as is
+    if isinstance(name, str) and len(name) == 64:
+        try:
+            return bytes.fromhex(name)
+        except ValueError:
+            pass
+    return name
+
+
+def _decodeTxName(name: Union[bytes, str]) -> str:
+    return name.hex() if isinstance(name, bytes) else name
+
+
 class Order(Enum):
     ASC: Final = "ASC"
     DESC: Final = "DESC"
@@ -92,10 +171,17 @@ class AbstractTable:
         # compatible with utils.serialize.Serializable.rowId
         ROW_ID: Final = ColumnDefinition("row_id", "INTEGER PRIMARY KEY")
 
+    # SQLITE_MAX_VARIABLE_NUMBER, minimal value for old SQLite versions
+    _MAX_VARIABLE_COUNT: Final = 999
+    # multi-row upsert sizes below the variable limit, keeps the number of
+    # cached statements bounded
+    _UPSERT_CHUNK_SIZE_LIST: Final = (16, 1)
+
     __NAME: str = ""
     __IDENTIFIER: str = ""
     _CONSTRAINT_LIST: Tuple[str] = tuple()
     _UNIQUE_COLUMN_LIST: Tuple[Tuple[Column]] = tuple()
+    _INDEX_COLUMN_LIST: Tuple[Tuple[Column]] = tuple()
 
     # noinspection PyMethodOverriding
     def __init_subclass__(cls, *args, name: str, **kwargs) -> None:
@@ -112,6 +198,17 @@ class AbstractTable:
             f"CREATE TABLE IF NOT EXISTS {cls.__IDENTIFIER}"
             f" ({definition_list})"
         )
+        cls.__INDEX_DEFINITION_LIST = tuple(
+            f"CREATE INDEX IF NOT EXISTS"
+            f" \"{cls.__NAME}_{'_'.join(c.value.name for c in column_list)}\""
+            f" ON {cls.__IDENTIFIER} ({_columnList(*column_list)})"
+            for column_list in cls._INDEX_COLUMN_LIST
+        )
+
+        # Enum iteration and Column.value are slow for the per-row code
+        cls.__COLUMN_NAME_LIST = tuple((c, c.value.name) for c in cls.Column)
+        # statements are built once for each column set, see _statement()
+        cls.__STATEMENT_MAP = {}
 
     def __init__(self, database: Database) -> None:
         self._database = database
@@ -127,8 +224,21 @@ class AbstractTable:
     def identifier(cls) -> str:  # noqa
         return cls.__IDENTIFIER
 
+    @classmethod
+    def _statement(cls, builder: Callable[..., str], *args) -> str:
+        """Returns the statement built by builder(identifier, *args). All
+        arguments must be hashable, tuples of columns instead of lists."""
+        key = (builder, *args)
+        try:
+            return cls.__STATEMENT_MAP[key]
+        except KeyError:
+            query = cls.__STATEMENT_MAP[key] = builder(cls.__IDENTIFIER, *args)
+            return query
+
     def open(self, cursor: Cursor) -> None:
         cursor.execute(str(self))
+        for definition in self.__INDEX_DEFINITION_LIST:
+            cursor.execute(definition)
 
     def upgrade(self, cursor: Cursor, old_version: int) -> None:
         pass
@@ -154,20 +264,24 @@ class AbstractTable:
                 f"'{k.value.name}' == '{str(v)}'" for (k, v) in columns.items()
             )
 
+        key_column_list = tuple(key_columns.keys())
+        data_column_list = tuple(data_columns.keys())
+
         if row_id > 0:
             cursor.execute(
-                f"UPDATE {self.identifier}"
-                f" SET {_columnList(*data_columns.keys(), with_qmark=True)}"
-                f" WHERE {self.Column.ROW_ID.value.identifier} == ?",
+                self._statement(
+                    _updateStatement,
+                    data_column_list,
+                    (self.Column.ROW_ID, )),
                 (*data_columns.values(), row_id))
             if cursor.rowcount > 0:
                 assert cursor.rowcount == 1
                 return row_id
 
         cursor.execute(
-            f"INSERT OR IGNORE INTO {self.identifier}"
-            f" ({_columnList(*key_columns.keys(), *data_columns.keys())})"
-            f" VALUES({_qmarkList(len(key_columns) + len(data_columns))})",
+            self._statement(
+                _insertOrIgnoreStatement,
+                key_column_list + data_column_list),
             (*key_columns.values(), *data_columns.values()))
 
         if cursor.rowcount > 0:
@@ -177,13 +291,13 @@ class AbstractTable:
 
         if row_id_required:
             if row_id <= 0:
-                query = (
-                    f"SELECT {_columnList(self.Column.ROW_ID)}"
-                    f" FROM {self.identifier}"
-                    f" WHERE {_whereColumnList(*key_columns.keys())}"
-                    f" LIMIT 1"
-                )
-                for r in cursor.execute(query, (*key_columns.values(), )):
+                query = self._statement(
+                    _selectStatement,
+                    (self.Column.ROW_ID, ),
+                    key_column_list,
+                    tuple(),
+                    True)
+                for r in cursor.execute(query, (*key_columns.values(), 1)):
                     row_id = int(r[0])
                     break
                 if row_id <= 0:
@@ -192,12 +306,12 @@ class AbstractTable:
                         query)
         if row_id > 0:
             key_columns = {self.Column.ROW_ID: row_id}
+            key_column_list = (self.Column.ROW_ID, )
 
-        query = (
-            f"UPDATE {self.identifier}"
-            f" SET {_columnList(*data_columns.keys(), with_qmark=True)}"
-            f" WHERE {_whereColumnList(*key_columns.keys())}"
-        )
+        query = self._statement(
+            _updateStatement,
+            data_column_list,
+            key_column_list)
         cursor.execute(query, (*data_columns.values(), *key_columns.values()))
         if cursor.rowcount <= 0:
             raise self._database.InsertOrUpdateError("row not found", query)
@@ -221,10 +335,10 @@ class AbstractTable:
         else:
             data_columns = custom_columns.copy()
 
-        for column in self.Column:
+        for column, name in self.__COLUMN_NAME_LIST:
             if column not in key_columns and column not in custom_columns:
-                if column.value.name in source_data:
-                    data_columns[column] = source_data[column.value.name]
+                if name in source_data:
+                    data_columns[column] = source_data[name]
 
         source.rowId = self._insertOrUpdate(
             cursor,
@@ -233,6 +347,75 @@ class AbstractTable:
             row_id=source.rowId)
         assert source.rowId > 0
 
+    def _serializeMany(
+            self,
+            cursor: Cursor,
+            source_list: Sequence[Tuple[
+                Serializable,
+                Dict[Column, Any],
+                Dict[Column, Any]]],
+            **options) -> None:
+        if not source_list:
+            return
+        key_column_list = tuple(source_list[0][1].keys())
+        assert self.Column.ROW_ID not in key_column_list
+        data_column_list = None
+
+        row_map: Dict[Tuple[Any, ...], Tuple[Any, ...]] = {}
+        source_map: Dict[Tuple[Any, ...], List[Serializable]] = {}
+        for source, key_columns, custom_columns in source_list:
+            assert tuple(key_columns.keys()) == key_column_list
+            source_data = source.serialize(
+                exclude_subclasses=True,
+                **options)
+            if data_column_list is None:
+                data_column_list = tuple(
+                    (c, n) for c, n in self.__COLUMN_NAME_LIST
+                    if c not in key_columns and (
+                            c in custom_columns
+                            or n in source_data
+                    ))
+                assert data_column_list
+
+            key = tuple(key_columns.values())
+            row_map[key] = (
+                *key,
+                *(
+                    custom_columns[c] if c in custom_columns
+                    else source_data[n]
+                    for c, n in data_column_list
+                ))
+            source_map.setdefault(key, []).append(source)
+
+        data_column_list = tuple(c for c, _ in data_column_list)
+        row_list = list(row_map.values())
+        column_count = len(key_column_list) + len(data_column_list)
+        chunk_size = max(1, self._MAX_VARIABLE_COUNT // column_count)
+        returning_column_list = (self.Column.ROW_ID, *key_column_list)
+
+        offset = 0
+        for size in (chunk_size, *self._UPSERT_CHUNK_SIZE_LIST):
+            if size > chunk_size or len(row_list) - offset < size:
+                continue
+            query = self._statement(
+                _upsertStatement,
+                key_column_list,
+                data_column_list,
+                returning_column_list,
+                size)
+            while len(row_list) - offset >= size:
+                chunk = row_list[offset:offset + size]
+                offset += size
+                for row_id, *key in cursor.execute(
+                        query,
+                        tuple(chain.from_iterable(chunk))):
+                    for source in source_map[tuple(key)]:
+                        source.rowId = row_id
+        assert offset == len(row_list)
+
+        assert all(
+            s.rowId > 0 for s in chain.from_iterable(source_map.values()))
+
     def _deserialize(
             self,
             cursor: Cursor,
@@ -245,39 +428,31 @@ class AbstractTable:
             **options
     ) -> Generator[Dict[str, Union[int, str]], None, None]:
         assert self.Column.ROW_ID not in key_columns
-        column_list = [self.Column.ROW_ID]
-        for column in self.Column:
-            if column not in key_columns:
-                if column.value.name in source_type.serializeMap:
-                    column_list.append(column)
+        key_column_list = tuple(key_columns.keys())
+        column_list = (self.Column.ROW_ID, ) + tuple(
+            c for c, n in self.__COLUMN_NAME_LIST
+            if c not in key_columns and n in source_type.serializeMap)
 
-        query, query_args = self._deserializeStatement(
+        query = self._statement(
+            _selectStatement,
             column_list,
-            key_columns,
-            **options)
-
-        if order_columns:
-            query += f" ORDER BY {_orderColumnList(*order_columns.items())}"
-
+            key_column_list,
+            tuple(order_columns.items()),
+            limit >= 0)
+        query_args = [*key_columns.values()]
         if limit >= 0:
-            query += f" LIMIT ?"
             query_args.append(limit)
 
+        name_list = tuple(c.value.name for c in column_list)
+        if return_key_columns:
+            key_result = tuple(zip(
+                (c.value.name for c in key_column_list),
+                key_columns.values()))
+        else:
+            key_result = tuple()
+
         for result in cursor.execute(query, query_args):
-            if return_key_columns:
-                yield dict(chain(
-                    zip(
-                        (c.value.name for c in key_columns.keys()),
-                        key_columns.values()),
-                    zip(
-                        (c.value.name for c in column_list),
-                        result)
-                ))
-            else:
-                yield dict(zip(
-                    (c.value.name for c in column_list),
-                    result)
-                )
+            yield dict(chain(key_result, zip(name_list, result)))
 
     def _deserializeStatement(
             self,
@@ -286,14 +461,18 @@ class AbstractTable:
             **options
     ) -> Tuple[str, List[Any]]:
         return (
-            (
-                f"SELECT {_columnList(*column_list)}"
-                f" FROM {self.identifier}"
-                f" WHERE {_whereColumnList(*key_columns.keys())}"
-            ),
+            self._statement(
+                _selectStatement,
+                tuple(column_list),
+                tuple(key_columns.keys())),
             [*key_columns.values()]
         )
 
+    def statementSelectRowIdList(
+            self,
+            key_columns: Dict[Column, Any]) -> Tuple[str, List[Any]]:
+        return self._deserializeStatement([self.Column.ROW_ID], key_columns)
+
 
 class MetadataTable(AbstractTable, name="metadata"):
     class Column(ColumnEnum):
@@ -369,8 +548,8 @@ class CoinListTable(AbstractTable, name="coins"):
             "unverified_hash",
             "TEXT NOT NULL")
 
-    def deserialize(self, cursor: Cursor, coin: Coin) -> bool:
-        result = next(
+    def fetch(self, cursor: Cursor, coin: Coin) -> Optional[DeserializedDict]:
+        return next(
             self._deserialize(
                 cursor,
                 type(coin),
@@ -379,9 +558,14 @@ class CoinListTable(AbstractTable, name="coins"):
                 limit=1,
                 return_key_columns=True),
             None)
+
+    def deserialize(self, cursor: Cursor, coin: Coin) -> bool:
+        result = self.fetch(cursor, coin)
         if result is None:
             return False
+        return self.load(coin, result)
 
+    def load(self, coin: Coin, result: DeserializedDict) -> bool:
         if not coin.deserializeUpdate(result):
             self._database.logDeserializeError(type(coin), result)
             return False
@@ -458,14 +642,23 @@ class AddressListTable(AbstractTable, name="addresses"):
     # TODO dynamic interface with coin.txList, address.txList
     def deserializeAll(self, cursor: Cursor, coin: Coin) -> bool:
         assert coin.rowId > 0
+        return self.loadAll(coin, self.fetchAll(cursor, coin, coin.rowId))
 
+    def fetchAll(
+            self,
+            cursor: Cursor,
+            coin: Coin,
+            coin_row_id: int) -> List[DeserializedDict]:
+        assert coin_row_id > 0
+        return list(self._deserialize(
+            cursor,
+            coin.Address,
+            {self.Column.COIN_ROW_ID: coin_row_id},
+            {}))
+
+    def loadAll(self, coin: Coin, result_list: List[DeserializedDict]) -> bool:
         error = False
-        for result in self._deserialize(
-                cursor,
-                coin.Address,
-                {self.Column.COIN_ROW_ID: coin.rowId},
-                {}
-        ):
+        for result in result_list:
             address = coin.Address.deserialize(result, coin)
             if address is None:
                 error = True
@@ -499,7 +692,7 @@ class TxListTable(AbstractTable, name="transactions"):
 
         NAME: Final = ColumnDefinition(
             "name",
-            "TEXT NOT NULL")
+            "BLOB NOT NULL")
         HEIGHT: Final = ColumnDefinition(
             "height",
             "INTEGER NOT NULL")
@@ -527,107 +720,164 @@ class TxListTable(AbstractTable, name="transactions"):
     _UNIQUE_COLUMN_LIST = (
         (Column.COIN_ROW_ID, Column.NAME),
     )
+    _INDEX_COLUMN_LIST = (
+        (Column.COIN_ROW_ID, Column.HEIGHT, Column.TIME),
+    )
 
-    def _deserializeStatement(
-            self,
-            column_list: List[ColumnEnum],
-            key_columns: Dict[Column, Any],
-            *,
-            address_row_id: int = -1,
-            **options
-    ) -> Tuple[str, List[Any]]:
-        assert address_row_id > 0
-        where, where_args = \
-            self._database[AddressTxMapTable].statementSelectTransactions(
-                address_row_id)
-        return (
-            (
-                f"SELECT {_columnList(*column_list)}"
-                f" FROM {self.identifier}"
-                f" WHERE {_columnList(self.Column.ROW_ID)} IN ({where})"
-            ),
-            where_args
-        )
+    def upgrade(self, cursor: Cursor, old_version: int) -> None:
+        # don't use identifiers from actual class!
+        if old_version <= 3:
+            self._upgrade_v3(cursor)
+
+    @staticmethod
+    def _upgrade_v3(cursor: Cursor) -> None:
+        update_list = []
+        for row_id, name in cursor.execute(
+                "SELECT \"row_id\", \"name\" FROM \"transactions\""):
+            value = _encodeTxName(name)
+            if value is not name:
+                update_list.append((value, row_id))
+        cursor.executemany(
+            "UPDATE \"transactions\" SET \"name\" = ? WHERE \"row_id\" == ?",
+            update_list)
 
     # TODO dynamic interface with coin.txList
-    def deserializeAll(
+    def deserializeAll(self, cursor: Cursor, coin: Coin) -> bool:
+        assert coin.rowId > 0
+        return self.loadAll(coin, self.fetchAll(cursor, coin, coin.rowId))
+
+    def fetchAll(
             self,
             cursor: Cursor,
-            address: Coin.Address) -> bool:
-        assert address.coin.rowId > 0
-        assert address.rowId > 0
-
-        error = False
+            coin: Coin,
+            coin_row_id: int
+    ) -> Tuple[List[DeserializedDict], List, List]:
+        """Returns the raw rows of transactions, inputs/outputs and address
+        map, safe to pass between threads."""
+        result_list = []
         for result in self._deserialize(
                 cursor,
-                address.coin.Tx,
+                coin.Tx,
                 {
-                    self.Column.COIN_ROW_ID: address.coin.rowId
+                    self.Column.COIN_ROW_ID: coin_row_id
                 },
                 {
                     self.Column.HEIGHT: Order.ASC,
                     self.Column.TIME: Order.ASC
-                },
-                address_row_id=address.rowId
+                }
         ):
-            input_error, result["input_list"] = \
-                self._database[TxIoListTable].deserializeAll(
-                    cursor.connection.cursor(),
-                    address.coin,
-                    result["row_id"],
-                    TxIoListTable.IoType.INPUT)
-            output_error, result["output_list"] = \
-                self._database[TxIoListTable].deserializeAll(
-                    cursor.connection.cursor(),
-                    address.coin,
-                    result["row_id"],
-                    TxIoListTable.IoType.OUTPUT)
-            if input_error or output_error:
-                error = True
+            result["name"] = _decodeTxName(result["name"])
+            result_list.append(result)
+        return (
+            result_list,
+            self._database[TxIoListTable].fetchAll(cursor, coin, coin_row_id),
+            self._database[AddressTxMapTable].fetchAll(cursor, coin_row_id)
+        )
+
+    def loadAll(
+            self,
+            coin: Coin,
+            fetch_result: Tuple[List[DeserializedDict], List, List]) -> bool:
+        result_list, io_result_list, address_row_list = fetch_result
+        io_result, io_map = self._database[TxIoListTable].loadAll(
+            coin,
+            io_result_list)
+        error = not io_result
+        address_map = self._database[AddressTxMapTable].loadAll(
+            coin,
+            address_row_list)
+
+        for result in result_list:
+            result["input_list"], result["output_list"] = io_map.pop(
+                result["row_id"],
+                ([], []))
 
-            tx = address.coin.Tx.deserialize(result, address.coin)
+            tx = coin.Tx.deserialize(result, coin)
             if tx is None:
                 error = True
-                self._database.logDeserializeError(address.coin.Tx, result)
-            else:
-                assert tx.rowId > 0
+                self._database.logDeserializeError(coin.Tx, result)
+                continue
+
+            assert tx.rowId > 0
+            for address in address_map.pop(tx.rowId, []):
                 address.appendTx(tx)
         return not error
 
-    def serialize(
+    def serializeAll(
             self,
             cursor: Cursor,
             address: Optional[Coin.Address],
-            tx: Coin.Tx) -> None:
-        assert tx.coin.rowId > 0
+            tx_list: Sequence[Coin.Tx]) -> None:
+        if not tx_list:
+            return
 
-        self._serialize(
+        self._serializeMany(
             cursor,
-            tx,
-            {
-                self.Column.COIN_ROW_ID: tx.coin.rowId,
-                self.Column.NAME: tx.name
-            })
-        assert tx.rowId > 0
+            [
+                (
+                    tx,
+                    {
+                        self.Column.COIN_ROW_ID: tx.coin.rowId,
+                        self.Column.NAME: _encodeTxName(tx.name)
+                    },
+                    {}
+                ) for tx in tx_list
+            ])
 
         # TODO delete old list?
-        for io_type, io_list in (
-                (TxIoListTable.IoType.INPUT, tx.inputList),
-                (TxIoListTable.IoType.OUTPUT, tx.outputList)
-        ):
-            for io in io_list:
-                self._database[TxIoListTable].serialize(
-                    cursor,
-                    tx,
-                    io_type,
-                    io)
+        self._database[TxIoListTable].serializeAll(cursor, tx_list)
 
         if address is not None:
-            assert tx.coin.rowId == address.coin.rowId
-            self._database[AddressTxMapTable].insert(
-                    cursor,
-                    address.rowId,
-                    tx.rowId)
+            assert all(tx.coin.rowId == address.coin.rowId for tx in tx_list)
+            self._database[AddressTxMapTable].insertAll(
+                cursor,
+                address.rowId,
+                [tx.rowId for tx in tx_list])
+
+    def serialize(
+            self,
+            cursor: Cursor,
+            address: Optional[Coin.Address],
+            tx: Coin.Tx) -> None:
+        self.serializeAll(cursor, address, (tx, ))
+
+
+class AddressNameListTable(AbstractTable, name="address_names"):
+    class Column(ColumnEnum):
+        ROW_ID: Final = AbstractTable.Column.ROW_ID.value
+        NAME: Final = ColumnDefinition("name", "TEXT NOT NULL UNIQUE")
+
+    def internAll(
+            self,
+            cursor: Cursor,
+            name_list: Iterable[str]) -> Dict[str, int]:
+        name_list = list(dict.fromkeys(name_list))
+        name_map = {}
+        columns = (self.Column.ROW_ID, self.Column.NAME)
+
+        for offset in range(0, len(name_list), self._MAX_VARIABLE_COUNT):
+            chunk = name_list[offset:offset + self._MAX_VARIABLE_COUNT]
+            cursor.execute(
+                f"SELECT {_columnList(*columns)}"
+                f" FROM {self.identifier}"
+                f" WHERE {_columnList(self.Column.NAME)}"
+                f" IN ({_qmarkList(len(chunk))})",
+                chunk)
+            name_map.update((name, row_id) for row_id, name in cursor)
+
+            chunk = [name for name in chunk if name not in name_map]
+            if not chunk:
+                continue
+            cursor.execute(
+                f"INSERT INTO {self.identifier}"
+                f" ({_columnList(self.Column.NAME)})"
+                f" VALUES {_stringList(['(?)'] * len(chunk))}"
+                f" RETURNING {_columnList(*columns)}",
+                chunk)
+            name_map.update((name, row_id) for row_id, name in cursor)
+
+        assert len(name_map) == len(name_list)
+        return name_map
 
 
 class TxIoListTable(AbstractTable, name="transactions_io"):
@@ -650,9 +900,10 @@ class TxIoListTable(AbstractTable, name="transactions_io"):
         OUTPUT_TYPE: Final = ColumnDefinition(
             "output_type",
             "TEXT NOT NULL")
-        ADDRESS_NAME: Final = ColumnDefinition(
-            "address_name",
-            "TEXT")
+        # interned by AddressNameListTable, NULL for null data
+        ADDRESS_NAME_ROW_ID: Final = ColumnDefinition(
+            "address_name_row_id",
+            "INTEGER")
         AMOUNT: Final = ColumnDefinition(
             "amount",
             "INTEGER NOT NULL")
@@ -662,61 +913,159 @@ class TxIoListTable(AbstractTable, name="transactions_io"):
         f" REFERENCES {TxListTable.identifier}"
         f" ({_columnList(TxListTable.Column.ROW_ID)})"
         f" ON DELETE CASCADE",
+
+        f"FOREIGN KEY ({_columnList(Column.ADDRESS_NAME_ROW_ID)})"
+        f" REFERENCES {AddressNameListTable.identifier}"
+        f" ({_columnList(AddressNameListTable.Column.ROW_ID)})",
     )
 
     _UNIQUE_COLUMN_LIST = (
         (Column.TX_ROW_ID, Column.IO_TYPE, Column.INDEX),
     )
+    _INDEX_COLUMN_LIST = (
+        (Column.ADDRESS_NAME_ROW_ID, ),
+    )
+
+    def upgrade(self, cursor: Cursor, old_version: int) -> None:
+        # don't use identifiers from actual class!
+        if old_version <= 3:
+            self._upgrade_v3(cursor)
+
+    @staticmethod
+    def _upgrade_v3(cursor: Cursor) -> None:
+        if not cursor.isColumnExists("transactions_io", "address_name"):
+            return
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS \"address_names\" ("
+            "\"row_id\" INTEGER PRIMARY KEY,"
+            " \"name\" TEXT NOT NULL UNIQUE)")
+        cursor.execute(
+            "INSERT OR IGNORE INTO \"address_names\" (\"name\")"
+            " SELECT DISTINCT \"address_name\" FROM \"transactions_io\""
+            " WHERE \"address_name\" IS NOT NULL")
+        cursor.execute(
+            "ALTER TABLE \"transactions_io\""
+            " ADD COLUMN \"address_name_row_id\" INTEGER"
+            " REFERENCES \"address_names\" (\"row_id\")")
+        cursor.execute(
+            "UPDATE \"transactions_io\" SET \"address_name_row_id\" = ("
+            "SELECT \"row_id\" FROM \"address_names\""
+            " WHERE \"address_names\".\"name\""
+            " == \"transactions_io\".\"address_name\")"
+            " WHERE \"address_name\" IS NOT NULL")
+        cursor.execute(
+            "DROP INDEX IF EXISTS \"transactions_io_address_name\"")
+        cursor.execute(
+            "ALTER TABLE \"transactions_io\" DROP COLUMN \"address_name\"")
 
     def deserializeAll(
             self,
             cursor: Cursor,
-            coin: Coin,
-            tx_row_id: int,
-            io_type: IoType) -> Tuple[bool, List[Coin.Tx.Io]]:
+            coin: Coin
+    ) -> Tuple[bool, Dict[int, Tuple[List[Coin.Tx.Io], List[Coin.Tx.Io]]]]:
         assert coin.rowId > 0
-        assert tx_row_id > 0
-        io_list = []
+        return self.loadAll(coin, self.fetchAll(cursor, coin, coin.rowId))
+
+    def fetchAll(
+            self,
+            cursor: Cursor,
+            coin: Coin,
+            coin_row_id: int
+    ) -> List[Tuple[int, int, DeserializedDict]]:
+        column_list = [self.Column.ROW_ID]
+        for column in self.Column:
+            if column.value.name in coin.Tx.Io.serializeMap:
+                column_list.append(column)
+
+        where, where_args = \
+            self._database[TxListTable].statementSelectRowIdList(
+                {TxListTable.Column.COIN_ROW_ID: coin_row_id})
+        order_list = _orderColumnList(
+            (self.Column.TX_ROW_ID, Order.ASC),
+            (self.Column.IO_TYPE, Order.ASC),
+            (self.Column.INDEX, Order.ASC))
+        address_name = (
+            f"SELECT {_columnList(AddressNameListTable.Column.NAME)}"
+            f" FROM {AddressNameListTable.identifier}"
+            f" WHERE {AddressNameListTable.identifier}"
+            f".{AddressNameListTable.Column.ROW_ID.value.identifier}"
+            f" == {self.identifier}"
+            f".{self.Column.ADDRESS_NAME_ROW_ID.value.identifier}"
+        )
+        query = (
+            f"SELECT"
+            f" {_columnList(self.Column.TX_ROW_ID, self.Column.IO_TYPE)},"
+            f" ({address_name}),"
+            f" {_columnList(*column_list)}"
+            f" FROM {self.identifier}"
+            f" WHERE {_columnList(self.Column.TX_ROW_ID)} IN ({where})"
+            f" ORDER BY {order_list}"
+        )
+
+        result_list = []
+        for tx_row_id, io_type, address_name, *values in cursor.execute(
+                query,
+                where_args):
+            result = dict(zip((c.value.name for c in column_list), values))
+            result["address_name"] = address_name
+            result_list.append((tx_row_id, io_type, result))
+        return result_list
 
+    def loadAll(
+            self,
+            coin: Coin,
+            result_list: List[Tuple[int, int, DeserializedDict]]
+    ) -> Tuple[bool, Dict[int, Tuple[List[Coin.Tx.Io], List[Coin.Tx.Io]]]]:
+        io_map = {}
         error = False
-        for result in self._deserialize(
-                cursor,
-                coin.Tx.Io,
-                {
-                    self.Column.TX_ROW_ID: tx_row_id,
-                    self.Column.IO_TYPE: io_type.value
-                },
-                {
-                    self.Column.INDEX: Order.ASC
-                }
-        ):
+        for tx_row_id, io_type, result in result_list:
             io = coin.Tx.Io.deserialize(result, coin)
             if io is None:
                 error = True
                 self._database.logDeserializeError(coin.Tx.Io, result)
-            else:
-                assert io.rowId > 0
-                io_list.append(io)
+                continue
 
-        return not error, io_list
+            assert io.rowId > 0
+            input_list, output_list = io_map.setdefault(tx_row_id, ([], []))
+            if io_type == self.IoType.INPUT.value:
+                input_list.append(io)
+            else:
+                output_list.append(io)
 
-    def serialize(
-            self,
-            cursor: Cursor,
-            tx: Coin.Tx,
-            io_type: IoType,
-            io: Coin.Tx.Io) -> None:
-        assert tx.rowId > 0
+        return not error, io_map
 
-        self._serialize(
+    def serializeAll(self, cursor: Cursor, tx_list: Sequence[Coin.Tx]) -> None:
+        io_list = []
+        for tx in tx_list:
+            assert tx.rowId > 0
+            for io_type, tx_io_list in (
+                    (self.IoType.INPUT, tx.inputList),
+                    (self.IoType.OUTPUT, tx.outputList)
+            ):
+                io_list.extend((tx, io_type, io) for io in tx_io_list)
+
+        name_map = self._database[AddressNameListTable].internAll(
             cursor,
-            io,
-            {
-                self.Column.TX_ROW_ID: tx.rowId,
-                self.Column.IO_TYPE: io_type.value,
-                self.Column.INDEX: io.index
-            })
-        assert io.rowId > 0
+            (
+                io.addressName for _, _, io in io_list
+                if io.addressName is not None
+            ))
+        self._serializeMany(
+            cursor,
+            [
+                (
+                    io,
+                    {
+                        self.Column.TX_ROW_ID: tx.rowId,
+                        self.Column.IO_TYPE: io_type.value,
+                        self.Column.INDEX: io.index
+                    },
+                    {
+                        self.Column.ADDRESS_NAME_ROW_ID:
+                            name_map.get(io.addressName)
+                    }
+                ) for tx, io_type, io in io_list
+            ])
 
 
 class AddressTxMapTable(AbstractTable, name="address_transaction_map"):
@@ -745,31 +1094,173 @@ class AddressTxMapTable(AbstractTable, name="address_transaction_map"):
     _UNIQUE_COLUMN_LIST = (
         (Column.ADDRESS_ROW_ID, Column.TX_ROW_ID),
     )
+    # foreign key lookups, "automatic_index = OFF"
+    _INDEX_COLUMN_LIST = (
+        (Column.TX_ROW_ID, ),
+    )
 
-    def insert(
-            self, cursor: Cursor,
+    def insertAll(
+            self,
+            cursor: Cursor,
             address_row_id: int,
-            tx_row_id: int) -> None:
+            tx_row_id_list: Sequence[int]) -> None:
         assert address_row_id > 0
-        assert tx_row_id > 0
+        assert all(tx_row_id > 0 for tx_row_id in tx_row_id_list)
         columns = (
             self.Column.ADDRESS_ROW_ID,
             self.Column.TX_ROW_ID)
-        cursor.execute(
+        cursor.executemany(
             f"INSERT OR IGNORE INTO {self.identifier}"
             f" ({_columnList(*columns)})"
             f" VALUES({_qmarkList(len(columns))})",
-            (address_row_id, tx_row_id))
+            ((address_row_id, tx_row_id) for tx_row_id in tx_row_id_list))
 
-    def statementSelectTransactions(
+    def selectAll(
             self,
-            address_row_id: int) -> Tuple[str, List[Any]]:
-        assert address_row_id > 0
-        return (
-            (
-                f"SELECT {_columnList(self.Column.TX_ROW_ID)}"
-                f" FROM {self.identifier}"
-                f" WHERE {_whereColumnList(self.Column.ADDRESS_ROW_ID)}"
-            ),
-            [address_row_id]
+            cursor: Cursor,
+            coin: Coin) -> Dict[int, List[Coin.Address]]:
+        assert coin.rowId > 0
+        return self.loadAll(coin, self.fetchAll(cursor, coin.rowId))
+
+    def fetchAll(
+            self,
+            cursor: Cursor,
+            coin_row_id: int) -> List[Tuple[int, int]]:
+        where, where_args = \
+            self._database[AddressListTable].statementSelectRowIdList(
+                {AddressListTable.Column.COIN_ROW_ID: coin_row_id})
+        query = (
+            f"SELECT"
+            f" {_columnList(self.Column.TX_ROW_ID, self.Column.ADDRESS_ROW_ID)}"
+            f" FROM {self.identifier}"
+            f" WHERE {_columnList(self.Column.ADDRESS_ROW_ID)} IN ({where})"
         )
+
+        return list(cursor.execute(query, where_args))
+
+    def loadAll(
+            self,
+            coin: Coin,
+            row_list: List[Tuple[int, int]]) -> Dict[int, List[Coin.Address]]:
+        address_list = {a.rowId: a for a in coin.addressList if a.rowId > 0}
+        tx_map = {}
+        for tx_row_id, address_row_id in row_list:
+            address = address_list.get(address_row_id)
+            if address is not None:
+                tx_map.setdefault(tx_row_id, []).append(address)
+        return tx_map
+
+
+class UtxoListTable(AbstractTable, name="utxos"):
+    class Column(ColumnEnum):
+        ROW_ID: Final = AbstractTable.Column.ROW_ID.value
+        ADDRESS_ROW_ID: Final = ColumnDefinition(
+            "address_row_id",
+            "INTEGER NOT NULL")
+
+        NAME: Final = ColumnDefinition(
+            "name",
+            "BLOB NOT NULL")
+        INDEX: Final = ColumnDefinition(
+            "index",
+            "INTEGER NOT NULL")
+        HEIGHT: Final = ColumnDefinition(
+            "height",
+            "INTEGER NOT NULL")
+        AMOUNT: Final = ColumnDefinition(
+            "amount",
+            "INTEGER NOT NULL")
+
+    _CONSTRAINT_LIST = (
+        f"FOREIGN KEY ({_columnList(Column.ADDRESS_ROW_ID)})"
+        f" REFERENCES {AddressListTable.identifier}"
+        f" ({_columnList(AddressListTable.Column.ROW_ID)})"
+        f" ON DELETE CASCADE",
+    )
+    _UNIQUE_COLUMN_LIST = (
+        (Column.ADDRESS_ROW_ID, Column.NAME, Column.INDEX),
+    )
+
+    def deserializeAll(self, cursor: Cursor, coin: Coin) -> bool:
+        assert coin.rowId > 0
+        return self.loadAll(coin, self.fetchAll(cursor, coin, coin.rowId))
+
+    def fetchAll(
+            self,
+            cursor: Cursor,
+            coin: Coin,
+            coin_row_id: int) -> List[Tuple[int, DeserializedDict]]:
+        column_list = [self.Column.ROW_ID]
+        for column in self.Column:
+            if column.value.name in coin.Tx.Utxo.serializeMap:
+                column_list.append(column)
+
+        where, where_args = \
+            self._database[AddressListTable].statementSelectRowIdList(
+                {AddressListTable.Column.COIN_ROW_ID: coin_row_id})
+        query = (
+            f"SELECT"
+            f" {_columnList(self.Column.ADDRESS_ROW_ID)},"
+            f" {_columnList(*column_list)}"
+            f" FROM {self.identifier}"
+            f" WHERE {_columnList(self.Column.ADDRESS_ROW_ID)} IN ({where})"
+        )
+
+        result_list = []
+        for address_row_id, *values in cursor.execute(query, where_args):
+            result = dict(zip((c.value.name for c in column_list), values))
+            result["name"] = _decodeTxName(result["name"])
+            result_list.append((address_row_id, result))
+        return result_list
+
+    def loadAll(
+            self,
+            coin: Coin,
+            result_list: List[Tuple[int, DeserializedDict]]) -> bool:
+        address_list = {a.rowId: a for a in coin.addressList if a.rowId > 0}
+        utxo_map: Dict[int, List[Coin.Tx.Utxo]] = {}
+        error = False
+        for address_row_id, result in result_list:
+            utxo = coin.Tx.Utxo.deserialize(result, coin)
+            if utxo is None:
+                error = True
+                self._database.logDeserializeError(coin.Tx.Utxo, result)
+                continue
+            assert utxo.rowId > 0
+            utxo_map.setdefault(address_row_id, []).append(utxo)
+
+        for address_row_id, utxo_list in utxo_map.items():
+            address = address_list.get(address_row_id)
+            if address is not None:
+                address.utxoList = utxo_list
+        return not error
+
+    def serializeAll(self, cursor: Cursor, address: Coin.Address) -> None:
+        """Reconciles stored UTXOs of the address with address.utxoList."""
+        assert address.rowId > 0
+
+        self._serializeMany(
+            cursor,
+            [
+                (
+                    utxo,
+                    {
+                        self.Column.ADDRESS_ROW_ID: address.rowId,
+                        self.Column.NAME: _encodeTxName(utxo.name),
+                        self.Column.INDEX: utxo.index
+                    },
+                    {}
+                ) for utxo in address.utxoList
+            ])
+
+        # remove spent
+        row_id_list = {utxo.rowId for utxo in address.utxoList}
+        where, where_args = self.statementSelectRowIdList(
+            {self.Column.ADDRESS_ROW_ID: address.rowId})
+        cursor.executemany(
+            f"DELETE FROM {self.identifier}"
+            f" WHERE {self.Column.ROW_ID.value.identifier} == ?",
+            [
+                r for r in cursor.execute(where, where_args).fetchall()
+                if r[0] not in row_id_list
+            ])
@@ -1,15 +1,27 @@
 from __future__ import annotations
 
 import os
+import time
+from collections import OrderedDict
 from pathlib import PurePath
+from threading import Lock
 from typing import TYPE_CHECKING
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from .profiler import VfsProfile
 from ..crypto.cipher import BlockDeviceCipher
 from ..logger import Logger
+from ..utils.class_property import classproperty
 from ..version import Product
 
 if TYPE_CHECKING:
-    from typing import Union, Tuple, Final
+    from typing import Dict, Final, Optional, Set, Tuple, Union
+    from cryptography.hazmat.primitives.ciphers import algorithms
+    from .profiler import DatabaseProfiler
     from ..application import CoreApplication
 
 
@@ -41,6 +53,107 @@ SQLITE_OPEN_SUBJOURNAL    = 0x00002000
 SQLITE_OPEN_SUPER_JOURNAL = 0x00004000
 SQLITE_OPEN_WAL           = 0x00080000
 
+SQLITE_IOCAP_ATOMIC = 0x00000001
+SQLITE_IOCAP_ATOMIC4K = 0x00000010
+SQLITE_IOCAP_SAFE_APPEND = 0x00000200
+SQLITE_IOCAP_SEQUENTIAL = 0x00000400
+SQLITE_IOCAP_UNDELETABLE_WHEN_OPEN = 0x00000800
+SQLITE_IOCAP_POWERSAFE_OVERWRITE = 0x00001000
+
+SQLITE_SYNC_NORMAL = 0x00002
+SQLITE_SYNC_FULL = 0x00003
+SQLITE_SYNC_DATAONLY = 0x00010
+
+
+class VfsSectorCache:
+    def __init__(self, capacity: int) -> None:
+        # capacity in bytes, files can have different sector sizes
+        self._capacity = max(0, capacity)
+        self._size = 0
+        self._lock = Lock()
+        self._sector_map: OrderedDict[Tuple[str, int], bytes] = OrderedDict()
+        # file_key -> sector indexes, for remove()
+        self._file_map: Dict[str, Set[int]] = {}
+        self._hit_count = 0
+        self._miss_count = 0
+
+    def __len__(self) -> int:
+        return len(self._sector_map)
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def hitCount(self) -> int:
+        return self._hit_count
+
+    @property
+    def missCount(self) -> int:
+        return self._miss_count
+
+    def get(self, file_key: str, sector_index: int) -> Optional[bytes]:
+        with self._lock:
+            data = self._sector_map.get((file_key, sector_index))
+            if data is None:
+                self._miss_count += 1
+            else:
+                self._hit_count += 1
+                self._sector_map.move_to_end((file_key, sector_index))
+            return data
+
+    def set(self, file_key: str, sector_index: int, data: bytes) -> None:
+        if len(data) > self._capacity:
+            return
+        with self._lock:
+            old_data = self._sector_map.pop((file_key, sector_index), None)
+            if old_data is not None:
+                self._size -= len(old_data)
+            self._sector_map[(file_key, sector_index)] = data
+            self._file_map.setdefault(file_key, set()).add(sector_index)
+            self._size += len(data)
+            while self._size > self._capacity:
+                key, old_data = self._sector_map.popitem(last=False)
+                self._size -= len(old_data)
+                self.__removeIndex(*key)
+
+    def remove(self, file_key: str, first_sector_index: int = 0) -> None:
+        with self._lock:
+            index_set = self._file_map.get(file_key)
+            if not index_set:
+                return
+            for sector_index in [
+                i for i in index_set
+                if i >= first_sector_index
+            ]:
+                self._size -= len(
+                    self._sector_map.pop((file_key, sector_index)))
+                index_set.discard(sector_index)
+            if not index_set:
+                del self._file_map[file_key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sector_map.clear()
+            self._file_map.clear()
+            self._size = 0
+
+    def resetCounters(self) -> None:
+        with self._lock:
+            self._hit_count = 0
+            self._miss_count = 0
+
+    def __removeIndex(self, file_key: str, sector_index: int) -> None:
+        index_set = self._file_map.get(file_key)
+        if index_set is not None:
+            index_set.discard(sector_index)
+            if not index_set:
+                del self._file_map[file_key]
+
 
 class VfsFile:
     _DEFAULT_OPEN_FLAGS: Final = (
@@ -49,15 +162,20 @@ class VfsFile:
             | (os.O_CLOEXEC if hasattr(os, "O_CLOEXEC") else 0)
     )
     _DEFAULT_SECTOR_SIZE: Final = 4096
+    _MIN_SECTOR_SIZE: Final = 512
 
     def __init__(
             self,
             application: CoreApplication,
             file_name: Union[str, PurePath],
             sqlite_flags: int,
-            sector_size: int = 0) -> None:
+            sector_size: int = 0,
+            *,
+            cache: Optional[VfsSectorCache] = None) -> None:
         self._application = application
         self._file_path = PurePath(file_name)
+        self._cache = cache
+        self._cache_key = str(self._file_path)
         self._logger = Logger.classLogger(
             self.__class__,
             (None, self._file_path.name))
@@ -89,6 +207,8 @@ class VfsFile:
             self._remove = False
 
         self._is_encrypted = False
+        self._is_main_db = (
+                (sqlite_flags & SQLITE_OPEN_MAIN_DB) == SQLITE_OPEN_MAIN_DB)
         self._salt = b""
         for object_flag in (
                 SQLITE_OPEN_MAIN_DB,
@@ -112,6 +232,17 @@ class VfsFile:
 
         self._sector_size = \
             self._DEFAULT_SECTOR_SIZE if not sector_size else sector_size
+        self._is_dirty = False
+
+        # resolve the key once, algorithm object is shared by all sectors
+        self._key: Optional[algorithms.AES] = None
+        if self._is_encrypted:
+            key = self._application.keyStore.deriveBlockDeviceKey()
+            if not key:
+                self._fd = -1
+                self._logger.error("Failed to open file, no encryption key.")
+                return
+            self._key = BlockDeviceCipher.createAlgorithm(key)
 
         try:
             self._logger.debug(
@@ -124,6 +255,10 @@ class VfsFile:
                 "Failed to open file. %s",
                 Logger.osErrorString(e))
 
+    @classproperty
+    def defaultSectorSize(cls) -> int:  # noqa
+        return cls._DEFAULT_SECTOR_SIZE
+
     @property
     def isEncrypted(self) -> bool:
         return self._is_encrypted
@@ -147,71 +282,135 @@ class VfsFile:
                 Logger.osErrorString(e))
         self._fd = -1
         self._salt = b""
-
-    def _ioChunks(
-            self,
-            size: int,
-            offset: int,
-            *,
-            write_mode: bool) -> Tuple[int, int]:
-        sector_offset = (offset // self._sector_size) * self._sector_size
-        chunk_offset = offset - sector_offset
-        while size > 0:
-            chunk_size = min(size, self._sector_size - chunk_offset)
-            if write_mode and chunk_size == self._sector_size:
-                # reading makes no sense...
-                sector_data = b""
+        self._key = None
+        if self._cache is not None:
+            self._cache.remove(self._cache_key)
+
+    def _pread(self, size: int, offset: int) -> bytes:
+        if hasattr(os, "pread"):
+            return os.pread(self._fd, size, offset)
+        os.lseek(self._fd, offset, os.SEEK_SET)
+        return os.read(self._fd, size)
+
+    def _pwrite(self, data: bytes, offset: int) -> None:
+        data = memoryview(data)
+        if not hasattr(os, "pwrite"):
+            os.lseek(self._fd, offset, os.SEEK_SET)
+        while len(data) > 0:
+            if hasattr(os, "pwrite"):
+                size = os.pwrite(self._fd, data, offset)
             else:
-                os.lseek(self._fd, sector_offset, os.SEEK_SET)
-                sector_data = os.read(self._fd, self._sector_size)
-            if write_mode:
-                os.lseek(self._fd, sector_offset, os.SEEK_SET)
-
-            sector_index = sector_offset // self._sector_size
-            yield sector_index, sector_data, chunk_offset, chunk_size
+                size = os.write(self._fd, data)
+            data = data[size:]
+            offset += size
 
-            size -= chunk_size
-            sector_offset += self._sector_size
-            chunk_offset = 0
-
-    def _encrypt(self, sector_index: int, data: bytes) -> bytes:
-        cipher = BlockDeviceCipher(
+    def _encrypt(self, first_sector_index: int, data: bytes) -> bytearray:
+        return BlockDeviceCipher.updateSectorList(
             BlockDeviceCipher.OpMode.ENCRYPT,
-            self._application.keyStore.deriveBlockDeviceKey(),
-            sector_index,
-            self._salt)
-        return cipher.update(data) + cipher.finalize()
-
-    def _decrypt(self, sector_index: int, data: bytes) -> bytes:
-        cipher = BlockDeviceCipher(
+            self._key,
+            first_sector_index,
+            self._salt,
+            data,
+            self._sector_size)
+
+    def _decrypt(self, first_sector_index: int, data: bytes) -> bytearray:
+        return BlockDeviceCipher.updateSectorList(
             BlockDeviceCipher.OpMode.DECRYPT,
-            self._application.keyStore.deriveBlockDeviceKey(),
-            sector_index,
-            self._salt)
-        return cipher.update(data) + cipher.finalize()
+            self._key,
+            first_sector_index,
+            self._salt,
+            data,
+            self._sector_size)
+
+    def _readSectorList(
+            self,
+            first_sector_index: int,
+            sector_count: int) -> bytearray:
+        # Returns decrypted data of the sector run, up to the first
+        # incomplete sector. Missing sectors are read with a single call.
+        sector_size = self._sector_size
+        result = bytearray(sector_count * sector_size)
+        result_view = memoryview(result)
+
+        missing_list = []
+        for i in range(sector_count):
+            sector_data = None
+            if self._cache is not None:
+                sector_data = self._cache.get(
+                    self._cache_key,
+                    first_sector_index + i)
+            if sector_data is None:
+                missing_list.append(i)
+            else:
+                result_view[i * sector_size:(i + 1) * sector_size] = \
+                    sector_data
+
+        valid_count = sector_count
+        if missing_list:
+            first, last = missing_list[0], missing_list[-1]
+            raw_data = memoryview(self._pread(
+                (last - first + 1) * sector_size,
+                (first_sector_index + first) * sector_size))
+            raw_count = len(raw_data) // sector_size
+            if first + raw_count <= last:
+                valid_count = first + raw_count
+
+            # decrypt contiguous runs of missing sectors
+            run_begin = 0
+            while run_begin < len(missing_list):
+                run_end = run_begin + 1
+                while (
+                        run_end < len(missing_list)
+                        and missing_list[run_end] < valid_count
+                        and missing_list[run_end]
+                        == missing_list[run_end - 1] + 1
+                ):
+                    run_end += 1
+                begin = missing_list[run_begin]
+                end = missing_list[run_end - 1] + 1
+                if begin >= valid_count:
+                    break
+
+                result_view[begin * sector_size:end * sector_size] = \
+                    self._decrypt(
+                        first_sector_index + begin,
+                        raw_data[
+                            (begin - first) * sector_size:
+                            (end - first) * sector_size])
+                if self._cache is not None:
+                    for i in range(begin, end):
+                        self._cache.set(
+                            self._cache_key,
+                            first_sector_index + i,
+                            bytes(result_view[
+                                i * sector_size:
+                                (i + 1) * sector_size]))
+                run_begin = run_end
+
+        result_view.release()
+        del result[valid_count * sector_size:]
+        return result
 
     def read(self, amount: int, offset: int) -> bytes:
         if not self.isValid:
             return b""
         try:
             if not self._is_encrypted:
-                os.lseek(self._fd, offset, os.SEEK_SET)
-                return os.read(self._fd, amount)
-
-            result = []
-            for sector_index, sector_data, chunk_offset, chunk_size \
-                    in self._ioChunks(amount, offset, write_mode=False):
-                if len(sector_data) != self._sector_size:
-                    break
-                sector_data = self._decrypt(sector_index, sector_data)
-                if chunk_size == self._sector_size:
-                    assert chunk_offset == 0
-                    result.append(sector_data)
-                else:
-                    sector_data = memoryview(sector_data)
-                    result.append(
-                        sector_data[chunk_offset:chunk_offset + chunk_size])
-            return b"".join(result)
+                return self._pread(amount, offset)
+            if amount <= 0:
+                return b""
+
+            first_sector_index = offset // self._sector_size
+            sector_count = (
+                    (offset + amount - 1) // self._sector_size
+                    - first_sector_index
+                    + 1
+            )
+            chunk_offset = offset - first_sector_index * self._sector_size
+            with memoryview(self._readSectorList(
+                    first_sector_index,
+                    sector_count)) as result:
+                return bytes(result[chunk_offset:chunk_offset + amount])
         except OSError as e:
             self._logger.error(
                 "Failed to read file (offset=%i, amount=%i). %s",
@@ -223,35 +422,61 @@ class VfsFile:
     def write(self, data: bytes, offset: int) -> None:
         if not self.isValid:
             return
+        self._is_dirty = True
         try:
             if not self._is_encrypted:
-                os.lseek(self._fd, offset, os.SEEK_SET)
-                os.write(self._fd, data)
+                self._pwrite(data, offset)
+                return
+            if not len(data):
                 return
 
-            data_offset = 0
-            for sector_index, sector_data, chunk_offset, chunk_size \
-                    in self._ioChunks(len(data), offset, write_mode=True):
-                if len(sector_data) == self._sector_size:
-                    sector_data = self._decrypt(sector_index, sector_data)
-                elif not len(sector_data):
-                    sector_data = b"\0" * self._sector_size
-                else:
-                    self._logger.warning(
-                        "Partial read of sector %i (offset %i), "
-                        "data was ignored.",
-                        sector_index,
-                        sector_index * self.sectorSize)
-                    sector_data = b"\0" * self._sector_size
-
-                sector_data = (
-                        sector_data[:chunk_offset]
-                        + data[data_offset:data_offset + chunk_size]
-                        + sector_data[chunk_offset + chunk_size:]
-                )
-                assert len(sector_data) == self._sector_size
-                os.write(self._fd, self._encrypt(sector_index, sector_data))
-                data_offset += chunk_size
+            sector_size = self._sector_size
+            first_sector_index = offset // sector_size
+            sector_count = (
+                    (offset + len(data) - 1) // sector_size
+                    - first_sector_index
+                    + 1
+            )
+            chunk_offset = offset - first_sector_index * sector_size
+            plain_data = bytearray(sector_count * sector_size)
+
+            # partial sectors at the edges must be merged with old data
+            edge_list = []
+            if chunk_offset:
+                edge_list.append(0)
+            if (offset + len(data)) % sector_size:
+                edge_list.append(sector_count - 1)
+            for i in sorted(set(edge_list)):
+                sector_index = first_sector_index + i
+                sector_data = self._readSectorList(sector_index, 1)
+                if len(sector_data) != sector_size:
+                    if self.file_size() > sector_index * sector_size:
+                        self._logger.warning(
+                            "Partial read of sector %i (offset %i), "
+                            "data was ignored.",
+                            sector_index,
+                            sector_index * sector_size)
+                    continue
+                plain_data[i * sector_size:(i + 1) * sector_size] = \
+                    sector_data
+            plain_data[chunk_offset:chunk_offset + len(data)] = data
+
+            try:
+                self._pwrite(
+                    self._encrypt(first_sector_index, plain_data),
+                    first_sector_index * sector_size)
+            except OSError:
+                if self._cache is not None:
+                    self._cache.remove(self._cache_key, first_sector_index)
+                raise
+            if self._cache is not None:
+                for i in range(sector_count):
+                    self._cache.set(
+                        self._cache_key,
+                        first_sector_index + i,
+                        bytes(plain_data[
+                            i * sector_size:
+                            (i + 1) * sector_size]))
         except OSError as e:
             self._logger.error(
                 "Failed to write file (offset=%i, amount=%i). %s",
@@ -262,6 +487,9 @@ class VfsFile:
     def truncate(self, size: int) -> int:
         if not self.isValid:
             return 0
+        if self._cache is not None:
+            self._cache.remove(self._cache_key, size // self._sector_size)
+        self._is_dirty = True
         try:
             os.ftruncate(self._fd, size)
         except OSError as e:
@@ -274,8 +502,24 @@ class VfsFile:
     def sync(self, flags: int) -> None:
         if not self.isValid:
             return
+        if not self._is_dirty:
+            # nothing was changed since the last sync
+            return None
         try:
-            os.fsync(self._fd)
+            if (
+                    (flags & SQLITE_SYNC_DATAONLY) == SQLITE_SYNC_DATAONLY
+                    and hasattr(os, "fdatasync")
+            ):
+                os.fdatasync(self._fd)
+            elif (
+                    (flags & 0x0f) == SQLITE_SYNC_FULL
+                    and hasattr(fcntl, "F_FULLFSYNC")
+            ):
+                # macOS: fsync() doesn't flush the drive cache
+                fcntl.fcntl(self._fd, fcntl.F_FULLFSYNC)
+            else:
+                os.fsync(self._fd)
+            self._is_dirty = False
         except OSError as e:
             self._logger.error(
                 "Failed to sync file. %s",
@@ -297,30 +541,152 @@ class VfsFile:
         return self._sector_size
 
     def device_characteristics(self) -> int:
-        return 0x00000010  # TODO SQLITE_IOCAP_ATOMIC4K
+        # Encrypted sector is rewritten completely by any write, so bytes
+        # around the written range can be damaged by a power loss. This is
+        # safe only for the main database, where the page size is equal to
+        # the sector size. Without POWERSAFE_OVERWRITE SQLite pads journal
+        # headers and WAL frames to the sector size.
+        # SAFE_APPEND, SEQUENTIAL and ATOMIC* are not guaranteed by regular
+        # file systems.
+        if not self._is_encrypted or self._is_main_db:
+            return SQLITE_IOCAP_POWERSAFE_OVERWRITE
+        return 0
+
+    def readPageSize(self) -> Optional[int]:
+        # The database header is in the first AES-XTS blocks of sector 0.
+        # XTS blocks don't depend on the following blocks, so the header can
+        # be decrypted without knowing the sector size.
+        if not self.isValid or not self._is_main_db or not self._is_encrypted:
+            return None
+        try:
+            data = self._pread(self._MIN_SECTOR_SIZE, 0)
+        except OSError as e:
+            self._logger.error(
+                "Failed to read database header. %s",
+                Logger.osErrorString(e))
+            return None
+        if len(data) != self._MIN_SECTOR_SIZE:
+            return None
+        data = BlockDeviceCipher.updateSectorList(
+            BlockDeviceCipher.OpMode.DECRYPT,
+            self._key,
+            0,
+            self._salt,
+            data,
+            self._MIN_SECTOR_SIZE)
+        if not data.startswith(b"SQLite format 3\0"):
+            return None
+        page_size = int.from_bytes(data[16:18], "big")
+        if page_size == 1:
+            page_size = 65536
+        if (
+                page_size < self._MIN_SECTOR_SIZE
+                or page_size > 65536
+                or page_size & (page_size - 1)
+        ):
+            return None
+        return page_size
 
 
 class Vfs:
-    def __init__(self, application: CoreApplication) -> None:
+    _DEFAULT_CACHE_SIZE: Final = 8 * 1024 * 1024
+
+    _SUFFIX_LIST: Final = ("-journal", "-wal")
+
+    def __init__(
+            self,
+            application: CoreApplication,
+            *,
+            cache_size: int = _DEFAULT_CACHE_SIZE,
+            sector_size: int = VfsFile.defaultSectorSize,
+            profiler: Optional[DatabaseProfiler] = None) -> None:
         self._application = application
+        self._profiler = profiler
+        self._cache = VfsSectorCache(cache_size)
+        self._sector_size = sector_size
+        self._sector_size_map: Dict[str, int] = {}
+
+    @property
+    def cache(self) -> VfsSectorCache:
+        return self._cache
+
+    @property
+    def sectorSize(self) -> int:
+        return self._sector_size
 
     def open(self, file_name: str, sqlite_flags: int) -> VfsFile:
-        return VfsFile(self._application, file_name, sqlite_flags)
+        if (sqlite_flags & SQLITE_OPEN_MAIN_DB) == SQLITE_OPEN_MAIN_DB:
+            vfs_file = self._open(file_name, sqlite_flags, self._sector_size)
+            # existing database keeps the sector size until migration
+            page_size = vfs_file.readPageSize()
+            if page_size and page_size != vfs_file.sectorSize:
+                vfs_file.close()
+                vfs_file = self._open(file_name, sqlite_flags, page_size)
+            self._sector_size_map[file_name] = vfs_file.sectorSize
+            return vfs_file
+
+        # journals use the sector size of the database
+        sector_size = self._sector_size
+        for suffix in self._SUFFIX_LIST:
+            if file_name.endswith(suffix):
+                sector_size = self._sector_size_map.get(
+                    file_name[:-len(suffix)],
+                    sector_size)
+                break
+        return self._open(file_name, sqlite_flags, sector_size)
+
+    def _open(
+            self,
+            file_name: str,
+            sqlite_flags: int,
+            sector_size: int) -> VfsFile:
+        return VfsFile(
+            self._application,
+            file_name,
+            sqlite_flags,
+            sector_size,
+            cache=self._cache)
 
     def close(self, vfs_file: VfsFile) -> None:
         vfs_file.close()
 
     def read(self, vfs_file: VfsFile, length: int, offset: int) -> Union[bytes, bool]:
-        return vfs_file.read(length, offset)
+        if self._profiler is None:
+            return vfs_file.read(length, offset)
+        timeframe = time.monotonic_ns()
+        try:
+            return vfs_file.read(length, offset)
+        finally:
+            self._profiler.appendVfsOperation(
+                VfsProfile.Operation.READ,
+                time.monotonic_ns() - timeframe,
+                length)
 
     def write(self, vfs_file: VfsFile, data: bytes, offset: int) -> None:
-        return vfs_file.write(data, offset)
+        if self._profiler is None:
+            return vfs_file.write(data, offset)
+        timeframe = time.monotonic_ns()
+        try:
+            return vfs_file.write(data, offset)
+        finally:
+            self._profiler.appendVfsOperation(
+                VfsProfile.Operation.WRITE,
+                time.monotonic_ns() - timeframe,
+                len(data))
 
     def truncate(self, vfs_file: VfsFile, size: int) -> int:
         return vfs_file.truncate(size)
 
     def sync(self, vfs_file: VfsFile, flags: int) -> None:
-        return vfs_file.sync(flags)
+        if self._profiler is None:
+            return vfs_file.sync(flags)
+        timeframe = time.monotonic_ns()
+        try:
+            return vfs_file.sync(flags)
+        finally:
+            self._profiler.appendVfsOperation(
+                VfsProfile.Operation.SYNC,
+                time.monotonic_ns() - timeframe)
 
     def file_size(self, vfs_file: VfsFile) -> int:
         return vfs_file.file_size()
@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+from functools import partial
+from typing import TYPE_CHECKING
+
+from PySide6.QtCore import QBasicTimer, QObject
+
+from .tables import (
+    AddressListTable,
+    CoinListTable,
+    TxListTable,
+    UtxoListTable)
+from ..logger import Logger
+from ..version import Timer
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from typing import Any, Dict, Final, List, Optional, Tuple
+    from PySide6.QtCore import QTimerEvent
+    from . import Cursor, Database
+    from ..coins.abstract import Coin
+    from ..utils.serialize import DeserializedDict, Serializable
+    _PendingList = Tuple[
+        List[_Snapshot],
+        List[_Snapshot],
+        List[Tuple[_Snapshot, List[_Snapshot]]],
+        List[_Snapshot]]
+
+
+class _Snapshot:
+    """Serialized copy of the object with the attributes used by the tables,
+    safe to pass to the database thread. The row id is written back to the
+    object by apply(), in the thread of the queue. Until then a new snapshot
+    of the same object takes the row id from the previous one, that was
+    written by the preceding job of the database thread."""
+
+    __slots__ = (
+        "_source",
+        "_data",
+        "_options",
+        "_attribute_map",
+        "_previous",
+        "_row_id")
+
+    def __init__(
+            self,
+            source: Serializable,
+            attribute_map: Dict[str, Any],
+            previous: Optional[_Snapshot] = None,
+            **options) -> None:
+        self._source = source
+        self._data = source.serialize(exclude_subclasses=True, **options)
+        self._options = options
+        self._attribute_map = attribute_map
+        self._row_id = source.rowId
+        self._previous = previous if self._row_id <= 0 else None
+
+    @property
+    def source(self) -> Serializable:
+        return self._source
+
+    @property
+    def rowId(self) -> int:
+        if self._row_id <= 0 and self._previous is not None:
+            return self._previous.rowId
+        return self._row_id
+
+    @rowId.setter
+    def rowId(self, value: int) -> None:
+        self._row_id = value
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self._attribute_map[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def serialize(
+            self,
+            *,
+            exclude_subclasses: bool = False,
+            **options) -> DeserializedDict:
+        assert exclude_subclasses and options == self._options
+        return self._data
+
+    def apply(self) -> None:
+        row_id = self.rowId
+        if row_id > 0:
+            self._source.rowId = row_id
+
+
+class DatabaseWriteQueue(QObject):
+    _FLUSH_LIMIT: Final = 1000
+
+    def __init__(
+            self,
+            database: Database,
+            *,
+            delay: int = Timer.DATABASE_WRITE_DELAY,
+            flush_limit: int = _FLUSH_LIMIT,
+            checkpoint_delay: int = Timer.DATABASE_CHECKPOINT_DELAY) -> None:
+        super().__init__()
+        self._logger = Logger.classLogger(self.__class__)
+        self._database = database
+        self._timer = QBasicTimer()
+        self._delay = delay
+        self._flush_limit = flush_limit
+        self._checkpoint_timer = QBasicTimer()
+        self._checkpoint_delay = checkpoint_delay
+        self._is_suspended = False
+
+        # dict keeps the insertion order, id() removes duplicates
+        self._coin_map: Dict[int, Coin] = {}
+        self._address_map: Dict[int, Coin.Address] = {}
+        self._tx_map: Dict[int, Tuple[Coin.Tx, List[Coin.Address]]] = {}
+        self._utxo_map: Dict[int, Coin.Address] = {}
+        # id(source) -> the latest snapshot submitted to the database thread
+        self._in_flight_map: Dict[int, _Snapshot] = {}
+
+    def __len__(self) -> int:
+        return (
+                len(self._coin_map)
+                + len(self._address_map)
+                + len(self._tx_map)
+                + len(self._utxo_map)
+        )
+
+    @property
+    def isEmpty(self) -> bool:
+        return len(self) == 0
+
+    @property
+    def isSuspended(self) -> bool:
+        return self._is_suspended
+
+    def suspend(self) -> None:
+        # objects are collected, but not written until resume()
+        self._timer.stop()
+        self._is_suspended = True
+
+    def resume(self) -> None:
+        if self._is_suspended:
+            self._is_suspended = False
+            if not self.isEmpty:
+                self._onAppend()
+
+    def appendCoin(self, coin: Coin) -> None:
+        self._coin_map[id(coin)] = coin
+        self._onAppend()
+
+    def appendAddress(self, address: Coin.Address) -> None:
+        self._address_map[id(address)] = address
+        self._onAppend()
+
+    def appendTx(
+            self,
+            tx: Coin.Tx,
+            address: Optional[Coin.Address] = None) -> None:
+        _, address_list = self._tx_map.setdefault(id(tx), (tx, []))
+        if address is not None and address not in address_list:
+            address_list.append(address)
+        self._onAppend()
+
+    def appendUtxoList(self, address: Coin.Address) -> None:
+        self._utxo_map[id(address)] = address
+        self._onAppend()
+
+    def clear(self) -> None:
+        self._timer.stop()
+        self._checkpoint_timer.stop()
+        self._clearPending()
+
+    def flush(self) -> bool:
+        self._timer.stop()
+        if self.isEmpty:
+            return True
+        if self._is_suspended:
+            return False
+        if not self._database.isOpen:
+            self._logger.debug(
+                "Database is not open, %i pending object(s) dropped.",
+                len(self))
+            self.clear()
+            return False
+
+        pending_list, snapshot_list = self._pendingList()
+        executor = self._database.executor
+        if executor.isRunning:
+            # snapshots are written by the database thread
+            for snapshot in snapshot_list:
+                self._in_flight_map[id(snapshot.source)] = snapshot
+            executor.submitTransaction(
+                self._write,
+                pending_list,
+                callback=partial(self._onWriteFinished, snapshot_list))
+            self._clearPending()
+            return True
+
+        try:
+            with self._database.transaction() as cursor:
+                self._write(cursor, pending_list)
+        except self._database.TransactionInEffectError:
+            # try again later, objects are still pending
+            self._timer.start(self._delay, self)
+            return False
+        except (
+                self._database.engine.Error,
+                self._database.engine.Warning
+        ) as e:
+            self._logger.error(
+                "Failed to write %i pending object(s): %s",
+                len(self),
+                str(e))
+            self._clearPending()
+            return False
+
+        for snapshot in snapshot_list:
+            snapshot.apply()
+        self._clearPending()
+        self._startCheckpointTimer()
+        return True
+
+    def timerEvent(self, event: QTimerEvent) -> None:
+        if event.timerId() == self._checkpoint_timer.timerId():
+            self._checkpoint_timer.stop()
+            if self._database.isOpen and self.isEmpty:
+                self._database.executor.submit(self._database.checkpoint)
+        else:
+            assert event.timerId() == self._timer.timerId()
+            self.flush()
+
+    def _onAppend(self) -> None:
+        if self._is_suspended:
+            return
+        if len(self) >= self._flush_limit:
+            self.flush()
+        elif not self._timer.isActive():
+            self._timer.start(self._delay, self)
+
+    def _onWriteFinished(
+            self,
+            snapshot_list: List[_Snapshot],
+            future: Future) -> None:
+        for snapshot in snapshot_list:
+            key = id(snapshot.source)
+            if self._in_flight_map.get(key) is snapshot:
+                del self._in_flight_map[key]
+        e = future.exception()
+        if e is not None:
+            self._logger.error(
+                "Failed to write pending objects: %s",
+                str(e))
+        else:
+            for snapshot in snapshot_list:
+                snapshot.apply()
+            self._startCheckpointTimer()
+
+    def _startCheckpointTimer(self) -> None:
+        # checkpoint WAL when writes are calmed down
+        if not self._checkpoint_timer.isActive():
+            self._checkpoint_timer.start(self._checkpoint_delay, self)
+
+    def _clearPending(self) -> None:
+        self._coin_map.clear()
+        self._address_map.clear()
+        self._tx_map.clear()
+        self._utxo_map.clear()
+
+    def _pendingList(self) -> Tuple[_PendingList, List[_Snapshot]]:
+        # objects are owned by the thread of the queue, the database thread
+        # receives snapshots only
+        snapshot_map: Dict[int, _Snapshot] = {}
+
+        def snapshot(
+                source: Serializable,
+                attribute_map: Dict[str, Any],
+                **options) -> _Snapshot:
+            value = snapshot_map[id(source)] = _Snapshot(
+                source,
+                attribute_map,
+                self._in_flight_map.get(id(source)),
+                **options)
+            return value
+
+        def coin(source: Coin) -> _Snapshot:
+            if id(source) in snapshot_map:
+                return snapshot_map[id(source)]
+            return snapshot(source, {"name": source.name})
+
+        def address(source: Coin.Address) -> _Snapshot:
+            if id(source) in snapshot_map:
+                return snapshot_map[id(source)]
+            if id(source) in self._utxo_map:
+                utxo_list = [
+                    snapshot(u, {"name": u.name, "index": u.index})
+                    for u in source.utxoList]
+            else:
+                utxo_list = None
+            # options of AddressListTable.serialize()
+            return snapshot(
+                source,
+                {
+                    "name": source.name,
+                    "coin": coin(source.coin),
+                    "isNullData": source.isNullData,
+                    "utxoList": utxo_list
+                },
+                allow_hd_path=True)
+
+        def tx(source: Coin.Tx) -> _Snapshot:
+            if id(source) in snapshot_map:
+                return snapshot_map[id(source)]
+            io_list = [
+                [
+                    snapshot(
+                        io,
+                        {"addressName": io.addressName, "index": io.index})
+                    for io in tx_io_list]
+                for tx_io_list in (source.inputList, source.outputList)]
+            return snapshot(
+                source,
+                {
+                    "name": source.name,
+                    "coin": coin(source.coin),
+                    "inputList": io_list[0],
+                    "outputList": io_list[1]
+                })
+
+        pending_list = (
+            [coin(c) for c in self._coin_map.values()],
+            [address(a) for a in self._address_map.values()],
+            [
+                (tx(t), [address(a) for a in address_list])
+                for t, address_list in self._tx_map.values()],
+            [address(a) for a in self._utxo_map.values()]
+        )
+        return pending_list, list(snapshot_map.values())
+
+    def _write(self, cursor: Cursor, pending_list: _PendingList) -> None:
+        coin_list, address_list, tx_list, utxo_list = pending_list
+        for coin in coin_list:
+            self._database[CoinListTable].serialize(cursor, coin)
+        for address in address_list:
+            self._database[AddressListTable].serialize(cursor, address)
+
+        tx_list_map: Dict[int, Tuple[Optional[Coin.Address], List]] = {}
+        for tx, tx_address_list in tx_list:
+            for address in tx_address_list or (None, ):
+                tx_list_map.setdefault(
+                    id(address),
+                    (address, []))[1].append(tx)
+        for address, address_tx_list in tx_list_map.values():
+            self._database[TxListTable].serializeAll(
+                cursor,
+                address,
+                address_tx_list)
+
+        for address in utxo_list:
+            self._database[UtxoListTable].serializeAll(cursor, address)
@@ -300,6 +300,11 @@ class AddressInfoApiQuery(AbstractApiQuery):
             name_key_tuple = CoinUtils.addressToNameKeyTuple(address)
         super().__init__(name_key_tuple=name_key_tuple)
         self._address = address
+        self._is_utxo_list_changed = False
+
+    @property
+    def isUtxoListChanged(self) -> bool:
+        return self._is_utxo_list_changed
 
     def isEqualQuery(self, other: AddressInfoApiQuery) -> bool:
         return (
@@ -318,6 +323,10 @@ class AddressInfoApiQuery(AbstractApiQuery):
 
         parser = AddressInfoParser()
         parser(value)
+        self._is_utxo_list_changed = (
+                parser.balance != sum(u.amount for u in self._address.utxoList)
+                or parser.txCount != self._address.txCount
+        )
         self._address.balance = parser.balance
         self._address.txCount = parser.txCount
 
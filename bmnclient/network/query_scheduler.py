@@ -239,8 +239,18 @@ class NetworkQueryScheduler:
             if address not in queue:
                 queue.append(address)
         else:
-            self._putQuery(AddressInfoApiQuery(address))
-            # TODO run if balance
+            query = AddressInfoApiQuery(address)
+            query.appendFinishedCallback(
+                lambda q: self.__updateCoinAddressUtxoList(q, address))
+            self._putQuery(query)
+
+    def __updateCoinAddressUtxoList(
+            self,
+            query: AddressInfoApiQuery,
+            address: Coin.Address) -> None:
+        # UTXO list is loaded from the database, download it only if the
+        # address was changed
+        if query.isUtxoListChanged:
             self._putQuery(AddressUtxoIteratorApiQuery(address))
 
     def __pendingUpdateCoinAddress(
@@ -28,6 +28,21 @@ class DebugModel(QObject):
         for coin in self._application.coinList:
             coin.height += value
 
+    @QProperty(bool, constant=True)
+    def isDatabaseProfileEnabled(self) -> bool:
+        return self._application.database.profiler is not None
+
+    @QSlot(result=str)
+    def databaseProfileReport(self) -> str:
+        profiler = self._application.database.profiler
+        return profiler.report() if profiler is not None else ""
+
+    @QSlot()
+    def resetDatabaseProfile(self) -> None:
+        profiler = self._application.database.profiler
+        if profiler is not None:
+            profiler.reset()
+
     @QSlot(int)
     def kill(self, signal: int) -> None:
         os.kill(os.getpid(), signal)
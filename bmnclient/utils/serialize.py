@@ -6,10 +6,13 @@ from .class_property import classproperty
 from .string import StringUtils
 
 if TYPE_CHECKING:
-    from typing import Any, Dict, List, Optional
+    from typing import Any, Callable, Dict, List, Optional, Tuple
     DeserializedData = Optional[str, int, List, Dict]
     DeserializedDict = Dict[str, DeserializedData]
 
+# values returned as is by _serializeProperty() and _deserializeProperty()
+_SCALAR_TYPES = frozenset((int, str, type(None)))
+
 
 class DeserializationNotSupportedError(Exception):
     def __init__(self) -> None:
@@ -23,6 +26,8 @@ def serializable(func: property) -> property:
 
 
 class Serializable:
+    __slots__ = ("__row_id", )
+
     __serialize_map = None
 
     def __init__(self, *args, row_id: int = -1, **kwargs) -> None:
@@ -33,13 +38,13 @@ class Serializable:
         if row_id is not None:
             self.rowId = row_id
 
-        serialize_map = self.serializeMap
+        property_map = self.__propertyMap()
         for (key, value) in kwargs.items():
             key = self.__keyFromKwarg(key)
-            if key not in serialize_map:
+            v = property_map.get(key)
+            if v is None:
                 raise KeyError(
                     "unknown property '{}' to deserialization".format(key))
-            v = getattr(self.__class__, serialize_map[key])
             if v.fset:
                 v.fset(self, value)
             elif v.fget(self) != value:
@@ -73,14 +78,40 @@ class Serializable:
             *,
             exclude_subclasses: bool = False,
             **options) -> DeserializedDict:
-        result = {}
-        for (key, name) in self.serializeMap.items():
-            result[key] = self._serializeProperty(
-                key,
-                getattr(self, name),
-                exclude_subclasses=exclude_subclasses,
-                **options)
-        return result
+        return self.__serializer()(self, exclude_subclasses, options)
+
+    @classmethod
+    def __serializer(cls) -> Callable[[Serializable, bool, dict], dict]:
+        serializer = cls.__dict__.get("_Serializable__serializer_cache")
+        if serializer is not None:
+            return serializer
+
+        property_map = cls.__propertyMap()
+        field_list = tuple(
+            (key, property_map[key].fget)
+            for key in cls.serializeMap
+        )
+        custom = cls.__isOverridden("_serializeProperty")
+        scalar_types = _SCALAR_TYPES
+
+        def serializer(
+                self: Serializable,
+                exclude_subclasses: bool,
+                options: dict) -> DeserializedDict:
+            result = {}
+            for key, fget in field_list:
+                value = fget(self)
+                if custom or type(value) not in scalar_types:
+                    value = self._serializeProperty(
+                        key,
+                        value,
+                        exclude_subclasses=exclude_subclasses,
+                        **options)
+                result[key] = value
+            return result
+
+        cls.__serializer_cache = serializer
+        return serializer
 
     def _serializeProperty(
             self,
@@ -108,24 +139,74 @@ class Serializable:
             source_data: DeserializedDict,
             *args,
             **options) -> Optional[Serializable]:
-        kwargs = {
-            cls.__keyToKwarg(key):
-                cls._deserializeProperty(None, key, value, *args, **options)
-            for key, value in source_data.items()
-        }
+        kwargs = cls.__deserializer()(None, source_data, args, options)
         return cls(*args, **kwargs)
 
     def deserializeUpdate(
             self,
             source_data: DeserializedDict,
             **options) -> bool:
-        kwargs = {
-            self.__keyToKwarg(key):
-                self._deserializeProperty(self, key, value, **options)
-            for key, value in source_data.items()
-        }
+        kwargs = self.__deserializer()(self, source_data, tuple(), options)
         return self.__update__(**kwargs)
 
+    @classmethod
+    def __deserializer(cls) -> Callable[
+            [Optional[Serializable], DeserializedDict, tuple, dict],
+            Dict[str, Any]]:
+        deserializer = cls.__dict__.get("_Serializable__deserializer_cache")
+        if deserializer is not None:
+            return deserializer
+
+        custom = cls.__isOverridden("_deserializeProperty")
+        # source key: kwarg name, filled on first use
+        key_map: Dict[str, str] = {}
+        scalar_types = _SCALAR_TYPES
+
+        def deserializer(
+                self: Optional[Serializable],
+                source_data: DeserializedDict,
+                args: tuple,
+                options: dict) -> Dict[str, Any]:
+            kwargs = {}
+            for key, value in source_data.items():
+                kwarg = key_map.get(key)
+                if kwarg is None:
+                    kwarg = key_map[key] = cls.__keyToKwarg(key)
+                if custom or type(value) not in scalar_types:
+                    value = cls._deserializeProperty(
+                        self,
+                        key,
+                        value,
+                        *args,
+                        **options)
+                kwargs[kwarg] = value
+            return kwargs
+
+        cls.__deserializer_cache = deserializer
+        return deserializer
+
+    @classmethod
+    def __propertyMap(cls) -> Dict[str, property]:
+        property_map = cls.__dict__.get("_Serializable__property_map_cache")
+        if property_map is None:
+            property_map = {
+                key: getattr(cls, name)
+                for key, name in cls.serializeMap.items()
+            }
+            cls.__property_map_cache = property_map
+        return property_map
+
+    @classmethod
+    def __isOverridden(cls, method_name: str) -> bool:
+        """Values of the class with the overridden method always go through
+        the method, others only if they are not int/str/None."""
+        for type_ in cls.__mro__:
+            if type_ is Serializable:
+                return False
+            if method_name in type_.__dict__:
+                return True
+        return False
+
     @classmethod
     def _deserializeProperty(
             cls,
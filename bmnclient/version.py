@@ -56,6 +56,8 @@ class Timer:
     UPDATE_COINS_INFO_DELAY: Final = 20 * 1000
     UPDATE_COIN_HD_ADDRESS_LIST_DELAY: Final = 30 * 60 * 1000
     UPDATE_COIN_MEMPOOL_DELAY: Final = 15 * 1000
+    DATABASE_WRITE_DELAY: Final = 1 * 1000
+    DATABASE_CHECKPOINT_DELAY: Final = 30 * 1000
 
 
 class Server:
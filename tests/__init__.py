@@ -7,6 +7,7 @@ import time
 from pathlib import Path
 from tempfile import gettempdir
 from typing import TYPE_CHECKING
+from unittest import skipUnless
 
 from PySide6.QtWidgets import QApplication
 
@@ -17,12 +18,20 @@ from bmnclient.utils.class_property import classproperty
 from bmnclient.version import Product, Timer
 
 if TYPE_CHECKING:
-    from typing import Final, Optional
+    from typing import Callable, Final, Optional
     MessageType = CoreApplication.MessageType
 
 Debug.setState(True)
 
 
+def benchmark(function: Callable) -> Callable:
+    """Timing tests only log the results, they are skipped unless
+    BMN_BENCHMARK is set."""
+    return skipUnless(
+        os.environ.get("BMN_BENCHMARK"),
+        "set BMN_BENCHMARK=1 to run benchmarks")(function)
+
+
 class TestApplication(CoreApplication):
     _DATA_PATH: Final = Path(__file__).parent.resolve() / "data"
     _logger_configured = False
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import time
+import tracemalloc
+from itertools import chain
 from os import urandom
 from random import randint, shuffle
 from typing import TYPE_CHECKING
@@ -9,12 +12,22 @@ from bmnclient.coins.coin_bitcoin import Bitcoin, BitcoinTest
 from bmnclient.coins.coin_litecoin import Litecoin
 from bmnclient.coins.hd import HdNode
 from bmnclient.coins.list import CoinList
+from bmnclient.coins.utxo_selection import (
+    AbstractUtxoSelection,
+    BranchAndBoundUtxoSelection,
+    KnapsackUtxoSelection,
+    LargestFirstUtxoSelection,
+    UtxoArray)
+from bmnclient.crypto.secp256k1 import PublicKey
 from bmnclient.language import Locale
+from bmnclient.network.api_v1.query import CoinMempoolIteratorApiQuery
+from tests import TestApplication, benchmark
 
 if TYPE_CHECKING:
-    from typing import List, Optional, Sequence, Type
+    from typing import Callable, List, Optional, Sequence, Tuple, Type
     from bmnclient.coins.abstract import Coin
 
+_logger = TestApplication.getLogger(__name__)
 
 BITCOIN_ADDRESS_LIST = (
     (
@@ -350,6 +363,46 @@ class TestCoins(TestCase):
             "0",
             b.toString(-9223372036854775809))
 
+    def test_balance(self) -> None:
+        coin = fillCoin(self, Bitcoin(), address_count=4, tx_count=0)
+        for i in range(4):
+            self.assertTrue(coin.appendAddress(coin.Address(
+                coin,
+                name="bc1qreadonly" + str(i),
+                type_=coin.Address.Type.WITNESS_V0_KEY_HASH,
+                balance=1000 + i)))
+
+        def check() -> None:
+            self.assertEqual(
+                sum(a.balance for a in coin.addressList if not a.isReadOnly),
+                coin.balance)
+            self.assertEqual(
+                sum(a.balance for a in coin.addressList if a.isReadOnly),
+                coin.readOnlyBalance)
+
+        check()
+        self.assertEqual(1000 + 1001 + 1002 + 1003, coin.readOnlyBalance)
+
+        for address in coin.addressList:
+            address.balance += randint(-1000, 1000)
+            check()
+
+        # not in the coin
+        address = coin.deriveHdAddress(account=0, is_change=False)
+        self.assertIsNotNone(address)
+        balance = coin.balance
+        address.balance = 5000
+        self.assertEqual(balance, coin.balance)
+        self.assertTrue(coin.appendAddress(address))
+        self.assertEqual(balance + 5000, coin.balance)
+        check()
+
+        # private key removed
+        address.key = None
+        self.assertTrue(address.isReadOnly)
+        self.assertEqual(balance, coin.balance)
+        check()
+
     def test_mempool_address_lists(self) -> None:
         for limit in range(201):
             coin = Bitcoin()
@@ -479,6 +532,179 @@ class TestCoins(TestCase):
         for coin in CoinList():
             self._test_serialization(coin.__class__)
 
+    @benchmark
+    def test_serialization_benchmark(self) -> None:
+        coin = fillCoin(self, Bitcoin(), address_count=2, tx_count=500)
+        tx_list = [t for a in coin.addressList for t in a.txList]
+        object_count = sum(
+            1 + len(t.inputList) + len(t.outputList) for t in tx_list)
+        coin.Tx.deserialize(tx_list[0].serialize(), coin)  # warm up
+
+        timeframe = time.monotonic_ns()
+        data_list = [t.serialize() for t in tx_list]
+        timeframe = time.monotonic_ns() - timeframe
+        _logger.info(
+            "Tx serialization: ~{:.2f} objects per second."
+            .format(object_count * 1e+9 / timeframe))
+
+        timeframe = time.monotonic_ns()
+        new_tx_list = [coin.Tx.deserialize(d, coin) for d in data_list]
+        timeframe = time.monotonic_ns() - timeframe
+        _logger.info(
+            "Tx deserialization: ~{:.2f} objects per second."
+            .format(object_count * 1e+9 / timeframe))
+
+        self.assertEqual(
+            data_list,
+            [t.serialize() for t in new_tx_list])
+
+    def test_address_lookup(self) -> None:
+        self._test_address_lookup(1000, 100)
+
+    @benchmark
+    def test_address_lookup_benchmark(self) -> None:
+        self._test_address_lookup(50000, 1000)
+
+    def _test_address_lookup(self, address_count: int, tx_count: int) -> None:
+        coin = Bitcoin()
+        name_list = ["bc1q{:038x}".format(i) for i in range(address_count)]
+        address_list = [
+            coin.Address(
+                coin,
+                name=name,
+                type_=coin.Address.Type.WITNESS_V0_KEY_HASH)
+            for name in name_list
+        ]
+
+        timeframe = time.monotonic_ns()
+        for address in address_list:
+            self.assertTrue(coin.appendAddress(address))
+        timeframe = time.monotonic_ns() - timeframe
+        _logger.info(
+            "Address appending: ~{:.2f} addresses per second."
+            .format(address_count * 1e+9 / timeframe))
+
+        self.assertEqual(address_count, len(coin.addressList))
+        self.assertFalse(coin.appendAddress(address_list[0]))
+        self.assertIs(
+            address_list[1],
+            coin.findAddressByName(" " + name_list[1].upper() + " "))
+        self.assertIsNone(coin.findAddressByName("bc1qunknown"))
+
+        # every mempool tx touches 2 wallet and 2 foreign addresses
+        tx_list = [
+            coin.Tx(
+                coin,
+                name="{:064x}".format(i),
+                amount=1000,
+                fee_amount=10,
+                is_coinbase=False,
+                input_list=[
+                    coin.Tx.Io(
+                        coin,
+                        address_list[randint(0, address_count // 2 - 1)],
+                        index=0,
+                        output_type="p2wpkh",
+                        address_name=None,
+                        amount=1010),
+                    coin.Tx.Io(
+                        coin,
+                        index=1,
+                        output_type="p2wpkh",
+                        address_name="bc1qforeign{}i".format(i),
+                        amount=1000)
+                ],
+                output_list=[
+                    coin.Tx.Io(
+                        coin,
+                        address_list[randint(address_count // 2, address_count - 1)],
+                        index=0,
+                        output_type="p2wpkh",
+                        address_name=None,
+                        amount=1000),
+                    coin.Tx.Io(
+                        coin,
+                        index=1,
+                        output_type="p2wpkh",
+                        address_name="bc1qforeign{}o".format(i),
+                        amount=1000)
+                ]).serialize()
+            for i in range(tx_count)
+        ]
+        query = CoinMempoolIteratorApiQuery(coin, _address_list=[])
+
+        timeframe = time.monotonic_ns()
+        for tx in tx_list:
+            query._processTx(tx)  # noqa
+        timeframe = time.monotonic_ns() - timeframe
+        _logger.info(
+            "Mempool processing: ~{:.2f} transactions per second."
+            .format(tx_count * 1e+9 / timeframe))
+
+        self.assertEqual(
+            tx_count * 2,
+            sum(len(a.txList) for a in coin.addressList))
+
+    def test_object_size(self) -> None:
+        coin = fillCoin(self, Bitcoin(), address_count=1, tx_count=1)
+        address = coin.addressList[0]
+        count = 1000
+        name_list = ["{:064x}".format(i) for i in range(count)]
+
+        def measure(object_name: str, factory: Callable, limit: int) -> None:
+            tracemalloc.start()
+            try:
+                size = tracemalloc.get_traced_memory()[0]
+                object_list = [factory(i) for i in range(count)]
+                size = tracemalloc.get_traced_memory()[0] - size
+            finally:
+                tracemalloc.stop()
+            self.assertFalse(hasattr(object_list[0], "__dict__"))
+            _logger.info(
+                "{} size: ~{:.2f} bytes per object."
+                .format(object_name, size / count))
+            self.assertLessEqual(size / count, limit)
+
+        measure(
+            "Tx.Io",
+            lambda i: coin.Tx.Io(
+                coin,
+                address,
+                index=i,
+                output_type="p2wpkh",
+                address_name=None,
+                amount=i),
+            160)
+        measure(
+            "Tx.Utxo",
+            lambda i: coin.Tx.Utxo(
+                coin,
+                name=name_list[i],
+                height=i,
+                index=i,
+                amount=i),
+            176)
+        measure(
+            "Tx",
+            lambda i: coin.Tx(
+                coin,
+                name=name_list[i],
+                height=i,
+                time=i,
+                amount=i,
+                fee_amount=i,
+                is_coinbase=False,
+                input_list=[],
+                output_list=[]),
+            656)
+        measure(
+            "Address",
+            lambda i: coin.Address(
+                coin,
+                name=name_list[i],
+                type_=coin.Address.Type.WITNESS_V0_KEY_HASH),
+            448)
+
 
 class TestTxFactory(TestCase):
     def setUp(self) -> None:
@@ -501,6 +727,18 @@ class TestTxFactory(TestCase):
                 amount=amount_list[i]))
         address.utxoList = utxo_list
 
+    def _findUtxoList(
+            self,
+            utxo_list: Sequence[Bitcoin.Tx.Utxo],
+            target_amount: int,
+            **kwargs) -> Tuple[List[Bitcoin.Tx.Utxo], int]:
+        # noinspection PyProtectedMember
+        return self._coin.TxFactory._findUtxoList(
+            utxo_list,
+            target_amount,
+            selection_list=self._coin.utxoSelectionList,
+            **kwargs)
+
     @classmethod
     def _isLowHeightUtxo(
             cls,
@@ -513,6 +751,107 @@ class TestTxFactory(TestCase):
                     result = True
         return result
 
+    def test_utxo_set(self) -> None:
+        utxo_set = self._coin.utxoSet
+        txf = self._coin.txFactory
+        address1 = self._coin.deriveHdAddress(account=0, is_change=False)
+        self.assertIsNotNone(address1)
+        address2 = self._coin.deriveHdAddress(
+            account=0,
+            is_change=False,
+            index=1)
+        self.assertIsNotNone(address2)
+
+        # not in the coin
+        self._createUtxoList(address1, [100000, 200000, 300000])
+        self.assertEqual(0, len(utxo_set))
+        self.assertEqual(0, txf.availableAmount)
+
+        self.assertTrue(self._coin.appendAddress(address1))
+        self.assertEqual(3, len(utxo_set))
+        self.assertEqual(600000, utxo_set.amount)
+        self.assertEqual(600000, txf.availableAmount)
+        self.assertEqual([address1], utxo_set.addressList)
+        self.assertIs(
+            address1.utxoList[1],
+            utxo_set.get(address1.utxoList[1].name, 0))
+
+        # same outpoints
+        version = utxo_set.version
+        self._createUtxoList(address1, [100000, 200000, 300000])
+        self.assertEqual(version, utxo_set.version)
+
+        # one spent, one received
+        spent_utxo = address1.utxoList[0]
+        utxo_list = address1.utxoList[1:] + [self._coin.Tx.Utxo(
+            self._coin,
+            name="ff" * 32,
+            height=200,
+            index=1,
+            amount=400000)]
+        address1.utxoList = utxo_list
+        self.assertLess(version, utxo_set.version)
+        self.assertEqual(3, len(utxo_set))
+        self.assertNotIn((spent_utxo.name, 0), utxo_set)
+        self.assertIn(("ff" * 32, 1), utxo_set)
+        self.assertEqual(900000, utxo_set.amount)
+        self.assertEqual(900000, txf.availableAmount)
+
+        self.assertTrue(self._coin.appendAddress(address2))
+        address2.utxoList = [self._coin.Tx.Utxo(
+            self._coin,
+            name="ee" * 32,
+            height=300,
+            index=0,
+            amount=50000)]
+        self.assertEqual(950000, utxo_set.amount)
+        self.assertEqual(950000, txf.availableAmount)
+
+        self.assertTrue(txf.setInputAddressName(address2.name))
+        self.assertEqual(50000, txf.availableAmount)
+        self.assertTrue(txf.setInputAddressName(None))
+        self.assertEqual(950000, txf.availableAmount)
+
+        # selection is updated by the first reader
+        txf.receiverAmount = 250000
+        # noinspection PyProtectedMember
+        self.assertIsNone(txf._selected_utxo_data)
+        txf.setReceiverAddressName(address2.name)
+        # noinspection PyProtectedMember
+        self.assertIsNone(txf._selected_utxo_data)
+        self.assertLess(0, txf.estimatedVirtualSize)
+        # noinspection PyProtectedMember
+        self.assertIsNotNone(txf._selected_utxo_data)
+
+        # same outpoints in other order, the selection is kept
+        # noinspection PyProtectedMember
+        selected_utxo_data = txf._selected_utxo_data
+        version = utxo_set.version
+        address1.utxoList = list(reversed(address1.utxoList))
+        self.assertEqual(version, utxo_set.version)
+        # noinspection PyProtectedMember
+        self.assertIs(selected_utxo_data, txf._selected_utxo_data)
+
+        # confirmed outpoint
+        address2.utxoList = [self._coin.Tx.Utxo(
+            self._coin,
+            name="ee" * 32,
+            height=301,
+            index=0,
+            amount=50000)]
+        self.assertLess(version, utxo_set.version)
+        self.assertEqual(950000, utxo_set.amount)
+        # noinspection PyProtectedMember
+        self.assertIsNone(txf._selected_utxo_data)
+        self.assertLess(0, txf.estimatedVirtualSize)
+
+        address1.utxoList = []
+        address2.utxoList = []
+        self.assertEqual(0, len(utxo_set))
+        self.assertEqual(0, utxo_set.amount)
+        self.assertEqual([], utxo_set.addressList)
+        self.assertEqual(0, txf.availableAmount)
+
     def test_find_exact_utxo(self) -> None:
         address = self._coin.deriveHdAddress(account=0, is_change=False)
         self.assertIsNotNone(address)
@@ -571,80 +910,355 @@ class TestTxFactory(TestCase):
         self.assertIsNotNone(address)
 
         # find same amount
-        if True:
-            amount_list = [x for x in range(1000)]
-            shuffle(amount_list)
-            self._createUtxoList(address, amount_list)
-            self.assertEqual(1000, len(address.utxoList))
-            for i in range(len(address.utxoList)):
-                # noinspection PyProtectedMember
-                l, a = self._coin.TxFactory._findOptimalUtxoList(
-                    address.utxoList,
-                    i)
-                self.assertEqual(1, len(l))
-                self.assertEqual(i, a)
+        amount_list = [x for x in range(1000)]
+        shuffle(amount_list)
+        self._createUtxoList(address, amount_list)
+        self.assertEqual(1000, len(address.utxoList))
+        for i in range(1, len(address.utxoList)):
+            # noinspection PyProtectedMember
+            l, a = self._findUtxoList(address.utxoList, i)
+            self.assertEqual(1, len(l))
+            self.assertEqual(i, a)
 
-        # find the nearest amount + height test
-        if True:
-            amount_list = list(range(1, 1000, 2)) + list(range(1, 1000, 2))
-            shuffle(amount_list)
-            self._createUtxoList(address, amount_list)
-            self.assertEqual(500 * 2, len(address.utxoList))
-            for i in range(0, 1000, 2):
-                # noinspection PyProtectedMember
-                l, a = self._coin.TxFactory._findOptimalUtxoList(
-                    address.utxoList,
-                    i)
-                self.assertEqual(1, len(l))
-                self.assertEqual(i + 1, a)
-                self.assertTrue(self._isLowHeightUtxo(address.utxoList, l[0]))
-
-    def test_find_single_address_multiple_utxo(self) -> None:
+    def test_utxo_selection(self) -> None:
         address = self._coin.deriveHdAddress(account=0, is_change=False)
         self.assertIsNotNone(address)
 
-        amount_list = list(range(0, 10)) * 4
+        amount_list = list(range(1, 10))
         shuffle(amount_list)
         self._createUtxoList(address, amount_list)
-        self.assertEqual(40, len(address.utxoList))
-
-        test_list = (
-            (9, 9, 1),
-            (10, 10, 2),
-            (21, 21, 3),
-            (28, 28, 4),
-            (29, 29, 4),
-            (100, 102, 13),
-            (200, 0, 0),
-        )
+        utxo_list = address.utxoList
 
-        for (amount, result_amount, utxo_count) in test_list:
-            # noinspection PyProtectedMember
-            l, a = self._coin.TxFactory._findOptimalUtxoList(
-                address.utxoList,
-                amount)
+        for (amount, result_amount, utxo_count) in (
+                (10, 10, 2),
+                (44, 44, 8),
+                (45, 45, 9),
+                (46, 0, 0),
+        ):
+            l, a = BranchAndBoundUtxoSelection.select(utxo_list, amount)
             self.assertEqual(utxo_count, len(l))
             self.assertEqual(result_amount, a)
+            self.assertEqual(result_amount, sum(u.amount for u in l))
 
-        amount_list = list(range(1, 10))
-        shuffle(amount_list)
-        self._createUtxoList(address, amount_list)
-        self.assertEqual(9, len(address.utxoList))
+        for (amount, result_amount, utxo_count) in (
+                (9, 9, 1),
+                (20, 24, 3),
+                (45, 45, 9),
+                (46, 0, 0),
+        ):
+            l, a = LargestFirstUtxoSelection.select(utxo_list, amount)
+            self.assertEqual(utxo_count, len(l))
+            self.assertEqual(result_amount, a)
 
-        test_list = (
-            (9, 9, 1),
-            (10, 11, 2),
-            (20, 21, 3),
-            (45, 45, 9),
-        )
+        for amount in range(1, 46):
+            l, a = KnapsackUtxoSelection.select(utxo_list, amount)
+            self.assertLessEqual(amount, a)
+            self.assertEqual(a, sum(u.amount for u in l))
+        self.assertEqual(
+            ([], 0),
+            KnapsackUtxoSelection.select(utxo_list, 46))
 
-        for (amount, result_amount, utxo_count) in test_list:
+        # no exact match, changeless window
+        self._createUtxoList(address, [50, 70, 1000])
+        utxo_list = address.utxoList
+        self.assertEqual(
+            ([], 0),
+            BranchAndBoundUtxoSelection.select(utxo_list, 110))
+        l, a = BranchAndBoundUtxoSelection.select(
+            utxo_list,
+            110,
+            change_cost=15)
+        self.assertEqual(120, a)
+        self.assertEqual(2, len(l))
+
+        # smallest larger UTXO is better than the subset
+        l, a = KnapsackUtxoSelection.select(utxo_list, 200)
+        self.assertEqual([1000], [u.amount for u in l])
+
+        # default selection list
+        # noinspection PyProtectedMember
+        l, a = self._findUtxoList(utxo_list, 110)
+        self.assertEqual(120, a)
+        # noinspection PyProtectedMember
+        l, a = self._findUtxoList(utxo_list, 1070)
+        self.assertEqual(1070, a)
+        self.assertEqual(2, len(l))
+
+        # same result for same arguments
+        self._createUtxoList(address, [randint(1, 1000) for _ in range(500)])
+        utxo_list = address.utxoList
+        for amount in (1000, 10000, 100000):
+            self.assertEqual(
+                KnapsackUtxoSelection.select(utxo_list, amount),
+                KnapsackUtxoSelection.select(utxo_list, amount))
+
+        # too many inputs, the largest UTXO's are used
+        # noinspection PyProtectedMember
+        input_count = AbstractUtxoSelection._MAX_INPUT_COUNT + 50
+        self._createUtxoList(address, [10] * (input_count + 50))
+        utxo_list = address.utxoList
+        amount = 10 * input_count
+        self.assertEqual(
+            ([], 0),
+            BranchAndBoundUtxoSelection.select(utxo_list, amount))
+        self.assertEqual(
+            ([], 0),
+            KnapsackUtxoSelection.select(utxo_list, amount))
+        # noinspection PyProtectedMember
+        l, a = self._findUtxoList(utxo_list, amount)
+        self.assertEqual(input_count, len(l))
+        self.assertEqual(amount, a)
+
+    @benchmark
+    def test_utxo_selection_benchmark(self) -> None:
+        address = self._coin.deriveHdAddress(account=0, is_change=False)
+        self.assertIsNotNone(address)
+        target_amount = 10000000
+
+        for utxo_count in (10000, 100000):
+            self._createUtxoList(
+                address,
+                [randint(1000, 100000) for _ in range(utxo_count)])
+            utxo_list = address.utxoList
+
+            selection_list = [
+                (s.__name__, s.select) for s in (
+                    BranchAndBoundUtxoSelection,
+                    KnapsackUtxoSelection,
+                    LargestFirstUtxoSelection)
+            ]
             # noinspection PyProtectedMember
-            l, a = self._coin.TxFactory._findOptimalUtxoList(
-                address.utxoList,
-                amount)
-            self.assertEqual(utxo_count, len(l))
-            self.assertEqual(result_amount, a)
+            selection_list.append((
+                "TxFactory",
+                self._findUtxoList))
+
+            for name, select in selection_list:
+                timeframe = time.monotonic_ns()
+                l, a = select(utxo_list, target_amount)
+                timeframe = time.monotonic_ns() - timeframe
+                _logger.info(
+                    "{} with {} UTXO's: ~{:.2f} ms, {} input(s), "
+                    "excess amount {}."
+                    .format(
+                        name,
+                        utxo_count,
+                        timeframe / 1e+6,
+                        len(l),
+                        a - target_amount))
+                if name != BranchAndBoundUtxoSelection.__name__:
+                    self.assertLess(0, len(l))
+                if l:
+                    self.assertLessEqual(target_amount, a)
+                    self.assertEqual(a, sum(u.amount for u in l))
+
+    def test_utxo_array(self) -> None:
+        if not UtxoArray.isSupported:
+            self.skipTest("NumPy is not installed.")
+        factory = self._coin.TxFactory
+
+        for utxo_count in (1, 2, 3, 10, 200):
+            # same amounts and heights for the order of equal UTXO's
+            utxo_list = [
+                self._coin.Tx.Utxo(
+                    self._coin,
+                    name=i.to_bytes(32, "big").hex(),
+                    height=randint(1, 5),
+                    index=0,
+                    amount=randint(0, 50))
+                for i in range(utxo_count)]
+            utxo_array = UtxoArray(utxo_list)
+            self.assertEqual(utxo_count, len(utxo_array))
+            self.assertEqual(utxo_list, list(utxo_array))
+            self.assertEqual(
+                sum(u.amount for u in utxo_list),
+                utxo_array.amount)
+
+            for amount in range(0, utxo_array.amount + 2):
+                # noinspection PyProtectedMember
+                self.assertIs(
+                    factory._findExactUtxo(utxo_list, amount),
+                    factory._findExactUtxo(utxo_array, amount))
+                # noinspection PyProtectedMember
+                for select in (
+                        BranchAndBoundUtxoSelection.select,
+                        KnapsackUtxoSelection.select,
+                        LargestFirstUtxoSelection.select,
+                        self._findUtxoList
+                ):
+                    for change_cost in (0, 5):
+                        l1, a1 = select(
+                            utxo_list,
+                            amount,
+                            change_cost=change_cost)
+                        l2, a2 = select(
+                            utxo_array,
+                            amount,
+                            change_cost=change_cost)
+                        self.assertEqual(
+                            [id(u) for u in l1],
+                            [id(u) for u in l2])
+                        self.assertEqual(a1, a2)
+
+        # used by the factory for large sets only
+        address = self._coin.deriveHdAddress(account=0, is_change=False)
+        self.assertIsNotNone(address)
+        self._coin.appendAddress(address)
+        txf = self._coin.txFactory
+        # noinspection PyProtectedMember
+        utxo_count = factory._UTXO_ARRAY_MIN_LENGTH
+
+        self._createUtxoList(address, [1000] * utxo_count)
+        self.assertEqual(1000 * utxo_count, txf.availableAmount)
+        # noinspection PyProtectedMember
+        self.assertIsInstance(txf._utxo_list, UtxoArray)
+
+        self._createUtxoList(address, [1000] * (utxo_count - 1))
+        self.assertEqual(1000 * (utxo_count - 1), txf.availableAmount)
+        # noinspection PyProtectedMember
+        self.assertIsInstance(txf._utxo_list, list)
+
+    @benchmark
+    def test_utxo_array_benchmark(self) -> None:
+        if not UtxoArray.isSupported:
+            self.skipTest("NumPy is not installed.")
+        factory = self._coin.TxFactory
+        address = self._coin.deriveHdAddress(account=0, is_change=False)
+        self.assertIsNotNone(address)
+
+        utxo_count = 100000
+        self._createUtxoList(
+            address,
+            [randint(1000, 100000) for _ in range(utxo_count)])
+        utxo_list = address.utxoList
+
+        timeframe = time.monotonic_ns()
+        utxo_array = UtxoArray(utxo_list)
+        timeframe = time.monotonic_ns() - timeframe
+        _logger.info(
+            "UtxoArray with {} UTXO's: ~{:.2f} ms."
+            .format(utxo_count, timeframe / 1e+6))
+
+        # noinspection PyProtectedMember
+        for name, select, target_amount in (
+                ("Exact", factory._findExactUtxo, utxo_list[-1].amount),
+                ("BranchAndBound", BranchAndBoundUtxoSelection.select, 123456),
+                ("Knapsack", KnapsackUtxoSelection.select, 10000000),
+                ("LargestFirst", LargestFirstUtxoSelection.select, 10000000),
+                ("TxFactory", self._findUtxoList, 10000000),
+        ):
+            result_list = []
+            for current_list in (utxo_list, utxo_array):
+                timeframe = time.monotonic_ns()
+                result_list.append(select(current_list, target_amount))
+                timeframe = time.monotonic_ns() - timeframe
+                _logger.info(
+                    "{} with {} UTXO's, {}: ~{:.2f} ms."
+                    .format(
+                        name,
+                        utxo_count,
+                        type(current_list).__name__,
+                        timeframe / 1e+6))
+            self.assertEqual(result_list[0], result_list[1])
+
+    def test_change_cost(self) -> None:
+        address = self._coin.deriveHdAddress(account=0, is_change=False)
+        self.assertIsNotNone(address)
+        receiver_address = self._coin.deriveHdAddress(
+            account=0,
+            is_change=False,
+            index=1)
+        self.assertIsNotNone(receiver_address)
+        self._createUtxoList(address, [100000, 300000])
+        self.assertTrue(self._coin.appendAddress(address))
+
+        txf = self._coin.txFactory
+        self.assertTrue(txf.setReceiverAddressName(receiver_address.name))
+        # noinspection PyProtectedMember
+        change_cost = txf._changeCost()
+        self.assertLess(0, change_cost)
+        # estimated once per fee rate and address type
+        # noinspection PyProtectedMember
+        self.assertEqual(change_cost, txf._changeCost())
+        # noinspection PyProtectedMember
+        self.assertEqual(1, len(txf._change_cost_map))
+        txf.feeAmountPerByte *= 2
+        # noinspection PyProtectedMember
+        self.assertLess(change_cost, txf._changeCost())
+        # noinspection PyProtectedMember
+        self.assertEqual(2, len(txf._change_cost_map))
+        txf.feeAmountPerByte //= 2
+
+        txf.receiverAmount = 1
+        utxo = address.utxoList[0]
+        # noinspection PyProtectedMember
+        fee_amount = txf._feeAmount(
+            txf.feeAmountPerByte,
+            *txf._calcEstimatedSizes([utxo], utxo.amount, with_change=False))
+        self.assertLess(0, fee_amount)
+
+        # the excess amount is cheaper to pay than the change
+        txf.receiverAmount = utxo.amount - fee_amount - change_cost // 2
+        self.assertEqual(utxo.amount - txf.receiverAmount, txf.feeAmount)
+        self.assertEqual(0, txf.changeAmount)
+        self.assertTrue(txf.isValidFeeAmount)
+        self.assertTrue(txf.prepare())
+        self.assertIsNone(txf.changeAddress)
+        self.assertTrue(txf.sign())
+        # noinspection PyProtectedMember
+        self.assertEqual(1, len(txf._mtx.outputList))
+        # noinspection PyProtectedMember
+        self.assertEqual(txf.feeAmount, txf._mtx.feeAmount)
+        txf.clear()
+
+        # change output is worth it
+        txf.receiverAmount = utxo.amount - fee_amount - change_cost * 2
+        self.assertLess(0, txf.changeAmount)
+        self.assertGreater(utxo.amount - txf.receiverAmount, txf.feeAmount)
+        self.assertTrue(txf.prepare())
+        self.assertIsNotNone(txf.changeAddress)
+        self.assertTrue(txf.sign())
+        # noinspection PyProtectedMember
+        self.assertEqual(2, len(txf._mtx.outputList))
+        # noinspection PyProtectedMember
+        self.assertEqual(txf.feeAmount, txf._mtx.feeAmount)
+        txf.clear()
+
+    def test_coin_utxo_selection_list(self) -> None:
+        class LargestFirstBitcoin(Bitcoin):
+            _UTXO_SELECTION_LIST = (LargestFirstUtxoSelection, )
+
+        self.assertEqual(
+            (
+                BranchAndBoundUtxoSelection,
+                KnapsackUtxoSelection,
+                LargestFirstUtxoSelection
+            ),
+            Bitcoin.utxoSelectionList)
+        self.assertEqual(
+            (LargestFirstUtxoSelection, ),
+            LargestFirstBitcoin.utxoSelectionList)
+
+        coin = LargestFirstBitcoin()
+        root_node = HdNode.deriveRootNode(urandom(64))
+        self.assertTrue(coin.deriveHdNode(root_node))
+        address = coin.deriveHdAddress(account=0, is_change=False)
+        receiver_address = coin.deriveHdAddress(
+            account=0,
+            is_change=False,
+            index=1)
+        self._coin = coin
+        self._createUtxoList(address, [50000, 70000, 1000000])
+        self.assertTrue(coin.appendAddress(address))
+
+        # the factory uses the strategies of the coin
+        txf = coin.txFactory
+        self.assertTrue(txf.setReceiverAddressName(receiver_address.name))
+        txf.receiverAmount = 80000
+        self.assertLess(0, txf.changeAmount)
+        # noinspection PyProtectedMember
+        self.assertEqual(
+            [1000000],
+            [u.amount for u in txf._selected_utxo_data.list])
 
     def test(self) -> None:
         amount_list = list(range(100000, 100100))
@@ -1152,3 +1766,122 @@ class TestMutableTx(TestCase):
                 "92040000",  # noqa
             excepted_raw_size=252,
             excepted_virtual_size=170)
+
+    def test_estimate_sizes(self) -> None:
+        address_type = self._coin.Address.Type
+        script_type = self._coin.Address.Script.Type
+        utxo_type_list = (
+            (address_type.PUBKEY_HASH, script_type.P2PKH, True),
+            (address_type.PUBKEY_HASH, script_type.P2PKH, False),
+            (address_type.PUBKEY_HASH, script_type.P2PK, True),
+            (address_type.PUBKEY_HASH, script_type.P2PK, False),
+            (address_type.SCRIPT_HASH, script_type.P2SH, True),
+            (address_type.WITNESS_V0_KEY_HASH, script_type.P2WPKH, True),
+            (address_type.WITNESS_V0_KEY_HASH, script_type.P2SH_P2WPKH, True),
+            (address_type.WITNESS_V0_SCRIPT_HASH, script_type.P2WSH, True),
+        )
+
+        def create_utxo(index: int) -> Coin.Tx.Utxo:
+            type_, utxo_script_type, is_compressed = \
+                utxo_type_list[index % len(utxo_type_list)]
+            public_key = PublicKey.fromPublicInteger(
+                index + 1,
+                None,
+                is_compressed=is_compressed)
+            self.assertIsNotNone(public_key)
+            address = self._coin.Address.create(
+                self._coin,
+                type_=type_,
+                key=public_key)
+            self.assertIsNotNone(address)
+            utxo = self._coin.Tx.Utxo(
+                self._coin,
+                name=index.to_bytes(32, "big").hex(),
+                height=1,
+                index=index,
+                amount=randint(1000, 100000),
+                script_type=utxo_script_type)
+            utxo.address = address
+            return utxo
+
+        def calc_sizes(
+                utxo_list: Sequence[Coin.Tx.Utxo],
+                output_list: Sequence[Tuple[Coin.Address, int]]
+        ) -> Tuple[int, int]:
+            mtx = self._coin.TxFactory.MutableTx(
+                self._coin,
+                [
+                    self._coin.TxFactory.MutableTx.Input(u, is_dummy=True)
+                    for u in utxo_list],
+                [
+                    self._coin.TxFactory.MutableTx.Output(
+                        a,
+                        amount=v,
+                        is_dummy=True)
+                    for a, v in output_list],
+                is_dummy=True)
+            self.assertTrue(mtx.sign())
+            return mtx.rawSize, mtx.virtualSize
+
+        output_list = [
+            (self._coin.Address.createFromName(self._coin, name=a[0]), 1000)
+            for a in BITCOIN_ADDRESS_LIST[:4]]
+        for a, _ in output_list:
+            self.assertIsNotNone(a)
+
+        all_utxo_list = [create_utxo(i) for i in range(500)]
+        for utxo_list in chain(
+                # single script type
+                (
+                    [all_utxo_list[i]]
+                    for i in range(len(utxo_type_list))),
+                (
+                    all_utxo_list[i::len(utxo_type_list)][:3]
+                    for i in range(len(utxo_type_list))),
+                # non-witness and witness inputs
+                (
+                    all_utxo_list[:i]
+                    for i in (2, 5, len(utxo_type_list))),
+                # var_int of the input count
+                (
+                    all_utxo_list[:i]
+                    for i in (252, 253, len(all_utxo_list))),
+        ):
+            for i in range(1, len(output_list) + 1):
+                self.assertEqual(
+                    calc_sizes(utxo_list, output_list[:i]),
+                    self._coin.TxFactory.MutableTx.estimateSizes(
+                        utxo_list,
+                        output_list[:i]))
+
+        # witness script type of non-witness address, serializer is required
+        utxo = self._coin.Tx.Utxo(
+            self._coin,
+            name="00" * 32,
+            height=1,
+            index=0,
+            amount=1000,
+            script_type=script_type.P2WPKH)
+        utxo.address = all_utxo_list[0].address
+        self.assertEqual(address_type.PUBKEY_HASH, utxo.address.type)
+        self.assertIsNone(self._coin.TxFactory.MutableTx.estimateSizes(
+            [utxo],
+            output_list))
+
+        timeframe = time.monotonic_ns()
+        sizes = calc_sizes(all_utxo_list, output_list[:2])
+        timeframe = time.monotonic_ns() - timeframe
+        _logger.info(
+            "Dummy signed transaction size with {} inputs: ~{:.2f} ms."
+            .format(len(all_utxo_list), timeframe / 1e+6))
+
+        timeframe = time.monotonic_ns()
+        self.assertEqual(
+            sizes,
+            self._coin.TxFactory.MutableTx.estimateSizes(
+                all_utxo_list,
+                output_list[:2]))
+        timeframe = time.monotonic_ns() - timeframe
+        _logger.info(
+            "Estimated transaction size with {} inputs: ~{:.2f} ms."
+            .format(len(all_utxo_list), timeframe / 1e+6))
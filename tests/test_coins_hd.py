@@ -270,6 +270,24 @@ class TestHd(TestCase):
                         i + 1,
                         coin.nextHdIndex(purpose, account, change))
 
+        # explicit index leaves a gap
+        address = coin.deriveHdAddress(account=0, is_change=False, index=20)
+        self.assertIsNotNone(address)
+        self.assertEqual(10, coin.nextHdIndex(purpose, 0, 0))
+        coin.appendAddress(address)
+        self.assertEqual(21, coin.nextHdIndex(purpose, 0, 0))
+        self.assertEqual(10, coin.nextHdIndex(purpose, 0, 1))
+        self.assertEqual(0, coin.nextHdIndex(purpose, 10, 0))
+
+        # loaded address list
+        new_coin = Bitcoin()
+        new_coin.__update__(address_list=coin.addressList)
+        for account in range(0, 10):
+            for change in (0, 1):
+                self.assertEqual(
+                    coin.nextHdIndex(purpose, account, change),
+                    new_coin.nextHdIndex(purpose, account, change))
+
 
 # https://iancoleman.io/bip39/
 HD_ADDRESS_LIST = (
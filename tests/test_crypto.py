@@ -2,7 +2,7 @@ import os
 import time
 from unittest import TestCase
 
-from bmnclient.crypto.cipher import MessageCipher
+from bmnclient.crypto.cipher import BlockDeviceCipher, MessageCipher
 from bmnclient.crypto.kdf import KeyDerivationFunction, SecretStore
 from bmnclient.crypto.password import PasswordStrength
 from tests import TestApplication
@@ -36,6 +36,68 @@ class TestMessageCipher(TestCase):
             self.assertEqual(mc1.decrypt(cipher_text, "@"), source_text)
 
 
+class TestBlockDeviceCipher(TestCase):
+    def test_sector_list(self) -> None:
+        key = os.urandom(64)
+        salt = os.urandom(BlockDeviceCipher.saltSize)
+        algorithm = BlockDeviceCipher.createAlgorithm(key)
+        self.assertIs(algorithm, BlockDeviceCipher.createAlgorithm(algorithm))
+
+        for sector_size, sector_count in ((16, 1), (512, 7), (4096, 16)):
+            source_text = os.urandom(sector_size * sector_count)
+
+            cipher_text = b""
+            for i in range(sector_count):
+                cipher = BlockDeviceCipher(
+                    BlockDeviceCipher.OpMode.ENCRYPT,
+                    key,
+                    100 + i,
+                    salt)
+                cipher_text += cipher.update(
+                    source_text[i * sector_size:(i + 1) * sector_size])
+                cipher_text += cipher.finalize()
+
+            for k in (key, algorithm):
+                self.assertEqual(
+                    cipher_text,
+                    BlockDeviceCipher.updateSectorList(
+                        BlockDeviceCipher.OpMode.ENCRYPT,
+                        k,
+                        100,
+                        salt,
+                        source_text,
+                        sector_size))
+                self.assertEqual(
+                    source_text,
+                    BlockDeviceCipher.updateSectorList(
+                        BlockDeviceCipher.OpMode.DECRYPT,
+                        k,
+                        100,
+                        salt,
+                        cipher_text,
+                        sector_size))
+
+            # same data, different position
+            self.assertNotEqual(
+                cipher_text,
+                BlockDeviceCipher.updateSectorList(
+                    BlockDeviceCipher.OpMode.ENCRYPT,
+                    key,
+                    101,
+                    salt,
+                    source_text,
+                    sector_size))
+
+            with self.assertRaises(ValueError):
+                BlockDeviceCipher.updateSectorList(
+                    BlockDeviceCipher.OpMode.ENCRYPT,
+                    key,
+                    0,
+                    salt,
+                    source_text[:-1],
+                    sector_size)
+
+
 class TestKdf(TestCase):
     KEY_LENGTH_LIST = (128, 256)
 
@@ -1,26 +1,38 @@
 from __future__ import annotations
 
+import time
+from hashlib import sha256
+from itertools import chain
 from pathlib import Path
+from threading import Event, Thread
 from typing import TYPE_CHECKING
 from unittest import TestCase
 
+from PySide6.QtCore import QCoreApplication
+
 from bmnclient.coins.list import CoinList
 from bmnclient.database import Cursor, Database
 from bmnclient.database.tables import (
     AddressListTable,
+    AddressNameListTable,
     AddressTxMapTable,
     CoinListTable,
     MetadataTable,
     TxIoListTable,
-    TxListTable
+    TxListTable,
+    UtxoListTable,
+    _encodeTxName,
+    _upsertStatement
 )
-from tests import TestApplication
+from tests import TestApplication, benchmark
 from tests.test_coins import fillCoin
 
 if TYPE_CHECKING:
     from typing import Any, List, Tuple
     from bmnclient.coins.abstract import Coin
 
+_logger = TestApplication.getLogger(__name__)
+
 
 class TestDatabase(TestCase):
     def setUp(self) -> None:
@@ -31,13 +43,18 @@ class TestDatabase(TestCase):
     def tearDown(self) -> None:
         self._application.setExitEvent()
 
-    def _create(self, file_name: Path, *, mkdir: bool = True) -> Database:
+    def _create(
+            self,
+            file_name: Path,
+            *,
+            mkdir: bool = True,
+            **kwargs) -> Database:
         path = Path(self._application.tempPath / file_name)
         if mkdir:
             path.parent.mkdir(parents=True, exist_ok=True)
         if path.exists():
             path.unlink()
-        return Database(self._application, path)
+        return Database(self._application, path, **kwargs)
 
     def test_open(self) -> None:
         for i in range(0, 10):
@@ -88,6 +105,145 @@ class TestDatabase(TestCase):
                 ok = True
             self.assertTrue(ok)
 
+    def test_journal_mode(self) -> None:
+        db = self._create(
+            Path("journal_mode.db"),
+            journal_mode=Database.JournalMode.WAL)
+        self.assertEqual(Database.JournalMode.WAL, db.journalMode)
+        self.assertTrue(db.open())
+        with db.transaction(suppress_exceptions=False) as c:
+            self.assertEqual(
+                "wal",
+                c.execute("PRAGMA journal_mode").fetchone()[0])
+            self.assertEqual(
+                "exclusive",
+                c.execute("PRAGMA main.locking_mode").fetchone()[0])
+
+        coin_list = CoinList()
+        with db.transaction(suppress_exceptions=False) as c:
+            self._fill_db(db, c, coin_list)
+        wal_path = db.filePath.with_name(db.filePath.name + "-wal")
+        self.assertTrue(wal_path.exists())
+        self.assertGreater(wal_path.stat().st_size, 0)
+
+        for mode in Database.CheckpointMode:
+            self.assertTrue(db.checkpoint(mode))
+        self.assertEqual(0, wal_path.stat().st_size)
+        self.assertTrue(db.close())
+        self.assertFalse(wal_path.exists())
+
+        # switch WAL -> DELETE
+        db = Database(
+            self._application,
+            db.filePath,
+            journal_mode=Database.JournalMode.DELETE)
+        self.assertTrue(db.open())
+        with db.transaction(suppress_exceptions=False) as c:
+            self.assertEqual(
+                "delete",
+                c.execute("PRAGMA journal_mode").fetchone()[0])
+            for coin in coin_list:
+                self.assertEqual(1, len(self._select_coin(c, coin)))
+                self.assertEqual(10, len(self._select_addresses(c, coin)))
+        self.assertTrue(db.checkpoint())
+        self.assertTrue(db.close())
+
+    def test_durability(self) -> None:
+        commit_count = 200
+        synchronous_map = {
+            Database.Durability.PARANOID: 3,  # EXTRA
+            Database.Durability.NORMAL: 1,
+            Database.Durability.FAST: 0,  # OFF
+        }
+        for journal_mode in Database.JournalMode:
+            for durability in Database.Durability:
+                db = self._create(
+                    Path(
+                        "durability_"
+                        + journal_mode.value
+                        + "_"
+                        + durability.value
+                        + ".db"),
+                    journal_mode=journal_mode,
+                    durability=durability)
+                self.assertEqual(durability, db.durability)
+                self.assertTrue(db.open())
+
+                timeframe = time.monotonic_ns()
+                query = (
+                    f"INSERT OR REPLACE INTO {MetadataTable.identifier}"
+                    f" ({MetadataTable.Column.KEY.value.identifier},"
+                    f" {MetadataTable.Column.VALUE.value.identifier})"
+                    f" VALUES(?, ?)"
+                )
+                for i in range(commit_count):
+                    with db.transaction(suppress_exceptions=False) as c:
+                        c.execute(query, ("durability", str(i)))
+                timeframe = time.monotonic_ns() - timeframe
+
+                _logger.info(
+                    "Durability '{}' ({}): ~{:.2f} commits per second."
+                    .format(
+                        durability.value,
+                        journal_mode.value,
+                        commit_count * 1e+9 / timeframe))
+
+                with db.transaction(suppress_exceptions=False) as c:
+                    self.assertEqual(
+                        synchronous_map[durability],
+                        c.execute("PRAGMA main.synchronous").fetchone()[0])
+                    self.assertEqual(
+                        (str(commit_count - 1), ),
+                        c.execute(
+                            f"SELECT"
+                            f" {MetadataTable.Column.VALUE.value.identifier}"
+                            f" FROM {MetadataTable.identifier}"
+                            f" WHERE"
+                            f" {MetadataTable.Column.KEY.value.identifier}"
+                            f" == ?",
+                            ("durability", )).fetchone())
+                self.assertTrue(db.close())
+
+    def test_page_size(self) -> None:
+        with self.assertRaises(ValueError):
+            self._create(Path("page_size.db"), page_size=1024)
+
+        db = self._create(Path("page_size.db"))
+        self.assertEqual(Database.defaultPageSize, db.pageSize)
+        self.assertTrue(db.open())
+        coin_list = CoinList()
+        with db.transaction(suppress_exceptions=False) as c:
+            self.assertEqual(
+                db.pageSize,
+                c.execute("PRAGMA main.page_size").fetchone()[0])
+            self._fill_db(db, c, coin_list)
+        self.assertTrue(db.close())
+
+        for journal_mode, page_size in (
+                (Database.JournalMode.WAL, 16384),
+                (Database.JournalMode.DELETE, 65536),
+                (Database.JournalMode.WAL, 4096),
+        ):
+            db = Database(
+                self._application,
+                db.filePath,
+                journal_mode=journal_mode,
+                page_size=page_size)
+            self.assertTrue(db.open())
+            with db.transaction(suppress_exceptions=False) as c:
+                self.assertEqual(
+                    page_size,
+                    c.execute("PRAGMA main.page_size").fetchone()[0])
+                self.assertEqual(
+                    journal_mode.value,
+                    c.execute("PRAGMA main.journal_mode").fetchone()[0])
+                for coin in coin_list:
+                    self.assertEqual(1, len(self._select_coin(c, coin)))
+                    self.assertEqual(10, len(self._select_addresses(c, coin)))
+            self.assertFalse(db.filePath.with_name(
+                db.filePath.name + "-migrate").exists())
+            self.assertTrue(db.close())
+
     def test_upgrade(self) -> None:
         db = self._create(Path("upgrade.db"))
         self.assertTrue(db.open())
@@ -414,3 +570,763 @@ class TestDatabase(TestCase):
             self.assertEqual(
                 0,
                 len(self._select_transaction_address_map(c, tx)))
+
+    def test_deserialize_all(self) -> None:
+        db = self._create(Path("deserialize_all.db"))
+        self.assertTrue(db.open())
+
+        coin_list = CoinList()
+        with db.transaction(suppress_exceptions=False) as c:
+            self._fill_db(db, c, coin_list)
+
+        new_coin_list = CoinList()
+        with db.transaction(suppress_exceptions=False) as c:
+            for coin in new_coin_list:
+                self.assertTrue(db[CoinListTable].deserialize(c, coin))
+                self.assertTrue(db[AddressListTable].deserializeAll(c, coin))
+                self.assertTrue(db[TxListTable].deserializeAll(c, coin))
+
+        for coin, new_coin in zip(coin_list, new_coin_list):
+            self.assertEqual(coin.rowId, new_coin.rowId)
+            self.assertEqual(
+                sorted(a.name for a in coin.addressList),
+                sorted(a.name for a in new_coin.addressList))
+
+            for address in coin.addressList:
+                new_address = new_coin.findAddressByName(address.name)
+                self.assertIsNotNone(new_address)
+                self.assertEqual(
+                    sorted(t.name for t in address.txList),
+                    sorted(t.name for t in new_address.txList))
+                self.assertEqual(
+                    sorted(new_address.txList, key=lambda t: (
+                        t.height,
+                        t.time)),
+                    new_address.txList)
+
+                tx_map = {t.name: t for t in address.txList}
+                for new_tx in new_address.txList:
+                    tx = tx_map[new_tx.name]
+                    self.assertIsNot(tx, new_tx)
+                    self.assertEqual(tx.rowId, new_tx.rowId)
+                    self.assertEqual(tx.serialize(), new_tx.serialize())
+
+    def test_query_plan(self) -> None:
+        db = self._create(Path("query_plan.db"))
+        self.assertTrue(db.open())
+
+        query_list = []
+        db.logQuery = query_list.append
+        coin_list = CoinList()
+        with db.transaction(suppress_exceptions=False) as c:
+            self._fill_db(db, c, coin_list)
+            for coin in coin_list:
+                for address in coin.addressList:
+                    db[TxListTable].serializeAll(c, address, address.txList)
+        with db.transaction(suppress_exceptions=False) as c:
+            for coin in CoinList():
+                self.assertTrue(db[CoinListTable].deserialize(c, coin))
+                self.assertTrue(db[AddressListTable].deserializeAll(c, coin))
+                self.assertTrue(db[TxListTable].deserializeAll(c, coin))
+        del db.logQuery
+
+        # lookups of foreign key actions
+        for table, column in (
+                (AddressListTable, AddressListTable.Column.COIN_ROW_ID),
+                (TxListTable, TxListTable.Column.COIN_ROW_ID),
+                (TxIoListTable, TxIoListTable.Column.TX_ROW_ID),
+                (TxIoListTable, TxIoListTable.Column.ADDRESS_NAME_ROW_ID),
+                (AddressTxMapTable, AddressTxMapTable.Column.ADDRESS_ROW_ID),
+                (AddressTxMapTable, AddressTxMapTable.Column.TX_ROW_ID),
+        ):
+            query_list.append(
+                f"SELECT * FROM {table.identifier}"
+                f" WHERE {column.value.identifier} == ?")
+
+        query_list = {
+            q for q in query_list
+            if q.lstrip().split(" ", 1)[0].upper() in (
+                "SELECT",
+                "INSERT",
+                "UPDATE",
+                "DELETE")
+        }
+        self.assertGreater(len(query_list), 10)
+        with db.transaction(suppress_exceptions=False) as c:
+            for query in query_list:
+                plan = c.execute(
+                    "EXPLAIN QUERY PLAN " + query,
+                    (None, ) * query.count("?")).fetchall()
+                for detail in (r[-1] for r in plan):
+                    self.assertFalse(
+                        detail.startswith("SCAN ")
+                        and not detail.endswith(("CONSTANT ROW", "ROWS")),
+                        f"{detail}: {query}")
+        self.assertTrue(db.close())
+
+    def test_blob_storage(self) -> None:
+        db = self._create(Path("blob_storage.db"))
+        self.assertTrue(db.open())
+
+        coin = CoinList()[0]
+        fillCoin(self, coin, address_count=1, tx_count=0)
+        address = coin.addressList[0]
+        io_address = coin.deriveHdAddress(account=1, is_change=False)
+        tx_name = sha256(b"blob_storage").hexdigest()
+        tx = coin.Tx(
+            coin,
+            name=tx_name,
+            height=100,
+            time=200,
+            amount=300,
+            fee_amount=400,
+            is_coinbase=False,
+            input_list=[coin.Tx.Io(
+                coin,
+                index=i,
+                output_type="output_type",
+                address_name=io_address.name,
+                amount=500) for i in range(3)],
+            output_list=[coin.Tx.Io(
+                coin,
+                index=0,
+                output_type="output_type_nulldata",
+                address_name=None,
+                amount=0)])
+        address.appendTx(tx)
+
+        with db.transaction(suppress_exceptions=False) as c:
+            db[CoinListTable].serialize(c, coin)
+            db[AddressListTable].serialize(c, address)
+            db[TxListTable].serializeAll(c, address, [tx])
+
+            self.assertEqual(
+                ("blob", 32),
+                c.execute(
+                    f"SELECT typeof(name), length(name)"
+                    f" FROM {TxListTable.identifier}").fetchone())
+            self.assertEqual(
+                [(io_address.name, 3)],
+                c.execute(
+                    f"SELECT n.name, COUNT(*)"
+                    f" FROM {TxIoListTable.identifier} AS io"
+                    f" JOIN {AddressNameListTable.identifier} AS n"
+                    f" ON n.row_id == io.address_name_row_id"
+                    f" GROUP BY n.name").fetchall())
+
+            # already interned
+            self.assertEqual(
+                1,
+                len(db[AddressNameListTable].internAll(
+                    c,
+                    [io_address.name, io_address.name])))
+
+        new_coin = CoinList()[0]
+        with db.transaction(suppress_exceptions=False) as c:
+            self.assertTrue(db[CoinListTable].deserialize(c, new_coin))
+            self.assertTrue(db[AddressListTable].deserializeAll(c, new_coin))
+            self.assertTrue(db[TxListTable].deserializeAll(c, new_coin))
+        new_tx = new_coin.findAddressByName(address.name).txList[0]
+        self.assertEqual(tx_name, new_tx.name)
+        self.assertEqual(tx.serialize(), new_tx.serialize())
+
+        # upgrade from version 3
+        with db.transaction(suppress_exceptions=False) as c:
+            c.execute(f"DELETE FROM {TxListTable.identifier}")
+            c.execute(f"DROP TABLE {TxIoListTable.identifier}")
+            c.execute(f"DROP TABLE {AddressNameListTable.identifier}")
+            c.execute(
+                "CREATE TABLE \"transactions_io\" ("
+                "\"row_id\" INTEGER PRIMARY KEY,"
+                " \"transaction_row_id\" INTEGER NOT NULL,"
+                " \"io_type\" TEXT NOT NULL,"
+                " \"index\" INTEGER NOT NULL,"
+                " \"output_type\" TEXT NOT NULL,"
+                " \"address_name\" TEXT,"
+                " \"amount\" INTEGER NOT NULL,"
+                " FOREIGN KEY (\"transaction_row_id\")"
+                " REFERENCES \"transactions\" (\"row_id\") ON DELETE CASCADE,"
+                " UNIQUE(\"transaction_row_id\", \"io_type\", \"index\"))")
+            c.execute(
+                "CREATE INDEX \"transactions_io_address_name\""
+                " ON \"transactions_io\" (\"address_name\")")
+            c.execute(
+                "INSERT INTO \"transactions\" (\"row_id\", \"coin_row_id\","
+                " \"name\", \"height\", \"time\", \"amount\","
+                " \"fee_amount\", \"is_coinbase\")"
+                " VALUES(1, ?, ?, 1, 1, 1, 1, 0), (2, ?, ?, 1, 1, 1, 1, 0)",
+                (coin.rowId, tx_name, coin.rowId, "tx_name"))
+            c.executemany(
+                "INSERT INTO \"transactions_io\" (\"transaction_row_id\","
+                " \"io_type\", \"index\", \"output_type\", \"address_name\","
+                " \"amount\") VALUES(?, 'output', ?, 'output_type', ?, 1)",
+                (
+                    (1, 0, io_address.name),
+                    (1, 1, None),
+                    (2, 0, io_address.name),
+                ))
+            db[MetadataTable].set(c, MetadataTable.Key.VERSION, 3)
+        self.assertTrue(db.close())
+
+        self.assertTrue(db.open())
+        with db.transaction(suppress_exceptions=False) as c:
+            self.assertFalse(c.isColumnExists("transactions_io", "address_name"))
+            self.assertEqual(
+                [("blob", ), ("text", )],
+                c.execute(
+                    f"SELECT typeof(name) FROM {TxListTable.identifier}"
+                    f" ORDER BY row_id").fetchall())
+            self.assertEqual(
+                [(1, io_address.name), (1, None), (2, io_address.name)],
+                c.execute(
+                    f"SELECT io.transaction_row_id, n.name"
+                    f" FROM {TxIoListTable.identifier} AS io"
+                    f" LEFT JOIN {AddressNameListTable.identifier} AS n"
+                    f" ON n.row_id == io.address_name_row_id"
+                    f" ORDER BY io.row_id").fetchall())
+            _, io_map = db[TxIoListTable].deserializeAll(c, coin)
+            self.assertEqual(
+                [io_address.name, None],
+                [io.addressName for io in io_map[1][1]])
+        self.assertTrue(db.close())
+
+    def _serialize_tx_rows(
+            self,
+            db: Database,
+            cursor: Cursor,
+            address: Coin.Address) -> None:
+        # noinspection PyProtectedMember
+        for tx in address.txList:
+            db[TxListTable]._serialize(
+                cursor,
+                tx,
+                {
+                    TxListTable.Column.COIN_ROW_ID: tx.coin.rowId,
+                    TxListTable.Column.NAME: _encodeTxName(tx.name)
+                })
+            for io_type, io_list in (
+                    (TxIoListTable.IoType.INPUT, tx.inputList),
+                    (TxIoListTable.IoType.OUTPUT, tx.outputList)
+            ):
+                for io in io_list:
+                    name_map = db[AddressNameListTable].internAll(
+                        cursor,
+                        [io.addressName] if io.addressName else [])
+                    db[TxIoListTable]._serialize(
+                        cursor,
+                        io,
+                        {
+                            TxIoListTable.Column.TX_ROW_ID: tx.rowId,
+                            TxIoListTable.Column.IO_TYPE: io_type.value,
+                            TxIoListTable.Column.INDEX: io.index
+                        },
+                        {
+                            TxIoListTable.Column.ADDRESS_NAME_ROW_ID:
+                                name_map.get(io.addressName)
+                        })
+            db[AddressTxMapTable].insertAll(cursor, address.rowId, [tx.rowId])
+
+    def test_serialize_all(self) -> None:
+        coin_list = CoinList()
+        coin = coin_list[0]
+        fillCoin(self, coin, address_count=4, tx_count=50)
+
+        result_list = []
+        for name in ("row", "all"):
+            db = self._create(Path("serialize_" + name + ".db"))
+            self.assertTrue(db.open())
+
+            for address in coin.addressList:
+                for tx in address.txList:
+                    tx.rowId = -1
+                    for io in tx.inputList + tx.outputList:
+                        io.rowId = -1
+
+            with db.transaction(suppress_exceptions=False) as c:
+                db[CoinListTable].serialize(c, coin)
+                for address in coin.addressList:
+                    db[AddressListTable].serialize(c, address)
+
+            row_count = 0
+            timeframe = time.monotonic_ns()
+            with db.transaction(suppress_exceptions=False) as c:
+                for address in coin.addressList:
+                    if name == "row":
+                        self._serialize_tx_rows(db, c, address)
+                    else:
+                        db[TxListTable].serializeAll(
+                            c,
+                            address,
+                            address.txList)
+                    for tx in address.txList:
+                        row_count += 2 + len(tx.inputList + tx.outputList)
+            timeframe = time.monotonic_ns() - timeframe
+
+            _logger.info(
+                "Transactions serialization ({}): ~{:.2f} rows per second."
+                .format(name, row_count * 1e+9 / timeframe))
+
+            with db.transaction(suppress_exceptions=False) as c:
+                result = [self._select_transactions(c, coin)]
+                for address in coin.addressList:
+                    result.append(
+                        self._select_address_transaction_map(c, address))
+                    for tx in address.txList:
+                        self.assertGreater(tx.rowId, 0)
+                        result.append(self._select_transaction_io(c, tx))
+                        for io in tx.inputList + tx.outputList:
+                            self.assertGreater(io.rowId, 0)
+                result_list.append(result)
+
+            # update existing rows, duplicates in the same list
+            address = coin.addressList[0]
+            tx_list = address.txList + address.txList[:5]
+            row_id_list = [t.rowId for t in address.txList]
+            with db.transaction(suppress_exceptions=False) as c:
+                db[TxListTable].serializeAll(c, address, tx_list)
+                self.assertEqual(
+                    result[0],
+                    self._select_transactions(c, coin))
+            self.assertEqual(row_id_list, [t.rowId for t in address.txList])
+            self.assertTrue(db.close())
+
+        self.assertEqual(result_list[0], result_list[1])
+
+        # multi-row upserts use a few fixed sizes only
+        for table_type in (TxListTable, TxIoListTable):
+            # noinspection PyUnresolvedReferences
+            statement_map = table_type._AbstractTable__STATEMENT_MAP
+            size_map = {}
+            for builder, *column_list, size in statement_map:
+                if builder is _upsertStatement:
+                    size_map.setdefault(tuple(column_list), set()).add(size)
+            self.assertTrue(size_map)
+            for size_list in size_map.values():
+                self.assertLessEqual(len(size_list - {1, 16}), 1)
+
+    def test_serialize_address_list(self) -> None:
+        self._serialize_address_list(20)
+
+    @benchmark
+    def test_serialize_benchmark(self) -> None:
+        self._serialize_address_list(500)
+
+    def _serialize_address_list(self, address_count: int) -> None:
+        db = self._create(
+            Path("serialize_address_list.db"),
+            durability=Database.Durability.FAST)
+        self.assertTrue(db.open())
+
+        coin = CoinList()[0]
+        fillCoin(self, coin, address_count=address_count, tx_count=0)
+        with db.transaction(suppress_exceptions=False) as c:
+            db[CoinListTable].serialize(c, coin)
+
+        # insert, update by row_id, update by unique key
+        for name in ("insert", "update", "update by key"):
+            if name == "update by key":
+                for address in coin.addressList:
+                    address.rowId = -1
+            timeframe = time.monotonic_ns()
+            with db.transaction(suppress_exceptions=False) as c:
+                for address in coin.addressList:
+                    db[AddressListTable].serialize(c, address)
+            timeframe = time.monotonic_ns() - timeframe
+            self.assertTrue(all(a.rowId > 0 for a in coin.addressList))
+
+            _logger.info(
+                "Address serialization ({}): ~{:.2f} us per row."
+                .format(name, timeframe / 1e+3 / len(coin.addressList)))
+        self.assertTrue(db.close())
+
+    def test_profiler(self) -> None:
+        db = self._create(Path("profiler.db"))
+        self.assertIsNone(db.profiler)
+        db = self._create(Path("profiler.db"), profile=True)
+        self.assertIsNotNone(db.profiler)
+        self.assertTrue(db.open())
+
+        coin = CoinList()[0]
+        fillCoin(self, coin, address_count=4, tx_count=2)
+        with db.transaction(suppress_exceptions=False) as c:
+            db[CoinListTable].serialize(c, coin)
+            for address in coin.addressList:
+                db[AddressListTable].serialize(c, address)
+            db.profiler.reset()
+
+            for _ in range(0, 3):
+                self.assertEqual(4, len(self._select_addresses(c, coin)))
+            query = (
+                f"SELECT * FROM {AddressListTable.identifier}"
+                f" WHERE {AddressListTable.Column.ROW_ID.value.identifier}"
+                f" IN ({', '.join('?' * 3)})"
+            )
+            self.assertEqual(
+                3,
+                len(c.execute(
+                    query,
+                    [a.rowId for a in coin.addressList[:3]]).fetchall()))
+            c.execute(
+                f"UPDATE {AddressListTable.identifier} SET \"label\" = ?",
+                ("label", ))
+
+        statement_map = {s.query: s for s in db.profiler.statementList}
+        statement = statement_map[
+            f"SELECT * FROM {AddressListTable.identifier}"
+            f" WHERE {AddressListTable.Column.ROW_ID.value.identifier}"
+            f" IN (?, ...)"]
+        self.assertEqual((1, 3), (statement.count, statement.rowCount))
+        statement = statement_map[
+            f"UPDATE {AddressListTable.identifier} SET \"label\" = ?"]
+        self.assertEqual((1, 4), (statement.count, statement.rowCount))
+        statement = next(
+            s for s in statement_map.values()
+            if s.count == 3 and s.query.startswith("SELECT"))
+        self.assertEqual(3 * 4, statement.rowCount)
+        self.assertGreater(statement.totalTime, 0)
+        self.assertGreater(statement.p99Time, 0)
+
+        report = db.profiler.report()
+        self.assertIn("IN (?, ...)", report)
+        _logger.debug("Database profile:\n%s", report)
+        self.assertTrue(db.close())
+
+        self.assertEqual(
+            "INSERT INTO t (a, b) VALUES (?, ...), ...",
+            db.profiler.normalize(
+                "INSERT INTO t (a, b)\n VALUES (?, ?), (?, ?), (?, ?)"))
+
+    def test_write_queue(self) -> None:
+        db = self._create(Path("write_queue.db"))
+        self.assertTrue(db.open())
+        queue = db.writeQueue
+        self.assertTrue(queue.isEmpty)
+        self.assertTrue(queue.flush())
+
+        coin_list = CoinList()
+        coin = coin_list[0]
+        fillCoin(self, coin, address_count=4, tx_count=4)
+
+        for _ in range(0, 2):
+            queue.appendCoin(coin)
+            for address in coin.addressList:
+                queue.appendAddress(address)
+                for tx in address.txList:
+                    queue.appendTx(tx)
+                    queue.appendTx(tx, address)
+        self.assertEqual(1 + 4 + 4 * 4, len(queue))
+
+        with db.transaction(suppress_exceptions=False) as c:
+            self.assertEqual(0, len(self._select_coin(c, coin)))
+            # transaction in effect, objects stay in the queue
+            self.assertFalse(queue.flush())
+            self.assertEqual(1 + 4 + 4 * 4, len(queue))
+
+        self.assertTrue(queue.flush())
+        self.assertTrue(queue.isEmpty)
+
+        with db.transaction(suppress_exceptions=False) as c:
+            self.assertEqual(1, len(self._select_coin(c, coin)))
+            self.assertEqual(4, len(self._select_addresses(c, coin)))
+            self.assertEqual(4 * 4, len(self._select_transactions(c, coin)))
+            for address in coin.addressList:
+                self.assertGreater(address.rowId, 0)
+                self.assertEqual(
+                    4,
+                    len(self._select_address_transaction_map(c, address)))
+                for tx in address.txList:
+                    self.assertGreater(tx.rowId, 0)
+                    self.assertEqual(
+                        len(tx.inputList) + len(tx.outputList),
+                        len(self._select_transaction_io(c, tx)))
+
+        # close() writes pending objects
+        address = coin.addressList[0]
+        address.label = "new label"
+        queue.appendAddress(address)
+        self.assertTrue(db.close())
+        self.assertTrue(queue.isEmpty)
+
+        self.assertTrue(db.open())
+        new_coin = CoinList()[0]
+        with db.transaction(suppress_exceptions=False) as c:
+            self.assertTrue(db[CoinListTable].deserialize(c, new_coin))
+            self.assertTrue(db[AddressListTable].deserializeAll(c, new_coin))
+        self.assertEqual(
+            "new label",
+            new_coin.findAddressByName(address.name).label)
+
+        # suspended queue keeps objects until resume()
+        queue.suspend()
+        self.assertTrue(queue.isSuspended)
+        queue.appendAddress(address)
+        self.assertFalse(queue.flush())
+        self.assertEqual(1, len(queue))
+        queue.resume()
+        self.assertFalse(queue.isSuspended)
+        self.assertEqual(1, len(queue))
+        self.assertTrue(queue.flush())
+        self.assertTrue(queue.isEmpty)
+
+        # nothing to write without database
+        self.assertTrue(db.close())
+        queue.appendCoin(coin)
+        self.assertFalse(queue.flush())
+        self.assertTrue(queue.isEmpty)
+
+    def test_write_queue_in_flight(self) -> None:
+        db = self._create(Path("write_queue_in_flight.db"))
+        executor = db.executor
+        executor.start()
+        self.assertTrue(db.open())
+        queue = db.writeQueue
+
+        coin = CoinList()[0]
+        fillCoin(self, coin, address_count=1, tx_count=2)
+        address = coin.addressList[0]
+
+        # the second flush is serialized before the row ids of the first one
+        # are applied
+        event = Event()
+        executor.submit(event.wait)
+        queue.appendCoin(coin)
+        queue.appendAddress(address)
+        self.assertTrue(queue.flush())
+        self.assertLess(address.rowId, 0)
+        for tx in address.txList:
+            queue.appendTx(tx, address)
+        self.assertTrue(queue.flush())
+        event.set()
+
+        for _ in range(0, 100):
+            if all(tx.rowId > 0 for tx in address.txList):
+                break
+            QCoreApplication.processEvents()
+            time.sleep(0.01)
+        self.assertGreater(coin.rowId, 0)
+        self.assertGreater(address.rowId, 0)
+        for tx in address.txList:
+            self.assertGreater(tx.rowId, 0)
+        self.assertEqual(
+            len(address.txList),
+            len(executor.submitTransaction(
+                lambda c: self._select_address_transaction_map(c, address)
+            ).result()))
+        self.assertTrue(db.close())
+
+    def test_executor(self) -> None:
+        db = self._create(Path("executor.db"))
+        executor = db.executor
+        self.assertFalse(executor.isRunning)
+        executor.start()
+        self.assertTrue(executor.isRunning)
+        self.assertFalse(executor.isDatabaseThread)
+
+        # called from the main thread, executed in the database thread
+        self.assertTrue(db.open())
+        self.assertTrue(db.isOpen)
+        self.assertTrue(executor.submit(
+            lambda: executor.isDatabaseThread).result())
+        with self.assertRaises(AssertionError):
+            with db.transaction():
+                pass
+
+        coin_list = CoinList()
+        coin = coin_list[0]
+        fillCoin(self, coin, address_count=4, tx_count=4)
+        queue = db.writeQueue
+        queue.appendCoin(coin)
+        for address in coin.addressList:
+            queue.appendAddress(address)
+            for tx in address.txList:
+                queue.appendTx(tx, address)
+        label = coin.addressList[0].label
+        self.assertTrue(queue.flush())
+        self.assertTrue(queue.isEmpty)
+
+        # objects are serialized by flush(), row ids are set by the callback
+        coin.addressList[0].label = "changed label"
+        for _ in range(0, 100):
+            if coin.rowId > 0:
+                break
+            QCoreApplication.processEvents()
+            time.sleep(0.01)
+        self.assertGreater(coin.rowId, 0)
+        for address in coin.addressList:
+            self.assertGreater(address.rowId, 0)
+            for tx in address.txList:
+                self.assertGreater(tx.rowId, 0)
+                for io in chain(tx.inputList, tx.outputList):
+                    self.assertGreater(io.rowId, 0)
+        row_id = coin.addressList[0].rowId
+        self.assertEqual(
+            [(label, )],
+            executor.submitTransaction(
+                lambda c: c.execute(
+                    f"SELECT \"label\" FROM {AddressListTable.identifier}"
+                    f" WHERE \"row_id\" == ?",
+                    (row_id, )).fetchall()).result())
+        coin.addressList[0].label = label
+
+        callback_list = []
+
+        def fetch(cursor: Cursor) -> Tuple[Any, ...]:
+            self.assertTrue(executor.isDatabaseThread)
+            new_coin = CoinList()[0]
+            coin_result = db[CoinListTable].fetch(cursor, new_coin)
+            row_id = coin_result["row_id"]
+            return (
+                new_coin,
+                coin_result,
+                db[AddressListTable].fetchAll(cursor, new_coin, row_id),
+                db[TxListTable].fetchAll(cursor, new_coin, row_id))
+
+        future = executor.submitTransaction(
+            fetch,
+            callback=callback_list.append)
+        new_coin, coin_result, address_result, tx_result = future.result()
+        # callback is delivered to the thread of the executor object
+        self.assertEqual([], callback_list)
+        for _ in range(0, 100):
+            if callback_list:
+                break
+            QCoreApplication.processEvents()
+            time.sleep(0.01)
+        self.assertEqual([future], callback_list)
+
+        self.assertTrue(db[CoinListTable].load(new_coin, coin_result))
+        self.assertTrue(db[AddressListTable].loadAll(new_coin, address_result))
+        self.assertTrue(db[TxListTable].loadAll(new_coin, tx_result))
+        self.assertEqual(coin.rowId, new_coin.rowId)
+        for address in coin.addressList:
+            new_address = new_coin.findAddressByName(address.name)
+            self.assertIsNotNone(new_address)
+            self.assertEqual(
+                sorted(t.name for t in address.txList),
+                sorted(t.name for t in new_address.txList))
+
+        # reads are read-only, queued writes are executed before them
+        order_list = []
+        event = Event()
+        executor.submit(event.wait)
+        read_future = executor.submitRead(
+            lambda c: order_list.append("read") or c.execute(
+                f"SELECT COUNT(*) FROM {AddressListTable.identifier}"
+            ).fetchone()[0])
+        executor.submit(lambda: order_list.append("write"))
+        event.set()
+        self.assertEqual(len(coin.addressList), read_future.result())
+        self.assertEqual(["write", "read"], order_list)
+        with self.assertRaises(db.engine.Error):
+            executor.submitRead(
+                lambda c: c.execute(
+                    f"DELETE FROM {AddressListTable.identifier}")
+            ).result()
+        self.assertEqual(
+            len(coin.addressList),
+            executor.submitTransaction(
+                lambda c: c.execute(
+                    f"SELECT COUNT(*) FROM {AddressListTable.identifier}"
+                ).fetchone()[0]).result())
+
+        # exceptions are passed through the future
+        future = executor.submit(lambda: 1 // 0)
+        with self.assertRaises(ZeroDivisionError):
+            future.result()
+
+        self.assertTrue(db.close())
+        self.assertFalse(db.isOpen)
+        self.assertFalse(executor.isRunning)
+
+        # without the thread jobs are executed immediately
+        callback_list.clear()
+        future = executor.submit(lambda: 1, callback=callback_list.append)
+        self.assertTrue(future.done())
+        self.assertEqual([future], callback_list)
+
+    def test_utxo_list(self) -> None:
+        db = self._create(Path("utxo_list.db"))
+        self.assertTrue(db.open())
+
+        coin = CoinList()[0]
+        fillCoin(self, coin, address_count=4, tx_count=0)
+        address = coin.addressList[0]
+        utxo_name = sha256(b"utxo_list").hexdigest()
+        utxo_list = [coin.Tx.Utxo(
+            coin,
+            name=u.name,
+            height=u.height,
+            index=u.index,
+            amount=u.amount) for u in address.utxoList]
+        utxo_list.append(coin.Tx.Utxo(
+            coin,
+            name=utxo_name,
+            height=100,
+            index=1,
+            amount=200))
+        address.utxoList = utxo_list
+
+        queue = db.writeQueue
+        queue.appendCoin(coin)
+        for a in coin.addressList:
+            queue.appendAddress(a)
+            queue.appendUtxoList(a)
+        self.assertTrue(queue.flush())
+        self.assertTrue(all(
+            u.rowId > 0 for a in coin.addressList for u in a.utxoList))
+
+        def load() -> Coin:
+            new_coin = CoinList()[0]
+            with db.transaction(suppress_exceptions=False) as c:
+                self.assertTrue(db[CoinListTable].deserialize(c, new_coin))
+                self.assertTrue(
+                    db[AddressListTable].deserializeAll(c, new_coin))
+                self.assertTrue(db[UtxoListTable].deserializeAll(c, new_coin))
+            return new_coin
+
+        new_coin = load()
+        for a in coin.addressList:
+            new_address = new_coin.findAddressByName(a.name)
+            self.assertCountEqual(a.utxoList, new_address.utxoList)
+            self.assertCountEqual(
+                [u.rowId for u in a.utxoList],
+                [u.rowId for u in new_address.utxoList])
+            for u in new_address.utxoList:
+                self.assertIs(new_address, u.address)
+        with db.transaction(suppress_exceptions=False) as c:
+            self.assertEqual(
+                ("blob", ),
+                c.execute(
+                    f"SELECT typeof(name) FROM {UtxoListTable.identifier}"
+                    f" WHERE amount == 200").fetchone())
+
+        # reconcile: spent, unchanged and new UTXOs
+        utxo_list = [coin.Tx.Utxo(
+            coin,
+            name=u.name,
+            height=u.height,
+            index=u.index,
+            amount=u.amount) for u in address.utxoList[1:]]
+        utxo_list.append(coin.Tx.Utxo(
+            coin,
+            name="utxo_new",
+            height=300,
+            index=2,
+            amount=400))
+        with db.transaction(suppress_exceptions=False) as c:
+            address.utxoList = utxo_list
+            db[UtxoListTable].serializeAll(c, address)
+            coin.addressList[1].utxoList = []
+            db[UtxoListTable].serializeAll(c, coin.addressList[1])
+
+        new_coin = load()
+        self.assertCountEqual(
+            utxo_list,
+            new_coin.findAddressByName(address.name).utxoList)
+        self.assertEqual(
+            [],
+            new_coin.findAddressByName(coin.addressList[1].name).utxoList)
+        self.assertCountEqual(
+            coin.addressList[2].utxoList,
+            new_coin.findAddressByName(coin.addressList[2].name).utxoList)
+        self.assertTrue(db.close())
@@ -1,12 +1,20 @@
 from __future__ import annotations
 
 import os
+import time
 from itertools import chain
+from typing import TYPE_CHECKING
 from unittest import TestCase
 
 import bmnclient.database.vfs as vfs  # TODO kill
-from bmnclient.database.vfs import VfsFile
-from tests import TestApplication
+from bmnclient.database.profiler import DatabaseProfiler, VfsProfile
+from bmnclient.database.vfs import VfsFile, VfsSectorCache
+from tests import TestApplication, benchmark
+
+if TYPE_CHECKING:
+    from typing import Optional
+
+_logger = TestApplication.getLogger(__name__)
 
 
 class TestDatabaseVfs(TestCase):
@@ -25,18 +33,247 @@ class TestDatabaseVfs(TestCase):
         ):
             self._test_sector(sector_size)
 
-    def _test_sector(self, sector_size: int):
+    def test_sector_cache(self) -> None:
+        for sector_size in (16, 512, 1025, 4096):
+            cache = VfsSectorCache(16 * sector_size)
+            self._test_sector(sector_size, cache)
+            self.assertGreater(cache.hitCount, 0)
+            self.assertGreater(cache.missCount, 0)
+            self.assertEqual(0, len(cache))
+
+        self._application.tempPath.mkdir(parents=True, exist_ok=True)
+        cache = VfsSectorCache(4 * 512)
+        file = self._open(
+            self._application.tempPath / "sector-cache.dat",
+            512,
+            cache)
+        file.truncate(0)
+        for i in range(8):
+            file.write(bytes([i]) * file.sectorSize, i * file.sectorSize)
+        self.assertEqual(4, len(cache))
+        self.assertEqual(4 * 512, cache.size)
+        self.assertEqual(0, cache.hitCount)
+        self.assertEqual(0, cache.missCount)
+
+        # write-through, last 4 sectors in cache
+        self.assertEqual(b"\x07" * 10, file.read(10, 7 * file.sectorSize))
+        self.assertEqual(1, cache.hitCount)
+        self.assertEqual(b"\x00" * 10, file.read(10, 0))
+        self.assertEqual(1, cache.missCount)
+        self.assertEqual(4, len(cache))
+
+        # partial write uses cached sector
+        file.write(b"#", 1)
+        self.assertEqual(2, cache.hitCount)
+        self.assertEqual(b"\x00#\x00", file.read(3, 0))
+
+        # truncate invalidates removed sectors
+        file.truncate(6 * file.sectorSize + 1)
+        self.assertEqual(b"", file.read(10, 7 * file.sectorSize))
+        self.assertEqual(b"\x05" * 10, file.read(10, 5 * file.sectorSize))
+
+        cache.resetCounters()
+        self.assertEqual(0, cache.hitCount)
+        self.assertEqual(0, cache.missCount)
+
+        file.close()
+        self.assertEqual(0, len(cache))
+
+        # other files are not affected
+        for file_key in ("a", "b"):
+            for i in range(3):
+                cache.set(file_key, i, file_key.encode() * 16)
+        cache.remove("a", 1)
+        self.assertEqual(4, len(cache))
+        self.assertEqual(4 * 16, cache.size)
+        self.assertIsNotNone(cache.get("a", 0))
+        self.assertIsNone(cache.get("a", 1))
+        self.assertIsNotNone(cache.get("b", 2))
+        cache.remove("a")
+        cache.remove("c")
+        self.assertEqual(3, len(cache))
+        self.assertEqual(3 * 16, cache.size)
+        cache.clear()
+        self.assertEqual(0, len(cache))
+        self.assertEqual(0, cache.size)
+
+    def test_sync(self) -> None:
         self._application.tempPath.mkdir(parents=True, exist_ok=True)
-        file = VfsFile(
+        file = self._open(self._application.tempPath / "sync.dat", 512)
+        file.truncate(0)
+        for flags in (
+                vfs.SQLITE_SYNC_NORMAL,
+                vfs.SQLITE_SYNC_FULL,
+                vfs.SQLITE_SYNC_NORMAL | vfs.SQLITE_SYNC_DATAONLY,
+                vfs.SQLITE_SYNC_FULL | vfs.SQLITE_SYNC_DATAONLY
+        ):
+            file.write(b"data", 0)
+            # noinspection PyProtectedMember
+            self.assertTrue(file._is_dirty)
+            file.sync(flags)
+            # noinspection PyProtectedMember
+            self.assertFalse(file._is_dirty)
+
+            # nothing to sync
+            file.sync(flags)
+            # noinspection PyProtectedMember
+            self.assertFalse(file._is_dirty)
+        self.assertEqual(b"data", file.read(4, 0))
+        file.close()
+
+    def test_page_size(self) -> None:
+        self._application.tempPath.mkdir(parents=True, exist_ok=True)
+        file_path = self._application.tempPath / "page-size.db"
+        header = bytearray(100)
+        header[0:16] = b"SQLite format 3\0"
+        header[16:18] = (16384).to_bytes(2, "big")
+
+        file = self._open(file_path, 16384)
+        file.truncate(0)
+        file.write(bytes(header), 0)
+        self.assertEqual(16384, file.readPageSize())
+        self.assertEqual(
+            vfs.SQLITE_IOCAP_POWERSAFE_OVERWRITE,
+            file.device_characteristics())
+        file.close()
+
+        # existing database keeps its sector size
+        file_vfs = vfs.Vfs(self._application, sector_size=4096)
+        self.assertEqual(4096, file_vfs.sectorSize)
+        file = file_vfs.open(
+            str(file_path),
+            vfs.SQLITE_OPEN_READWRITE | vfs.SQLITE_OPEN_MAIN_DB)
+        self.assertEqual(16384, file.sectorSize)
+        self.assertEqual(bytes(header), file.read(len(header), 0))
+
+        journal = file_vfs.open(
+            str(file_path) + "-journal",
+            vfs.SQLITE_OPEN_READWRITE
+            | vfs.SQLITE_OPEN_CREATE
+            | vfs.SQLITE_OPEN_MAIN_JOURNAL)
+        self.assertTrue(journal.isEncrypted)
+        self.assertEqual(16384, journal.sectorSize)
+        self.assertEqual(0, journal.device_characteristics())
+        file_vfs.close(journal)
+        file_vfs.close(file)
+
+        # unencrypted and invalid files
+        file = self._open(file_path, 4096, encrypted=False)
+        self.assertIsNone(file.readPageSize())
+        self.assertEqual(
+            vfs.SQLITE_IOCAP_POWERSAFE_OVERWRITE,
+            file.device_characteristics())
+        file.close()
+        file = self._open(file_path, 4096)
+        file.truncate(0)
+        self.assertIsNone(file.readPageSize())
+        file.close()
+
+    def test_profiler(self) -> None:
+        self._application.tempPath.mkdir(parents=True, exist_ok=True)
+        file_path = self._application.tempPath / "profiler.dat"
+        profiler = DatabaseProfiler()
+        file_vfs = vfs.Vfs(
+            self._application,
+            sector_size=4096,
+            profiler=profiler)
+        file = file_vfs.open(
+            str(file_path),
+            vfs.SQLITE_OPEN_READWRITE
+            | vfs.SQLITE_OPEN_CREATE
+            | vfs.SQLITE_OPEN_MAIN_DB)
+        file_vfs.truncate(file, 0)
+
+        data = os.urandom(4096)
+        for i in range(0, 4):
+            file_vfs.write(file, data, i * len(data))
+        file_vfs.sync(file, vfs.SQLITE_SYNC_NORMAL)
+        self.assertEqual(data, file_vfs.read(file, len(data), 0))
+        file_vfs.close(file)
+
+        profile_map = {p.operation: p for p in profiler.vfsList}
+        self.assertEqual(
+            (4, 4 * len(data)),
+            (
+                profile_map[VfsProfile.Operation.WRITE].count,
+                profile_map[VfsProfile.Operation.WRITE].size
+            ))
+        self.assertEqual(
+            (1, len(data)),
+            (
+                profile_map[VfsProfile.Operation.READ].count,
+                profile_map[VfsProfile.Operation.READ].size
+            ))
+        self.assertEqual(1, profile_map[VfsProfile.Operation.SYNC].count)
+        for profile in profile_map.values():
+            self.assertGreater(profile.totalTime, 0)
+
+        profiler.reset()
+        self.assertTrue(all(p.count == 0 for p in profiler.vfsList))
+
+    @benchmark
+    def test_benchmark(self) -> None:
+        self._application.tempPath.mkdir(parents=True, exist_ok=True)
+        file_size = 8 * 1024 * 1024
+        chunk_size = 64 * 1024
+        data = os.urandom(chunk_size)
+
+        for name, encrypted in (("plain", False), ("encrypted", True)):
+            file = self._open(
+                self._application.tempPath / ("benchmark-" + name + ".dat"),
+                0,
+                encrypted=encrypted)
+            self.assertEqual(encrypted, file.isEncrypted)
+            file.truncate(0)
+
+            timeframe = time.monotonic_ns()
+            for offset in range(0, file_size, chunk_size):
+                file.write(data, offset)
+            write_timeframe = time.monotonic_ns() - timeframe
+
+            timeframe = time.monotonic_ns()
+            for offset in range(0, file_size, chunk_size):
+                self.assertEqual(data, file.read(chunk_size, offset))
+            read_timeframe = time.monotonic_ns() - timeframe
+
+            self.assertEqual(file_size, file.file_size())
+            file.close()
+
+            _logger.info(
+                "VFS {} file: write ~{:.2f} MB/s, read ~{:.2f} MB/s."
+                .format(
+                    name,
+                    file_size * 1e+9 / write_timeframe / (1024 * 1024),
+                    file_size * 1e+9 / read_timeframe / (1024 * 1024)))
+
+    def _open(
+            self,
+            file_path: os.PathLike,
+            sector_size: int,
+            cache: Optional[VfsSectorCache] = None,
+            *,
+            encrypted: bool = True) -> VfsFile:
+        return VfsFile(
             self._application,
+            file_path,
+            vfs.SQLITE_OPEN_READWRITE
+            | vfs.SQLITE_OPEN_CREATE
+            | (vfs.SQLITE_OPEN_MAIN_DB if encrypted else 0),
+            sector_size,
+            cache=cache)
+
+    def _test_sector(
+            self,
+            sector_size: int,
+            cache: Optional[VfsSectorCache] = None) -> None:
+        self._application.tempPath.mkdir(parents=True, exist_ok=True)
+        file = self._open(
             (
                     self._application.tempPath
                     / "sectors-{:06d}.dat".format(sector_size)
             ),
-            vfs.SQLITE_OPEN_READWRITE
-            | vfs.SQLITE_OPEN_CREATE
-            | vfs.SQLITE_OPEN_MAIN_DB,
-            sector_size)
+            sector_size,
+            cache)
         self.assertTrue(file.isEncrypted)
         self.assertTrue(file.isValid)
         self.assertEqual(sector_size, file.sectorSize)
@@ -141,3 +378,4 @@ class TestDatabaseVfs(TestCase):
         self.assertEqual(
             b"\0" * (file.file_size() - len(shadow)),
             data[len(shadow):])
+        file.close()
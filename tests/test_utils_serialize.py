@@ -1,3 +1,6 @@
+from __future__ import annotations
+
+from typing import Any, Optional
 from unittest import TestCase
 
 from bmnclient.utils.serialize import Serializable, serializable
@@ -29,6 +32,36 @@ class B(A):
         return super().__update__(*args, **kwargs)
 
 
+class C(A):
+    def _serializeProperty(self, key: str, value: Any, **options) -> Any:
+        if key == "value_one":
+            return str(value)
+        return super()._serializeProperty(key, value, **options)
+
+    @classmethod
+    def _deserializeProperty(
+            cls,
+            self: Optional[C],
+            key: str,
+            value: Any,
+            *args,
+            **options) -> Any:
+        if key == "value_one":
+            return int(value)
+        return super()._deserializeProperty(self, key, value, **options)
+
+
+class D(A):
+    # all keys are passed to the overridden method
+    def _serializeProperty(self, key: str, value: Any, **options) -> Any:
+        return -value
+
+
+class E(C):
+    # inherits the overridden methods of C
+    pass
+
+
 class TestSerializable(TestCase):
     def test_basic(self) -> None:
         a1 = A()
@@ -78,3 +111,31 @@ class TestSerializable(TestCase):
         b1.deserializeUpdate({"value_one": 10001})
         self.assertEqual(b1.valueOne, 10001)
         self.assertEqual(b1.valueTwo, a1.valueTwo)
+
+    def test_custom_property(self) -> None:
+        c1 = C(value_one=101, value_two=202)
+        self.assertEqual(
+            {"value_one": "101", "value_two": 202},
+            c1.serialize())
+        c2 = C.deserialize(c1.serialize())
+        self.assertEqual(101, c2.valueOne)
+        self.assertTrue(c2.deserializeUpdate({"value_one": "1001"}))
+        self.assertEqual(1001, c2.valueOne)
+
+        d1 = D(value_one=101, value_two=202)
+        self.assertEqual(
+            {"value_one": -101, "value_two": -202},
+            d1.serialize())
+
+        # serializers are compiled for each class
+        self.assertEqual({"value_one": 1, "value_two": 2}, A().serialize())
+        self.assertRaises(TypeError, A(value_one=b"1").serialize)
+
+    def test_custom_property_inherited(self) -> None:
+        e1 = E(value_one=101, value_two=202)
+        self.assertEqual(
+            {"value_one": "101", "value_two": 202},
+            e1.serialize())
+        e2 = E.deserialize(e1.serialize())
+        self.assertEqual(101, e2.valueOne)
+        self.assertEqual(202, e2.valueTwo)